@@ -0,0 +1,44 @@
+import random
+from typing import List
+
+import chess
+import chess.pgn
+import pytest
+
+# Lengths of the games in plies (opening, middlegame, long game)
+GAME_LENGTHS = [10, 100, 300]
+
+
+def random_sans(plies: int, seed: int = 0) -> List[str]:
+    """Return the SAN of a random legal game with this number of plies."""
+    random_ = random.Random(seed)
+
+    while True:
+        board = chess.Board()
+        list_san = []
+
+        while len(list_san) < plies and not board.is_game_over():
+            move = random_.choice(list(board.legal_moves))
+            list_san.append(board.san(move))
+            board.push(move)
+
+        # Game ended before the number of plies, try another game
+        if len(list_san) == plies:
+            return list_san
+
+
+def build_game(list_san: List[str]) -> chess.pgn.Game:
+    """Return a game with the moves played (result '*')."""
+    game = chess.pgn.Game()
+    node = game
+
+    for san in list_san:
+        node = node.add_variation(node.board().parse_san(san))
+
+    return game
+
+
+@pytest.fixture(params=GAME_LENGTHS, ids=lambda plies: f"{plies}plies")
+def list_san(request: pytest.FixtureRequest) -> List[str]:
+    """SAN of a random legal game (10, 100 and 300 plies)."""
+    return random_sans(request.param, seed=request.param)
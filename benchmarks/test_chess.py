@@ -0,0 +1,73 @@
+import io
+from typing import List
+
+import chess.pgn
+
+from benchmarks.conftest import build_game
+from bresse.chess_ import game_play_san, generate_opening, pgn_to_board
+from bresse.process import preprocess_game
+from tests.conftest import DATA_FOLDER
+
+
+def test_pgn_to_board(benchmark, list_san: List[str]):
+    """Benchmark the parsing of a PGN string to its final board."""
+    pgn = str(build_game(list_san))
+    board = benchmark(pgn_to_board, pgn)
+
+    assert len(board.move_stack) == len(list_san)
+
+
+def test_game_play_san(benchmark, list_san: List[str]):
+    """Benchmark playing all the SAN moves of a game."""
+
+    def play_all(game: chess.pgn.Game) -> chess.pgn.Game:
+        for san in list_san:
+            game_play_san(game, san)
+
+        return game
+
+    game = benchmark.pedantic(
+        play_all, setup=lambda: ((chess.pgn.Game(),), {}), rounds=20
+    )
+
+    assert len(list(game.mainline_moves())) == len(list_san)
+
+
+def test_preprocess_game_cold(benchmark, list_san: List[str]):
+    """Benchmark the first prompt of a game (full export)."""
+    pgn = str(build_game(list_san))
+
+    def setup():
+        game = chess.pgn.read_game(io.StringIO(pgn))
+        return (game,), {}
+
+    prompt = benchmark.pedantic(preprocess_game, setup=setup, rounds=20)
+
+    assert prompt
+
+
+def test_preprocess_game_incremental(benchmark, list_san: List[str]):
+    """Benchmark a prompt by ply while the game is played (Model.play loop)."""
+
+    def play_prompts(game: chess.pgn.Game) -> str:
+        prompt = preprocess_game(game)
+
+        for san in list_san:
+            game_play_san(game, san)
+            prompt = preprocess_game(game)
+
+        return prompt
+
+    prompt = benchmark.pedantic(
+        play_prompts, setup=lambda: ((chess.pgn.Game(),), {}), rounds=20
+    )
+
+    assert prompt
+
+
+def test_generate_opening(benchmark):
+    """Benchmark an opening of the Polyglot book (open the book each call)."""
+    path_polyglot = DATA_FOLDER / "gm2600.bin"
+    game = benchmark(generate_opening, path_polyglot, max_depth=6, seed=42)
+
+    assert len(list(game.mainline_moves())) > 0
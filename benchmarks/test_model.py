@@ -0,0 +1,49 @@
+from typing import List
+
+import chess.pgn
+
+from bresse.input import ConfigInference
+from tests.conftest import FakeModel
+
+
+def test_model_play(benchmark, list_san: List[str]):
+    """Benchmark a game played move by move with Model.play (5 samples by move)."""
+    model = FakeModel("gpt-3.5-turbo-instruct")
+    config = ConfigInference(n=5)
+
+    def play_game(game: chess.pgn.Game) -> chess.pgn.Game:
+        for san in list_san:
+            # Fake generation of the move (4 legal samples, 1 illegal)
+            model.list_san = [san, san, san, san, "Ka9"]
+            model.play(game, config)
+
+        return game
+
+    game = benchmark.pedantic(
+        play_game, setup=lambda: ((chess.pgn.Game(),), {}), rounds=5
+    )
+
+    assert len(list(game.mainline_moves())) == len(list_san)
+
+
+def test_model_auto_play(benchmark, list_san: List[str]):
+    """Benchmark a game generated in one inference with Model.auto_play."""
+    game = chess.pgn.Game()
+    node = game
+
+    for san in list_san:
+        node = node.add_variation(node.board().parse_san(san))
+
+    # Movetext of the game without the headers and the result
+    movetext = str(game).split("\n\n")[1].rsplit(" ", 1)[0]
+    model = FakeModel("gpt-3.5-turbo-instruct", list_san=[movetext])
+
+    def auto_play(game: chess.pgn.Game) -> chess.pgn.Game:
+        model.auto_play(game, ConfigInference(), max_moves=len(list_san))
+        return game
+
+    game = benchmark.pedantic(
+        auto_play, setup=lambda: ((chess.pgn.Game(),), {}), rounds=5
+    )
+
+    assert len(list(game.mainline_moves())) == len(list_san)
@@ -0,0 +1,16 @@
+import chess
+import pytest
+
+from bresse.output import OutputGeneration
+
+
+@pytest.mark.parametrize("n", [1, 10, 100, 1000])
+def test_output_generation_from_inference(benchmark, n: int):
+    """Benchmark the validation of n samples (legal, illegal and invalid SAN)."""
+    board = chess.Board()
+    samples = [" e4", "Nf3 ", "e5", "d4", "Ke2", "xyz", " c4 e5", "O-O"]
+    list_san = [samples[index % len(samples)] for index in range(n)]
+
+    output = benchmark(OutputGeneration.from_inference, board, list_san)
+
+    assert len(output.list_result) == n
@@ -1,8 +1,12 @@
 from bresse.chess_ import (
+    GameSession,
+    OpeningBook,
     game_play_san,
     generate_opening,
     generate_pgn,
     get_child_node,
+    get_legal_san,
+    get_session,
     pgn_to_board,
 )
 from bresse.utils import find_model
@@ -14,4 +18,8 @@ __all__ = [
     "get_child_node",
     "find_model",
     "generate_opening",
+    "GameSession",
+    "get_session",
+    "get_legal_san",
+    "OpeningBook",
 ]
@@ -0,0 +1,182 @@
+import dataclasses
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from bresse.input import ConfigInference
+from bresse.output import OutputInference
+
+if TYPE_CHECKING:
+    from bresse.models.base import Model
+
+# Request waiting in the queue (prompt, config, future of the result)
+Request = Tuple[str, ConfigInference, Future]
+
+
+def _config_key(config: ConfigInference) -> str:
+    """Return a key of the configuration (only same configurations are batched)."""
+    return json.dumps(dataclasses.asdict(config), sort_keys=True)
+
+
+class MicroBatcher:
+    """
+    Collect the prompts of concurrent callers and infer them as one batch.
+
+    Notes:
+        A dispatcher thread waits the first prompt, then collects the others
+        during 'max_wait' seconds (or until 'max_batch_size' prompts), and
+        calls 'model._inference_batch' once by configuration. Results are
+        scattered back to the future of each caller. Any error of a batch
+        (or a wrong number of results) is raised to each of its callers.
+        Set it with 'model.batcher = MicroBatcher(model)', useful for local
+        and self-hosted models with batched inference.
+
+    Attributes:
+        model (Model): Model inferring the batches
+        max_batch_size (int): Maximum number of prompts by batch
+        max_wait (float): Maximum time to collect a batch in seconds
+        batches (int): Number of batches inferred
+        requests (int): Number of prompts inferred
+    """
+
+    model: "Model"
+    max_batch_size: int
+    max_wait: float
+    batches: int
+    requests: int
+
+    def __init__(
+        self, model: "Model", max_batch_size: int = 16, max_wait: float = 0.005
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be greater than 0.")
+
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.requests = 0
+
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, pgn_prompt: str, config: ConfigInference) -> Future:
+        """
+        Add a prompt to the next batch.
+
+        Args:
+            pgn_prompt (str): PGN string to infer (preprocess)
+            config (ConfigInference): Configuration for LLM inference
+
+        Returns:
+            Future: Future of the OutputInference and the generated SAN
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+        future = Future()
+        self._queue.put((pgn_prompt, config, future))
+
+        return future
+
+    def _collect(self, first: Request) -> List[Request]:
+        """Collect the requests arriving during 'max_wait' after the first."""
+        list_request = [first]
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(list_request) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+
+            if timeout <= 0:
+                break
+
+            try:
+                request = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+
+            # Stop the dispatcher after this batch
+            if request is None:
+                self._queue.put(None)
+                break
+
+            list_request.append(request)
+
+        return list_request
+
+    def _dispatch(self, list_request: List[Request]) -> None:
+        """Infer the requests by configuration, set the result of each future."""
+        groups: Dict[str, List[Request]] = {}
+
+        for request in list_request:
+            # Caller cancelled the request (ex: asyncio task cancelled)
+            if not request[2].set_running_or_notify_cancel():
+                continue
+
+            groups.setdefault(_config_key(request[1]), []).append(request)
+
+        for group in groups.values():
+            list_prompt = [pgn_prompt for pgn_prompt, _, _ in group]
+            config = group[0][1]
+
+            try:
+                list_output = self.model._inference_batch(list_prompt, config)
+
+                if len(list_output) != len(group):
+                    raise ValueError(
+                        f"Batch of {len(group)} prompts returned {len(list_output)} results."
+                    )
+            except Exception as exception:
+                self._set_exception(group, exception)
+                continue
+
+            self.batches += 1
+            self.requests += len(group)
+
+            for (_, _, future), output in zip(group, list_output):
+                future.set_result(output)
+
+    @staticmethod
+    def _set_exception(list_request: List[Request], exception: Exception) -> None:
+        """Raise the error to the callers whose future is not resolved."""
+        for _, _, future in list_request:
+            if not future.done():
+                future.set_exception(exception)
+
+    def _run(self) -> None:
+        """Dispatch the batches until the batcher is closed."""
+        while True:
+            first = self._queue.get()
+
+            if first is None:
+                return
+
+            list_request = self._collect(first)
+
+            # Unexpected error must not leave callers waiting (nor stop the thread)
+            try:
+                self._dispatch(list_request)
+            except Exception as exception:
+                self._set_exception(list_request, exception)
+
+    def infer(
+        self, pgn_prompt: str, config: ConfigInference
+    ) -> Tuple[OutputInference, List[str]]:
+        """Infer a prompt in the next batch (wait the result)."""
+        return self.submit(pgn_prompt, config).result()
+
+    def close(self) -> None:
+        """Stop the dispatcher thread once the pending requests are inferred."""
+        with self._lock:
+            if self._thread is None:
+                return
+
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
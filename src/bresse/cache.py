@@ -0,0 +1,202 @@
+import dataclasses
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from os import PathLike
+from typing import Any, Dict, Optional, Union
+
+from bresse.identifiers.base import ModelId
+from bresse.input import ConfigInference
+
+
+def make_key(model_id: ModelId, pgn_prompt: str, config: ConfigInference) -> str:
+    """
+    Create the cache key of an inference.
+
+    Args:
+        model_id (ModelId): Model identifier
+        pgn_prompt (str): PGN string to infer (preprocess)
+        config (ConfigInference): Configuration for LLM inference
+
+    Returns:
+        str: SHA-256 of the model, prompt and configuration
+    """
+    data = {
+        "model_id": model_id.id,
+        "pgn_prompt": pgn_prompt,
+        "config": dataclasses.asdict(config),
+    }
+    text = json.dumps(data, sort_keys=True)
+
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class Cache(ABC):
+    """
+    Base class for all inference caches (key to JSON serializable value).
+
+    Attributes:
+        max_size (int): Maximum number of entries (least recently used are evicted)
+        ttl (Optional[float]): Time to live of an entry in seconds (None is forever)
+    """
+
+    max_size: int
+    ttl: Optional[float]
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None):
+        if max_size < 1:
+            raise ValueError("max_size must be greater than 0.")
+
+        self.max_size = max_size
+        self.ttl = ttl
+
+    def _is_expired(self, created: float) -> bool:
+        """Return True if an entry created at this time is expired."""
+        if self.ttl is None:
+            return False
+
+        return time.time() - created >= self.ttl
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the value of the key (None if missing or expired)."""
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store the value of the key (evict entries if the cache is full)."""
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int: ...
+
+
+class LRUCache(Cache):
+    """In-memory cache with least recently used eviction."""
+
+    def __init__(self, max_size: int = 10_000, ttl: Optional[float] = None):
+        super().__init__(max_size=max_size, ttl=ttl)
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the value of the key (None if missing or expired)."""
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return None
+
+            created, value = entry
+
+            if self._is_expired(created):
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store the value of the key (evict entries if the cache is full)."""
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache(Cache):
+    """On-disk cache (SQLite) with least recently used eviction."""
+
+    def __init__(
+        self,
+        path: Union[str, PathLike],
+        max_size: int = 1_000_000,
+        ttl: Optional[float] = None,
+    ):
+        super().__init__(max_size=max_size, ttl=ttl)
+
+        # Connection is shared by threads (asynchronous inference run in threads)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT, created REAL, accessed REAL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)"
+        )
+        self._connection.commit()
+
+        # Number of entries is tracked to evict without counting the table
+        cursor = self._connection.execute("SELECT COUNT(*) FROM cache")
+        self._size = cursor.fetchone()[0]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the value of the key (None if missing or expired)."""
+        with self._lock:
+            cursor = self._connection.execute(
+                "SELECT value, created FROM cache WHERE key = ?", (key,)
+            )
+            row = cursor.fetchone()
+
+            if row is None:
+                return None
+
+            value, created = row
+
+            if self._is_expired(created):
+                self._connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._connection.commit()
+                self._size -= 1
+                return None
+
+            self._connection.execute(
+                "UPDATE cache SET accessed = ? WHERE key = ?", (time.time(), key)
+            )
+            self._connection.commit()
+
+            return json.loads(value)
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store the value of the key (evict entries if the cache is full)."""
+        now = time.time()
+
+        with self._lock:
+            cursor = self._connection.execute(
+                "SELECT 1 FROM cache WHERE key = ?", (key,)
+            )
+
+            if cursor.fetchone() is None:
+                self._size += 1
+
+            self._connection.execute(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+
+            if self._size > self.max_size:
+                self._connection.execute(
+                    "DELETE FROM cache WHERE key IN ("
+                    "SELECT key FROM cache ORDER BY accessed LIMIT ?)",
+                    (self._size - self.max_size,),
+                )
+                self._size = self.max_size
+
+            self._connection.commit()
+
+    def close(self) -> None:
+        """Close the connection to the database."""
+        self._connection.close()
+
+    def __len__(self) -> int:
+        return self._size
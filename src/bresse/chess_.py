@@ -1,34 +1,53 @@
 import contextlib
 import random
+import weakref
 from io import StringIO
 from os import PathLike
-from typing import Literal, Optional, Union
+from typing import Dict, Iterator, Literal, Optional, Self, Union
 
 import chess
 import chess.pgn
 import chess.polyglot
 
 
+def _check_errors(game: chess.pgn.Game) -> None:
+    """Raise ValueError if the parser found errors in the game."""
+    if game.errors:
+        list_error = (f"{error}" for error in game.errors)
+        list_error = ", ".join(list_error)
+        raise ValueError(f"Error in PGN, list of errors: {list_error}")
+
+
 def pgn_to_board(pgn: str) -> chess.Board:
     """Get chess.Board from PGN string."""
     io_pgn = StringIO(pgn)
     game = chess.pgn.read_game(io_pgn)
     moves = game.mainline_moves()
 
-    if game.errors:
-        list_error = (f"{error}" for error in game.errors)
-        list_error = ", ".join(list_error)
-        raise ValueError(f"Error in PGN, list of errors: {list_error}")
+    _check_errors(game)
 
-    board = chess.Board()
-    generator = (move.uci() for move in moves)
+    # Moves are validated by the parser, push them without conversion
+    board = game.board()
 
-    for move in generator:
-        board.push_uci(move)
+    for move in moves:
+        board.push(move)
 
     return board
 
 
+def get_legal_san(board: chess.Board) -> Dict[str, chess.Move]:
+    """
+    Get the legal moves of a board by SAN.
+
+    Args:
+        board (chess.Board): Board to get the legal moves
+
+    Returns:
+        Dict[str, chess.Move]: Legal moves by SAN (ex: {'Nf3': Move.from_uci('g1f3')})
+    """
+    return {board.san(move): move for move in board.legal_moves}
+
+
 def get_child_node(node: chess.pgn.GameNode) -> chess.pgn.GameNode:
     """Get the last variation of game node."""
     if node.variations:
@@ -38,6 +57,107 @@ def get_child_node(node: chess.pgn.GameNode) -> chess.pgn.GameNode:
     return node
 
 
+class GameSession:
+    """
+    Incremental state of a chess game, keep the live board and the last node.
+
+    Notes:
+        The session is built once per game (full replay), then each move
+        played through it only cost a SAN parsing and a board push.
+        The session follow the mainline (same position as the prompt),
+        side variations are ignored and moves are played at the end of
+        the mainline. Moves added to the last node outside the session
+        are caught up.
+        The session only keep weak references to the game tree.
+
+    Attributes:
+        node (chess.pgn.GameNode): Last node of the mainline
+        board (chess.Board): Board at the position of the last node
+    """
+
+    board: chess.Board
+
+    def __init__(self, game: chess.pgn.Game):
+        _check_errors(game)
+
+        self.node = game.end()
+        self.board = self.node.board()
+
+    @property
+    def node(self) -> Optional[chess.pgn.GameNode]:
+        """Return the last node (None if removed from the game)."""
+        return self._node()
+
+    @node.setter
+    def node(self, node: chess.pgn.GameNode) -> None:
+        self._node = weakref.ref(node)
+
+    def is_stale(self) -> bool:
+        """Return True if the last node was removed from the game or is no longer in the mainline."""
+        node = self.node
+
+        if node is None:
+            return True
+
+        return not node.is_mainline()
+
+    def sync(self) -> None:
+        """Catch up moves added to the last node outside the session."""
+        node = self.node
+
+        while node.variations:
+            node = node.variations[0]
+            self.board.push(node.move)
+
+        self.node = node
+
+    def play_san(self, san: str) -> chess.pgn.ChildNode:
+        """
+        Play a SAN move at the end of the game.
+
+        Args:
+            san (str): SAN move to play
+
+        Returns:
+            chess.pgn.ChildNode: Node created for the move
+        """
+        self.sync()
+
+        # Raise ValueError if the move is invalid, illegal or ambiguous
+        move = self.board.parse_san(san)
+
+        node = self.node.add_variation(move)
+        self.board.push(move)
+        self.node = node
+
+        return node
+
+
+# Sessions are released with their game (no need to close them)
+_SESSIONS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def get_session(game: chess.pgn.Game) -> GameSession:
+    """
+    Get the session of a game (create it on first call).
+
+    Args:
+        game (chess.pgn.Game): Game to get the session
+
+    Returns:
+        GameSession: Session synchronized with the game
+    """
+    session = _SESSIONS.get(game)
+
+    if session is None or session.is_stale():
+        session = GameSession(game)
+        _SESSIONS[game] = session
+    else:
+        session.sync()
+
+    return session
+
+
 def game_play_san(game: chess.pgn.Game, san: str) -> None:
     """
     Play a move in a chess game.
@@ -49,15 +169,9 @@ def game_play_san(game: chess.pgn.Game, san: str) -> None:
         game (chess.pgn.Game): Game to play
         san (str): SAN move to play
     """
-    # Create board from PGN
-    board = pgn_to_board(pgn=f"{game}")
-
-    # Get move from SAN
-    move = board.parse_san(san)
-
-    # Add move to last variation (else create new)
-    child_node = get_child_node(game)
-    child_node.add_variation(move)
+    # Add move at the end of the mainline
+    session = get_session(game)
+    session.play_san(san)
 
 
 def generate_pgn(
@@ -114,12 +228,113 @@ def generate_pgn(
     return game
 
 
+class OpeningBook:
+    """
+    Polyglot opening book, kept open (memory-mapped) to generate many openings.
+
+    Attributes:
+        path_polyglot (Union[str, PathLike]): Path to the Polyglot opening book
+    """
+
+    path_polyglot: Union[str, PathLike]
+
+    def __init__(self, path_polyglot: Union[str, PathLike]):
+        self.path_polyglot = path_polyglot
+        self._reader = chess.polyglot.open_reader(path_polyglot)
+
+    def generate(
+        self, max_depth: int = 6, random_: Optional[random.Random] = None
+    ) -> chess.pgn.Game:
+        """
+        Generate an opening game, each move is a weighted choice of the book.
+
+        Args:
+            max_depth (int): Maximum depth of the opening game
+            random_ (Optional[random.Random]): Random number generator
+
+        Returns:
+            chess.pgn.Game: Opening game in PGN format
+        """
+        board = chess.Board()
+        game = chess.pgn.Game()
+        node = game
+
+        # When IndexError is raised, the book have no move for the position
+        with contextlib.suppress(IndexError):
+            for _ in range(max_depth):
+                entry = self._reader.weighted_choice(board, random=random_)
+
+                node = node.add_variation(entry.move)
+                board.push(entry.move)
+
+        return game
+
+    def generate_openings(
+        self,
+        number: int,
+        max_depth: int = 6,
+        seed: Optional[int] = None,
+        unique: bool = False,
+        max_attempts: Optional[int] = None,
+    ) -> Iterator[chess.pgn.Game]:
+        """
+        Generate openings from a single random stream.
+
+        Args:
+            number (int): Number of openings to generate
+            max_depth (int): Maximum depth of each opening game
+            seed (Optional[int]): Seed for the random number generator
+            unique (bool): Don't generate twice the same opening
+            max_attempts (Optional[int]): Maximum number of tries (default 10 by opening)
+
+        Returns:
+            Iterator[chess.pgn.Game]: Opening games (less than number if
+            the book don't have enough unique openings)
+        """
+        random_ = random.Random(seed)
+        seen = set()
+        count = 0
+
+        if max_attempts is None:
+            max_attempts = number * 10
+
+        for _ in range(max_attempts):
+            if count >= number:
+                return
+
+            game = self.generate(max_depth=max_depth, random_=random_)
+
+            if unique:
+                moves = tuple(game.mainline_moves())
+
+                if moves in seen:
+                    continue
+
+                seen.add(moves)
+
+            count += 1
+            yield game
+
+    def close(self) -> None:
+        """Close the opening book."""
+        self._reader.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
 def generate_opening(
     path_polyglot: Union[str, PathLike], max_depth: int = 6, seed: Optional[int] = None
 ) -> chess.pgn.Game:
     """
     Generate an opening game from a Polyglot opening book.
 
+    Notes:
+        To generate many openings, use OpeningBook (book is opened once)
+
     Args:
         path_polyglot (Union[str, PathLike]): Path to the Polyglot opening book
         max_depth (int): Maximum depth of the opening game
@@ -128,21 +343,5 @@ def generate_opening(
     Returns:
         chess.pgn.Game: Opening game in PGN format
     """
-    moves = []
-    board = chess.Board()
-    game = chess.pgn.Game()
-
-    with chess.polyglot.open_reader(path_polyglot) as reader:
-        # When IndexError is raised, the game is over
-        with contextlib.suppress(IndexError):
-            for _ in range(max_depth):
-                random_ = random.Random(seed)
-                entry = reader.weighted_choice(board, random=random_)
-
-                move = entry.move
-                san_move = board.san(move)
-                game_play_san(game, san_move)
-                moves.append(san_move)
-                board.push(move)
-
-    return game
+    with OpeningBook(path_polyglot) as book:
+        return book.generate(max_depth=max_depth, random_=random.Random(seed))
@@ -0,0 +1,289 @@
+import asyncio
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+import requests
+from huggingface_hub import (
+    AsyncInferenceClient,
+    InferenceClient,
+    configure_http_backend,
+)
+from openai import AsyncOpenAI, OpenAI
+from requests.adapters import HTTPAdapter
+
+# Key of a client (provider, endpoint, API key)
+ClientKey = Tuple[str, Optional[str], str]
+
+
+@dataclass(frozen=True)
+class HTTPConfig:
+    """
+    Configuration of the HTTP transport shared by all the clients.
+
+    Attributes:
+        max_connections (int): Maximum number of connections of the pool
+        max_keepalive_connections (int): Maximum number of idle connections kept alive
+        keepalive_expiry (float): Time in seconds before closing an idle connection
+        timeout (float): Timeout of a request in seconds
+        connect_timeout (float): Timeout to establish a connection in seconds
+        max_retries (int): Number of retries done by the clients (OpenAI, 0 for the models with a rate limiter)
+    """
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    timeout: float = 60.0
+    connect_timeout: float = 5.0
+    max_retries: int = 2
+
+    @property
+    def limits(self) -> httpx.Limits:
+        """Return the limits of the connection pool (httpx)."""
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    @property
+    def timeouts(self) -> httpx.Timeout:
+        """Return the timeouts of a request (httpx)."""
+        return httpx.Timeout(self.timeout, connect=self.connect_timeout)
+
+
+class ClientRegistry:
+    """
+    Process-wide registry of the API clients, keyed by provider, endpoint and API key.
+
+    Notes:
+        Model instances with the same key share one client, and all the clients
+        share one pooled HTTP transport (keep-alive, no new TLS handshake).
+        Asynchronous transports are bound to an event loop, there is one
+        transport (and one client by key) for each running event loop.
+        HuggingFace synchronous clients use the sessions of 'huggingface_hub'
+        (one by thread), configured with the pool of the registry on the first
+        HuggingFace client ('configure_http_backend', for the whole process).
+        Its asynchronous clients open a session by request (not pooled).
+        Asynchronous transports are closed with 'aclose' (in their event loop),
+        or by 'release' once the models holding them are done.
+
+    Attributes:
+        config (HTTPConfig): Configuration of the HTTP transport
+    """
+
+    config: HTTPConfig
+
+    def __init__(self, config: HTTPConfig = HTTPConfig()):
+        self.config = config
+
+        # Reentrant, factories of the clients get the transports
+        self._lock = threading.RLock()
+        self._http_client: Optional[httpx.Client] = None
+        self._clients: Dict[ClientKey, Any] = {}
+        self._huggingface_configured = False
+
+        # Asynchronous transport, clients and number of holders by event loop
+        self._async_http_clients = weakref.WeakKeyDictionary()
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._async_holders = weakref.WeakKeyDictionary()
+
+    def _create_session(self) -> requests.Session:
+        """Create a 'requests' session with the connection pool (huggingface_hub)."""
+        adapter = HTTPAdapter(
+            pool_connections=self.config.max_keepalive_connections,
+            pool_maxsize=self.config.max_connections,
+        )
+
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        return session
+
+    def configure_huggingface(self) -> None:
+        """Use the connection pool for the sessions of 'huggingface_hub' (once)."""
+        with self._lock:
+            if not self._huggingface_configured:
+                configure_http_backend(backend_factory=self._create_session)
+                self._huggingface_configured = True
+
+    @property
+    def http_client(self) -> httpx.Client:
+        """Return the synchronous HTTP transport (create it on first call)."""
+        with self._lock:
+            if self._http_client is None:
+                self._http_client = httpx.Client(
+                    limits=self.config.limits, timeout=self.config.timeouts
+                )
+
+            return self._http_client
+
+    @property
+    def async_http_client(self) -> httpx.AsyncClient:
+        """Return the asynchronous HTTP transport of the running event loop."""
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            if loop not in self._async_http_clients:
+                self._async_http_clients[loop] = httpx.AsyncClient(
+                    limits=self.config.limits, timeout=self.config.timeouts
+                )
+
+            return self._async_http_clients[loop]
+
+    def get(self, key: ClientKey, factory: Callable[[], Any]) -> Any:
+        """Return the synchronous client of the key (create it with the factory)."""
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = factory()
+
+            return self._clients[key]
+
+    def get_async(self, key: ClientKey, factory: Callable[[], Any]) -> Any:
+        """Return the asynchronous client of the key for the running event loop."""
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            clients = self._async_clients.setdefault(loop, {})
+
+            if key not in clients:
+                clients[key] = factory()
+
+            return clients[key]
+
+    def acquire(self) -> None:
+        """Hold the asynchronous transport of the running event loop (until 'release')."""
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            self._async_holders[loop] = self._async_holders.get(loop, 0) + 1
+
+    async def release(self) -> None:
+        """Release the asynchronous transport of the running event loop, close it if no longer held."""
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            holders = self._async_holders.pop(loop, 0) - 1
+
+            if holders > 0:
+                self._async_holders[loop] = holders
+                return
+
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the asynchronous transport of the running event loop and forget its clients."""
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            http_client = self._async_http_clients.pop(loop, None)
+            self._async_clients.pop(loop, None)
+
+        if http_client is not None:
+            await http_client.aclose()
+
+    def close(self) -> None:
+        """Close the synchronous transports and forget all the clients."""
+        with self._lock:
+            if self._http_client is not None:
+                self._http_client.close()
+
+            # Sessions of 'huggingface_hub' are created again with the new pool
+            if self._huggingface_configured:
+                configure_http_backend()
+
+            self._http_client = None
+            self._huggingface_configured = False
+            self._clients.clear()
+            self._async_http_clients.clear()
+            self._async_clients.clear()
+
+
+_REGISTRY = ClientRegistry()
+
+
+def get_registry() -> ClientRegistry:
+    """Return the process-wide client registry."""
+    return _REGISTRY
+
+
+def configure_http(config: HTTPConfig) -> None:
+    """
+    Replace the configuration of the HTTP transport.
+
+    Notes:
+        Existing clients are closed, models get new clients on next request
+
+    Args:
+        config (HTTPConfig): Configuration of the HTTP transport
+    """
+    _REGISTRY.close()
+    _REGISTRY.config = config
+
+
+def get_openai_client(
+    api_key: str, base_url: Optional[str] = None, retries: bool = True
+) -> OpenAI:
+    """Return the shared OpenAI client of the endpoint and API key (without retries if 'retries' is False)."""
+    registry = get_registry()
+    max_retries = registry.config.max_retries if retries else 0
+
+    def factory() -> OpenAI:
+        return OpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            max_retries=max_retries,
+            http_client=registry.http_client,
+        )
+
+    return registry.get((f"openai:{max_retries}", base_url, api_key), factory)
+
+
+def get_async_openai_client(
+    api_key: str, base_url: Optional[str] = None, retries: bool = True
+) -> AsyncOpenAI:
+    """Return the shared AsyncOpenAI client of the endpoint and API key (running loop, without retries if 'retries' is False)."""
+    registry = get_registry()
+    max_retries = registry.config.max_retries if retries else 0
+
+    def factory() -> AsyncOpenAI:
+        return AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            max_retries=max_retries,
+            http_client=registry.async_http_client,
+        )
+
+    return registry.get_async((f"openai:{max_retries}", base_url, api_key), factory)
+
+
+def get_huggingface_client(
+    api_key: str, base_url: Optional[str] = None
+) -> InferenceClient:
+    """Return the shared HuggingFace client of the endpoint and API key."""
+    registry = get_registry()
+
+    def factory() -> InferenceClient:
+        registry.configure_huggingface()
+        return InferenceClient(
+            base_url, api_key=api_key, timeout=registry.config.timeout
+        )
+
+    return registry.get(("huggingface", base_url, api_key), factory)
+
+
+def get_async_huggingface_client(
+    api_key: str, base_url: Optional[str] = None
+) -> AsyncInferenceClient:
+    """Return the shared asynchronous HuggingFace client of the endpoint and API key."""
+    registry = get_registry()
+
+    def factory() -> AsyncInferenceClient:
+        return AsyncInferenceClient(
+            base_url, api_key=api_key, timeout=registry.config.timeout
+        )
+
+    return registry.get_async(("huggingface", base_url, api_key), factory)
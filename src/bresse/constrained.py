@@ -0,0 +1,164 @@
+import re
+import warnings
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set
+
+import chess
+
+from bresse.chess_ import get_legal_san
+
+# Maximum number of tokens in the 'logit_bias' of an OpenAI request
+MAX_LOGIT_BIAS = 300
+
+# Generations start with a space (the prompt end with the move number or last move)
+SEPARATOR = " "
+
+
+def legal_generations(board: chess.Board) -> List[str]:
+    """
+    Return the generations allowed on the board (one by legal move).
+
+    Args:
+        board (chess.Board): Board to play
+
+    Returns:
+        List[str]: SAN of each legal move (sorted)
+    """
+    return sorted(get_legal_san(board))
+
+
+class TokenTrie:
+    """
+    Trie of the token ids of the allowed generations.
+
+    Notes:
+        Each generation is tokenized once, the next allowed tokens of a
+        partial generation are found by walking its tokens in the trie.
+
+    Attributes:
+        tokens (Set[int]): Token ids used by the generations
+        depth (int): Number of tokens of the longest generation
+    """
+
+    tokens: Set[int]
+    depth: int
+
+    def __init__(self, sequences: Iterable[Sequence[int]]):
+        self._root: Dict[int, dict] = {}
+        self._ends: Set[int] = set()
+        self.tokens = set()
+        self.depth = 0
+
+        for sequence in sequences:
+            self.add(sequence)
+
+    @classmethod
+    def from_generations(
+        cls,
+        list_generation: Iterable[str],
+        encode: Callable[[str], List[int]],
+        separator: str = SEPARATOR,
+    ) -> "TokenTrie":
+        """
+        Create the trie of the generations with the tokenizer of a model.
+
+        Args:
+            list_generation (Iterable[str]): Generations allowed (ex: legal SAN)
+            encode (Callable[[str], List[int]]): Tokenizer of the model (text to token ids)
+            separator (str): Text before each generation
+
+        Returns:
+            TokenTrie: Trie of the token ids of the generations
+        """
+        return cls(encode(f"{separator}{generation}") for generation in list_generation)
+
+    def add(self, sequence: Sequence[int]) -> None:
+        """Add the token ids of a generation."""
+        node = self._root
+
+        for token in sequence:
+            node = node.setdefault(token, {})
+            self.tokens.add(token)
+
+        # Nodes are unique objects, a complete generation is marked by its node
+        self._ends.add(id(node))
+        self.depth = max(self.depth, len(sequence))
+
+    def _walk(self, prefix: Sequence[int]) -> Optional[dict]:
+        """Return the node of the prefix (None if no generation start with it)."""
+        node = self._root
+
+        for token in prefix:
+            node = node.get(token)
+
+            if node is None:
+                return None
+
+        return node
+
+    def allowed(self, prefix: Sequence[int]) -> List[int]:
+        """Return the next tokens allowed after the prefix (empty if none)."""
+        node = self._walk(prefix)
+
+        if node is None:
+            return []
+
+        return list(node)
+
+    def is_complete(self, prefix: Sequence[int]) -> bool:
+        """Return True if the prefix is a complete generation."""
+        node = self._walk(prefix)
+        return node is not None and id(node) in self._ends
+
+    def next_tokens(self, prefix: Sequence[int], eos_token_id: int) -> List[int]:
+        """
+        Return the next tokens allowed after the prefix, with the end of generation.
+
+        Notes:
+            A complete generation can be the prefix of another one (ex: 'O-O'
+            and 'O-O-O'), the end of generation is allowed with its continuations.
+
+        Args:
+            prefix (Sequence[int]): Token ids generated
+            eos_token_id (int): Token id of the end of generation
+
+        Returns:
+            List[int]: Token ids allowed (only the end of generation if none)
+        """
+        allowed = self.allowed(prefix)
+
+        if not allowed or self.is_complete(prefix):
+            allowed.append(eos_token_id)
+
+        return allowed
+
+    def logit_bias(self, bias: int = 100) -> Dict[str, int]:
+        """
+        Return the 'logit_bias' allowing only the tokens of the generations.
+
+        Notes:
+            The bias constrains each token, not the sequence of tokens,
+            illegal generations are possible, they are rejected by the
+            validation (like an unconstrained generation).
+            An empty bias is returned (with a warning) if there are too many tokens for the API.
+
+        Args:
+            bias (int): Bias of the allowed tokens (100 to allow only them)
+
+        Returns:
+            Dict[str, int]: Bias by token id
+        """
+        if len(self.tokens) > MAX_LOGIT_BIAS:
+            warnings.warn(
+                f"Too many tokens to constrain the generation "
+                f"({len(self.tokens)} > {MAX_LOGIT_BIAS}), generation is not constrained",
+                stacklevel=2,
+            )
+            return {}
+
+        return {str(token): bias for token in sorted(self.tokens)}
+
+
+def generation_regex(list_generation: Iterable[str], separator: str = SEPARATOR) -> str:
+    """Return the regex matching only the generations (grammar of TGI)."""
+    alternatives = "|".join(re.escape(generation) for generation in list_generation)
+    return f"{separator}({alternatives})"
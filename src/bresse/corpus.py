@@ -0,0 +1,254 @@
+import io
+import re
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from os import PathLike
+from pathlib import Path
+from typing import (
+    BinaryIO,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+import chess
+import chess.pgn
+
+from bresse.process import preprocess_game
+
+# Header line of a PGN game (ex: '[Event "Casual game"]', not '[%eval 0.25]')
+REGEX_HEADER = re.compile(rb"^\[[A-Za-z0-9_]+\s+\"")
+
+# Annotations of a move (starting comment, comment, NAGs)
+Annotation = Tuple[str, str, Set[int]]
+
+# Data of a parsed game sent by the workers (headers, comment, moves, annotations, prompt)
+ParsedGame = Tuple[
+    List[Tuple[str, str]], str, List[chess.Move], Dict[int, Annotation], str
+]
+
+
+def _open_corpus(path: Path) -> BinaryIO:
+    """Open a PGN file in binary mode (decompress '.zst' files on the fly)."""
+    handle = path.open("rb")
+
+    if path.suffix != ".zst":
+        return handle
+
+    try:
+        import zstandard
+    except ImportError as exception:
+        handle.close()
+        raise ImportError(
+            "Reading '.zst' files require the 'zstandard' package (pip install zstandard)"
+        ) from exception
+
+    reader = zstandard.ZstdDecompressor().stream_reader(handle, closefd=True)
+    return io.BufferedReader(reader)
+
+
+def _iter_game_texts(handle: BinaryIO) -> Iterator[Tuple[int, bytes]]:
+    """Split a PGN stream into games, yield the offset and the text of each game."""
+    offset = 0
+    start = None
+    lines = []
+    in_movetext = False
+
+    for line in handle:
+        is_header = REGEX_HEADER.match(line) is not None
+
+        # Header after movetext is the beginning of a new game
+        if is_header and in_movetext:
+            yield start, b"".join(lines)
+            start, lines, in_movetext = None, [], False
+
+        if start is None and line.strip():
+            start = offset
+
+        if start is not None:
+            lines.append(line)
+
+        if not is_header and line.strip():
+            in_movetext = True
+
+        offset += len(line)
+
+    if lines:
+        yield start, b"".join(lines)
+
+
+def _parse_games(list_text: List[bytes]) -> List[Optional[ParsedGame]]:
+    """
+    Parse games in a worker (None for games with errors).
+
+    Notes:
+        Game objects are deeply nested (can't be pickled for long games),
+        the mainline and its annotations are sent instead
+    """
+    list_parsed = []
+
+    for text in list_text:
+        io_pgn = io.StringIO(text.decode("utf-8", errors="replace"))
+        game = chess.pgn.read_game(io_pgn)
+
+        if game is None or game.errors:
+            list_parsed.append(None)
+            continue
+
+        headers = list(game.headers.items())
+        moves = []
+        annotations = {}
+
+        for index, node in enumerate(game.mainline()):
+            moves.append(node.move)
+
+            if node.starting_comment or node.comment or node.nags:
+                annotation = (node.starting_comment, node.comment, node.nags)
+                annotations[index] = annotation
+
+        # Prompt of the game yielded (mainline only, without the variations)
+        mainline, _ = _mainline_game(headers, game.comment, moves, annotations)
+        prompt = preprocess_game(mainline)
+        list_parsed.append((headers, game.comment, moves, annotations, prompt))
+
+    return list_parsed
+
+
+def _build_game(
+    parsed: ParsedGame,
+) -> Tuple[chess.pgn.Game, chess.Board, str]:
+    """Build the game (mainline), its board and its prompt from the data sent by a worker."""
+    headers, comment, moves, annotations, prompt = parsed
+    game, board = _mainline_game(headers, comment, moves, annotations)
+
+    return game, board, prompt
+
+
+def _mainline_game(
+    headers: List[Tuple[str, str]],
+    comment: str,
+    moves: List[chess.Move],
+    annotations: Dict[int, Annotation],
+) -> Tuple[chess.pgn.Game, chess.Board]:
+    """Build the game (mainline with its annotations) and its board."""
+    game = chess.pgn.Game(headers)
+    game.comment = comment
+    board = game.board()
+    node = game
+
+    # Moves are already validated by the worker, no need to check legality
+    for index, move in enumerate(moves):
+        node = node.add_variation(move)
+        board.push(move)
+
+        if index in annotations:
+            # Copy the NAGs, games built from the same data don't share them
+            node.starting_comment, node.comment, nags = annotations[index]
+            node.nags = set(nags)
+
+    return game, board
+
+
+class PGNCorpus:
+    """
+    Streaming reader of a large PGN corpus ('.pgn' or '.pgn.zst').
+
+    Notes:
+        Games are split by their headers, parsed by batches in a process pool,
+        and yielded in order. At most 'max_pending' batches are in memory.
+        Games with errors are skipped and counted in 'errors'.
+        Only the mainline of the games is kept (variations are removed).
+
+    Attributes:
+        path (Path): Path to the PGN file
+        workers (int): Number of worker processes (0 to parse in this process)
+        batch_size (int): Number of games parsed by a worker at once
+        max_pending (int): Maximum number of batches submitted and not yielded
+        errors (int): Number of games skipped because of errors
+    """
+
+    path: Path
+    workers: int
+    batch_size: int
+    max_pending: int
+    errors: int
+
+    def __init__(
+        self,
+        path: Union[str, PathLike],
+        workers: int = 4,
+        batch_size: int = 64,
+        max_pending: Optional[int] = None,
+    ):
+        self.path = Path(path)
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_pending = max_pending or 2 * max(workers, 1)
+        self.errors = 0
+
+    def offsets(self) -> Iterator[int]:
+        """Yield the offset of each game (in the decompressed stream for '.zst')."""
+        with _open_corpus(self.path) as handle:
+            for offset, _ in _iter_game_texts(handle):
+                yield offset
+
+    def read_game(self, offset: int) -> Optional[chess.pgn.Game]:
+        """Read the game at an offset (only for uncompressed files)."""
+        if self.path.suffix == ".zst":
+            raise ValueError("Random access is not available for '.zst' files.")
+
+        with self.path.open("rb") as handle:
+            handle.seek(offset)
+            file = io.TextIOWrapper(handle, encoding="utf-8", errors="replace")
+            return chess.pgn.read_game(file)
+
+    def _batches(self, handle: BinaryIO) -> Iterator[List[bytes]]:
+        """Group the texts of the games by batch."""
+        batch = []
+
+        for _, text in _iter_game_texts(handle):
+            batch.append(text)
+
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    def _iter_parsed(self) -> Iterator[Optional[ParsedGame]]:
+        """Parse the games, in a process pool if there are workers."""
+        with _open_corpus(self.path) as handle:
+            if not self.workers:
+                for batch in self._batches(handle):
+                    yield from _parse_games(batch)
+                return
+
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                pending: Deque[Future] = deque()
+
+                for batch in self._batches(handle):
+                    pending.append(executor.submit(_parse_games, batch))
+
+                    # Bounded memory, wait the oldest batch before reading more
+                    if len(pending) >= self.max_pending:
+                        yield from pending.popleft().result()
+
+                while pending:
+                    yield from pending.popleft().result()
+
+    def __iter__(self) -> Iterator[Tuple[chess.pgn.Game, chess.Board, str]]:
+        """Yield the game, the board (end of game) and the prompt of each game."""
+        self.errors = 0
+
+        for parsed in self._iter_parsed():
+            if parsed is None:
+                self.errors += 1
+                continue
+
+            yield _build_game(parsed)
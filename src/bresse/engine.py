@@ -0,0 +1,442 @@
+import contextlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Self, Union
+
+import chess
+import chess.engine
+import chess.pgn
+
+# Centipawns of a mate (mate scores are converted to centipawns)
+MATE_SCORE = 10_000
+
+
+def position_key(board: chess.Board) -> str:
+    """Return the key of the position (FEN without the move counters, transpositions share it)."""
+    return board.epd()
+
+
+@dataclass
+class Evaluation:
+    """
+    Evaluation of a position by the engine.
+
+    Attributes:
+        score (chess.engine.Score): Score from the point of view of White
+        best_move (Optional[chess.Move]): Best move found (None if the game is over)
+        depth (int): Depth of the search, requested or reached (0 if the game is over)
+    """
+
+    score: chess.engine.Score
+    best_move: Optional[chess.Move] = None
+    depth: int = 0
+
+    def cp(self, color: chess.Color) -> int:
+        """Return the score in centipawns from the point of view of the color."""
+        score = self.score if color == chess.WHITE else -self.score
+        return score.score(mate_score=MATE_SCORE)
+
+
+def _evaluate_outcome(board: chess.Board) -> Evaluation:
+    """Return the evaluation of a finished game (no search)."""
+    outcome = board.outcome()
+
+    if outcome.winner is None:
+        return Evaluation(score=chess.engine.Cp(0))
+
+    score = chess.engine.MateGiven
+    score = score if outcome.winner == chess.WHITE else -score
+
+    return Evaluation(score=score)
+
+
+class EvaluationCache:
+    """
+    Least recently used transposition cache of the evaluations, by position.
+
+    Notes:
+        A cached evaluation is used if its depth is enough for the request,
+        deeper evaluations replace shallower ones.
+        The cache can be shared by pools and threads.
+
+    Attributes:
+        max_size (int): Maximum number of positions cached
+        hits (int): Number of lookups found in the cache
+        misses (int): Number of lookups not found in the cache
+    """
+
+    max_size: int
+    hits: int
+    misses: int
+
+    def __init__(self, max_size: int = 100_000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, board: chess.Board, depth: int = 0) -> Optional[Evaluation]:
+        """Return the evaluation of the position with at least this depth (None if not cached)."""
+        key = position_key(board)
+
+        with self._lock:
+            evaluation = self._entries.get(key)
+
+            if evaluation is None or evaluation.depth < depth:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+
+        return evaluation
+
+    def set(self, board: chess.Board, evaluation: Evaluation) -> None:
+        """Store the evaluation of the position (keep the deepest)."""
+        key = position_key(board)
+
+        with self._lock:
+            previous = self._entries.get(key)
+
+            if previous is None or previous.depth <= evaluation.depth:
+                self._entries[key] = evaluation
+
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@dataclass
+class MoveScore:
+    """
+    Quality of a move played, compared to the evaluation of the engine.
+
+    Attributes:
+        ply (int): Index of the move in the mainline (0 for the first move)
+        san (str): SAN of the move played
+        color (chess.Color): Color of the player
+        best_san (Optional[str]): SAN of the best move of the engine
+        score_before (int): Evaluation before the move (centipawns, player point of view)
+        score_after (int): Evaluation after the move (centipawns, player point of view)
+    """
+
+    ply: int
+    san: str
+    color: chess.Color
+    best_san: Optional[str]
+    score_before: int
+    score_after: int
+
+    @property
+    def cp_loss(self) -> int:
+        """Return the centipawns lost by the move (0 for the best move)."""
+        return max(0, self.score_before - self.score_after)
+
+
+@dataclass
+class GameScore:
+    """
+    Quality of the moves of a game.
+
+    Attributes:
+        list_move (List[MoveScore]): Score of each move of the mainline
+    """
+
+    list_move: List[MoveScore] = field(default_factory=list)
+
+    def average_cp_loss(self, color: Optional[chess.Color] = None) -> float:
+        """Return the average centipawn loss of the moves (one color or both)."""
+        list_loss = [
+            move.cp_loss
+            for move in self.list_move
+            if color is None or move.color == color
+        ]
+
+        if not list_loss:
+            return 0.0
+
+        return sum(list_loss) / len(list_loss)
+
+    def __iter__(self) -> Iterator[MoveScore]:
+        return iter(self.list_move)
+
+    def __len__(self) -> int:
+        return len(self.list_move)
+
+
+class EnginePool:
+    """
+    Pool of long-lived UCI engine processes evaluating positions.
+
+    Notes:
+        Engines are started on demand (at most 'size') and kept alive
+        until 'close', an engine is only replaced if its process died
+        or failed (engine error, timeout, interruption). Processes are
+        started outside the lock (other threads don't wait the startup).
+        Positions are evaluated once, then found in the cache.
+        After 'close', the pool start new engines on demand.
+
+    Attributes:
+        command (Union[str, List[str]]): Command of the engine (ex: 'stockfish')
+        size (int): Maximum number of engine processes
+        limit (chess.engine.Limit): Limit of each search
+        options (Dict[str, Union[str, int, bool]]): UCI options of the engines
+        cache (EvaluationCache): Transposition cache of the evaluations
+        starts (int): Number of engine processes started
+    """
+
+    command: Union[str, List[str]]
+    size: int
+    limit: chess.engine.Limit
+    options: Dict[str, Union[str, int, bool]]
+    cache: EvaluationCache
+    starts: int
+
+    def __init__(
+        self,
+        command: Union[str, List[str]],
+        size: int = 1,
+        limit: Optional[chess.engine.Limit] = None,
+        options: Optional[Dict[str, Union[str, int, bool]]] = None,
+        cache: Optional[EvaluationCache] = None,
+    ):
+        if size < 1:
+            raise ValueError("size must be greater than 0.")
+
+        self.command = command
+        self.size = size
+        self.limit = limit or chess.engine.Limit(depth=12)
+        self.options = options or {}
+        self.cache = EvaluationCache() if cache is None else cache
+        self.starts = 0
+
+        self._idle: List[chess.engine.SimpleEngine] = []
+        self._engines: List[chess.engine.SimpleEngine] = []
+        self._condition = threading.Condition()
+
+        # Slots reserved by the engines being started
+        self._starting = 0
+
+    def _start(self) -> chess.engine.SimpleEngine:
+        """Start an engine process."""
+        engine = chess.engine.SimpleEngine.popen_uci(self.command)
+
+        if self.options:
+            engine.configure(self.options)
+
+        return engine
+
+    def _acquire(self) -> chess.engine.SimpleEngine:
+        """Return an idle engine (start one if the pool is not full, else wait)."""
+        with self._condition:
+            # Re-check after each wake up, a removed engine free a slot
+            while not self._idle and len(self._engines) + self._starting >= self.size:
+                self._condition.wait()
+
+            if self._idle:
+                return self._idle.pop()
+
+            self._starting += 1
+
+        # Startup of the process don't block the other threads
+        try:
+            engine = self._start()
+        except BaseException:
+            with self._condition:
+                self._starting -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._starting -= 1
+            self._engines.append(engine)
+            self.starts += 1
+
+        return engine
+
+    @staticmethod
+    def _is_reusable(
+        engine: chess.engine.SimpleEngine, exception: Optional[BaseException]
+    ) -> bool:
+        """Return True if the engine can be given back after the block."""
+        if exception is None:
+            return True
+
+        # Engine in an unknown state (dead, hung or interrupted during a search)
+        if not isinstance(exception, Exception):
+            return False
+
+        if isinstance(exception, (chess.engine.EngineError, TimeoutError)):
+            return False
+
+        return engine.transport.get_returncode() is None
+
+    def _release(self, engine: chess.engine.SimpleEngine, reusable: bool) -> None:
+        """Give back the engine to the pool, or remove it (and stop its process)."""
+        with self._condition:
+            # Engines of a closed pool are no longer in the list
+            reusable = reusable and engine in self._engines
+
+            if reusable:
+                self._idle.append(engine)
+            elif engine in self._engines:
+                self._engines.remove(engine)
+
+            self._condition.notify()
+
+        if not reusable:
+            engine.close()
+
+    @contextlib.contextmanager
+    def engine(self) -> Iterator[chess.engine.SimpleEngine]:
+        """Borrow an engine of the pool (given back at the end of the block)."""
+        engine = self._acquire()
+        exception = None
+
+        try:
+            yield engine
+        except BaseException as error:
+            exception = error
+            raise
+        finally:
+            self._release(engine, self._is_reusable(engine, exception))
+
+    def evaluate(self, board: chess.Board) -> Evaluation:
+        """
+        Evaluate a position (from the cache if already evaluated).
+
+        Args:
+            board (chess.Board): Position to evaluate
+
+        Returns:
+            Evaluation: Score from the point of view of White and best move
+        """
+        depth = self.limit.depth or 0
+        evaluation = self.cache.get(board, depth)
+
+        if evaluation is not None:
+            return evaluation
+
+        if board.is_game_over():
+            evaluation = _evaluate_outcome(board)
+        else:
+            with self.engine() as engine:
+                info = engine.analyse(board, self.limit)
+
+            list_pv = info.get("pv") or [None]
+            evaluation = Evaluation(
+                score=info["score"].white(),
+                best_move=list_pv[0],
+                depth=max(info.get("depth", 0), depth),
+            )
+
+        self.cache.set(board, evaluation)
+
+        return evaluation
+
+    def evaluate_many(self, boards: Iterable[chess.Board]) -> List[Evaluation]:
+        """
+        Evaluate positions concurrently with the engines of the pool.
+
+        Notes:
+            Transpositions are evaluated once
+
+        Args:
+            boards (Iterable[chess.Board]): Positions to evaluate
+
+        Returns:
+            List[Evaluation]: Evaluation of each position (same order)
+        """
+        boards = list(boards)
+        unique = {position_key(board): board for board in boards}
+
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            evaluations = dict(
+                zip(unique, executor.map(self.evaluate, unique.values()))
+            )
+
+        return [evaluations[position_key(board)] for board in boards]
+
+    def score_game(self, game: chess.pgn.Game) -> GameScore:
+        """
+        Score each move of the mainline of a game (ex: played by 'Model.play').
+
+        Args:
+            game (chess.pgn.Game): Game to score
+
+        Returns:
+            GameScore: Centipawn loss of each move
+        """
+        board = game.board()
+        boards = [board.copy(stack=False)]
+        list_san = []
+
+        for move in game.mainline_moves():
+            list_san.append(board.san(move))
+            board.push(move)
+            boards.append(board.copy(stack=False))
+
+        evaluations = self.evaluate_many(boards)
+        game_score = GameScore()
+
+        for ply, san in enumerate(list_san):
+            before = boards[ply]
+            best_move = evaluations[ply].best_move
+
+            move_score = MoveScore(
+                ply=ply,
+                san=san,
+                color=before.turn,
+                best_san=None if best_move is None else before.san(best_move),
+                score_before=evaluations[ply].cp(before.turn),
+                score_after=evaluations[ply + 1].cp(before.turn),
+            )
+            game_score.list_move.append(move_score)
+
+        return game_score
+
+    def annotate(self, game: chess.pgn.Game) -> None:
+        """Add the evaluation of each position to the comments of the mainline ('[%eval]')."""
+        nodes = [game, *game.mainline()]
+        board = game.board()
+        boards = [board.copy(stack=False)]
+
+        # One board for the mainline (no replay from the root by node)
+        for node in nodes[1:]:
+            board.push(node.move)
+            boards.append(board.copy(stack=False))
+
+        evaluations = self.evaluate_many(boards)
+
+        for node, evaluation in zip(nodes, evaluations):
+            score = chess.engine.PovScore(evaluation.score, chess.WHITE)
+            node.set_eval(score, evaluation.depth or None)
+
+    def close(self) -> None:
+        """Quit the idle engine processes (borrowed ones are stopped when given back)."""
+        with self._condition:
+            list_idle = self._idle
+            self._idle = []
+            self._engines.clear()
+
+            # Threads waiting for an engine can start a new one
+            self._condition.notify_all()
+
+        for engine in list_idle:
+            with contextlib.suppress(chess.engine.EngineError, TimeoutError):
+                engine.quit()
+
+            engine.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,372 @@
+import asyncio
+import json
+import random
+from dataclasses import asdict, dataclass, field
+from os import PathLike
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, TextIO, Union
+
+import chess
+import chess.pgn
+
+from bresse.corpus import PGNCorpus
+from bresse.input import ConfigInference
+from bresse.models.base import Model
+from bresse.prompt import PromptStrategy
+
+
+@dataclass
+class Position:
+    """
+    Position sampled from a corpus, with the move played in the game.
+
+    Attributes:
+        id (str): Identifier of the position ('<game index>:<ply>')
+        game (chess.pgn.Game): Game until the position (result is '*')
+        expected (str): SAN move played in the game
+    """
+
+    id: str
+    game: chess.pgn.Game
+    expected: str
+
+
+@dataclass
+class PositionScore:
+    """
+    Score of a model on a position.
+
+    Attributes:
+        id (str): Identifier of the position
+        fen (str): FEN of the position
+        expected (str): SAN move played in the game
+        predicted (Optional[str]): Most common legal SAN move (None if no legal move)
+        samples (int): Number of SAN generated
+        illegal_samples (int): Number of SAN generated who are not a legal move
+        inputs_tokens (int): Number of tokens for input
+        outputs_tokens (int): Number of tokens for output
+        error (Optional[str]): Error of the inference (None if the position was scored)
+    """
+
+    id: str
+    fen: str
+    expected: str
+    predicted: Optional[str]
+    samples: int
+    illegal_samples: int
+    inputs_tokens: int
+    outputs_tokens: int
+    error: Optional[str] = None
+
+    @property
+    def correct(self) -> bool:
+        """Return True if the model predict the move played."""
+        return self.predicted == self.expected
+
+
+@dataclass
+class EvalReport:
+    """
+    Aggregated scores of an evaluation.
+
+    Notes:
+        Positions whose inference failed are kept in 'scores' (with their
+        error), but excluded from the rates.
+
+    Attributes:
+        scores (List[PositionScore]): Score of each position
+    """
+
+    scores: List[PositionScore] = field(default_factory=list)
+
+    @property
+    def scored(self) -> List[PositionScore]:
+        """Return the scores of the positions without error."""
+        return [score for score in self.scores if score.error is None]
+
+    @property
+    def positions(self) -> int:
+        """Return the number of positions evaluated."""
+        return len(self.scores)
+
+    @property
+    def errors(self) -> int:
+        """Return the number of positions whose inference failed."""
+        return len(self.scores) - len(self.scored)
+
+    @property
+    def accuracy(self) -> float:
+        """Return the rate of positions where the model predict the move played."""
+        scored = self.scored
+
+        if not scored:
+            return 0.0
+
+        return sum(score.correct for score in scored) / len(scored)
+
+    @property
+    def illegal_rate(self) -> float:
+        """Return the rate of positions without any legal move generated."""
+        scored = self.scored
+
+        if not scored:
+            return 0.0
+
+        return sum(score.predicted is None for score in scored) / len(scored)
+
+    @property
+    def inputs_tokens(self) -> int:
+        """Return the number of tokens for input (all positions)."""
+        return sum(score.inputs_tokens for score in self.scores)
+
+    @property
+    def avg_inputs_tokens(self) -> float:
+        """Return the average number of tokens for input by position."""
+        scored = self.scored
+
+        if not scored:
+            return 0.0
+
+        return sum(score.inputs_tokens for score in scored) / len(scored)
+
+    @property
+    def illegal_samples_rate(self) -> float:
+        """Return the rate of generated SAN who are not a legal move."""
+        samples = sum(score.samples for score in self.scores)
+
+        if not samples:
+            return 0.0
+
+        return sum(score.illegal_samples for score in self.scores) / samples
+
+
+def sample_positions(
+    corpus: PGNCorpus,
+    positions_per_game: int = 1,
+    min_ply: int = 0,
+    seed: Optional[int] = None,
+) -> Iterator[Position]:
+    """
+    Sample positions from the games of a corpus (lazily).
+
+    Args:
+        corpus (PGNCorpus): Corpus of games
+        positions_per_game (int): Maximum number of positions by game
+        min_ply (int): Minimum ply of the positions (skip the opening)
+        seed (Optional[int]): Seed for the random number generator
+
+    Returns:
+        Iterator[Position]: Positions sampled, in the order of the corpus
+    """
+    random_ = random.Random(seed)
+
+    for index, (game, _, _) in enumerate(corpus):
+        moves = list(game.mainline_moves())
+        plies = range(min_ply, len(moves))
+        number = min(positions_per_game, len(plies))
+
+        for ply in sorted(random_.sample(plies, number)):
+            position_game = chess.pgn.Game(game.headers)
+            position_game.headers["Result"] = "*"
+            board = position_game.board()
+            node = position_game
+
+            for move in moves[:ply]:
+                node = node.add_variation(move)
+                board.push(move)
+
+            expected = board.san(moves[ply])
+            yield Position(id=f"{index}:{ply}", game=position_game, expected=expected)
+
+
+class Evaluation:
+    """
+    Evaluate a model on positions sampled from a corpus (move accuracy).
+
+    Notes:
+        Positions are inferred concurrently by the workers (one event loop),
+        each score is appended to the checkpoint file, so an interrupted
+        evaluation resume where it stopped (same corpus and seed).
+        A failed inference is recorded as a score with its error, it is not
+        checkpointed (retried on resume) and the evaluation continue.
+
+    Attributes:
+        model (Model): Model to evaluate
+        positions (Iterator[Position]): Positions to evaluate
+        config (ConfigInference): Configuration for LLM inference
+        workers (int): Number of positions inferred concurrently
+        path_checkpoint (Optional[Union[str, PathLike]]): File of the scores (JSON lines)
+    """
+
+    model: Model
+    positions: Iterator[Position]
+    config: ConfigInference
+    workers: int
+    path_checkpoint: Optional[Path]
+
+    def __init__(
+        self,
+        model: Model,
+        positions: Iterator[Position],
+        config: ConfigInference = ConfigInference(),
+        workers: int = 8,
+        path_checkpoint: Optional[Union[str, PathLike]] = None,
+    ):
+        self.model = model
+        self.positions = positions
+        self.config = config
+        self.workers = workers
+        self.path_checkpoint = (
+            None if path_checkpoint is None else Path(path_checkpoint)
+        )
+
+    def _load_checkpoint(self) -> List[PositionScore]:
+        """Return the scores of a previous run."""
+        if self.path_checkpoint is None or not self.path_checkpoint.exists():
+            return []
+
+        with self.path_checkpoint.open() as file:
+            return [PositionScore(**json.loads(line)) for line in file if line.strip()]
+
+    async def score_position(self, position: Position) -> PositionScore:
+        """
+        Infer the model on a position and score the most common move.
+
+        Args:
+            position (Position): Position to evaluate
+
+        Returns:
+            PositionScore: Score of the model on the position
+        """
+        output = await self.model.ainference(position.game, self.config)
+        predicted = output.most_common if output.counter else None
+        board = position.game.end().board()
+
+        return PositionScore(
+            id=position.id,
+            fen=board.fen(),
+            expected=position.expected,
+            predicted=predicted,
+            samples=len(output.list_result),
+            illegal_samples=output.list_result.errors,
+            inputs_tokens=output.inputs_tokens,
+            outputs_tokens=output.outputs_tokens,
+        )
+
+    async def _safe_score_position(self, position: Position) -> PositionScore:
+        """Score a position, a failed inference is a score with its error."""
+        try:
+            return await self.score_position(position)
+        except Exception as exception:
+            print(f"Position '{position.id}' failed: {exception!r}")
+
+            return PositionScore(
+                id=position.id,
+                fen=position.game.end().board().fen(),
+                expected=position.expected,
+                predicted=None,
+                samples=0,
+                illegal_samples=0,
+                inputs_tokens=0,
+                outputs_tokens=0,
+                error=f"{type(exception).__name__}: {exception}",
+            )
+
+    async def _worker(
+        self, queue: asyncio.Queue, report: EvalReport, file: Optional[TextIO]
+    ) -> None:
+        """Score the positions of the queue, append them to the checkpoint."""
+        while True:
+            position = await queue.get()
+
+            if position is None:
+                return
+
+            score = await self._safe_score_position(position)
+            report.scores.append(score)
+
+            if file is not None and score.error is None:
+                print(json.dumps(asdict(score)), file=file)
+                file.flush()
+
+    async def arun(self) -> EvalReport:
+        """Evaluate all the positions (skip the positions of the checkpoint)."""
+        report = EvalReport(scores=self._load_checkpoint())
+        done: Set[str] = {score.id for score in report.scores}
+
+        # Bounded queue, positions are sampled when workers are ready
+        queue = asyncio.Queue(maxsize=2 * self.workers)
+        file = None
+
+        if self.path_checkpoint is not None:
+            file = self.path_checkpoint.open("a")
+
+        try:
+            # Unexpected error of a worker cancel the producer (no deadlock on 'put')
+            async with asyncio.TaskGroup() as group:
+                for _ in range(self.workers):
+                    group.create_task(self._worker(queue, report, file))
+
+                # Sampling can wait a parsing (corpus), don't block the event loop
+                loop = asyncio.get_running_loop()
+                positions = iter(self.positions)
+
+                while True:
+                    position = await loop.run_in_executor(None, next, positions, None)
+
+                    if position is None:
+                        break
+
+                    if position.id not in done:
+                        await queue.put(position)
+
+                for _ in range(self.workers):
+                    await queue.put(None)
+        finally:
+            if file is not None:
+                file.close()
+
+        return report
+
+    def run(self) -> EvalReport:
+        """Evaluate all the positions (synchronous entrypoint)."""
+        return asyncio.run(self.arun())
+
+
+def benchmark_strategies(
+    model: Model,
+    positions: Iterable[Position],
+    strategies: Iterable[PromptStrategy],
+    config: ConfigInference = ConfigInference(),
+    workers: int = 8,
+) -> Dict[str, EvalReport]:
+    """
+    Evaluate the model on the same positions with each prompt strategy.
+
+    Notes:
+        Compare the input tokens ('avg_inputs_tokens') and the accuracy
+        of the strategies, the prompt strategy of the model is restored.
+
+    Args:
+        model (Model): Model to evaluate
+        positions (Iterable[Position]): Positions to evaluate (same for each strategy)
+        strategies (Iterable[PromptStrategy]): Strategies to compare
+        config (ConfigInference): Configuration for LLM inference
+        workers (int): Number of positions inferred concurrently
+
+    Returns:
+        Dict[str, EvalReport]: Report by strategy name
+    """
+    positions = list(positions)
+    prompt_strategy = model.prompt_strategy
+    reports = {}
+
+    try:
+        for strategy in strategies:
+            model.prompt_strategy = strategy
+            evaluation = Evaluation(model, iter(positions), config, workers)
+            reports[strategy.name] = evaluation.run()
+    finally:
+        model.prompt_strategy = prompt_strategy
+
+    return reports
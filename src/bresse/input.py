@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 
 @dataclass
@@ -18,6 +18,10 @@ class ConfigInference:
         temperature (float): Controls the randomness of the output; lower values make the output more deterministic.
         logprobs (int): If greater than 0, returns the log-probabilities of the top `logprobs` tokens.
         logit_bias (Dict[str, int]): A dictionary mapping tokens to bias values, adjusting their likelihood in the output.
+        constrained (bool): Constrain the generation to the legal moves of the board (all samples are legal for local and Hugging Face models, only the tokens are constrained for OpenAI, illegal samples are rejected by the validation).
+        allowed_san (Optional[List[str]]): Generations allowed, filled with the legal moves by the model if constrained.
+        wave_size (Optional[int]): Samples requested by wave, stop once the majority vote is decided ('n' is the maximum, None to request 'n' at once).
+        confidence (Optional[float]): Share of the samples for the leading move to stop the waves early (None to wait until the lead is decided).
     """
 
     seed: Optional[int] = 42
@@ -34,3 +38,9 @@ class ConfigInference:
 
     logprobs: Optional[int] = 0
     logit_bias: Dict[str, int] = field(default_factory=dict)
+
+    constrained: bool = False
+    allowed_san: Optional[List[str]] = None
+
+    wave_size: Optional[int] = None
+    confidence: Optional[float] = None
@@ -0,0 +1,107 @@
+import threading
+import weakref
+from typing import Dict, Iterator
+
+import chess.pgn
+
+from bresse.output import OutputInference
+
+# Ledger of each game (removed with the game)
+_LEDGERS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+class Ledger:
+    """
+    Running totals of the inferences of a game or a session, by model.
+
+    Notes:
+        Each inference is added to the total of its model in O(1),
+        the outputs don't need to be kept alive for the cost reporting.
+        Cached inferences (cache or memo) have no request and no cost,
+        they are only counted in 'cache_hits' (same as the telemetry).
+
+    Attributes:
+        totals (Dict[str, OutputInference]): Total inference by model identifier
+        cache_hits (int): Number of cached inferences (not in the totals)
+    """
+
+    totals: Dict[str, OutputInference]
+    cache_hits: int
+
+    def __init__(self):
+        self.totals = {}
+        self.cache_hits = 0
+        self._lock = threading.Lock()
+
+    def add(self, output_inf: OutputInference) -> None:
+        """Add an inference to the total of its model (skip the cached inferences)."""
+        model_id = output_inf.model_id
+
+        with self._lock:
+            if output_inf.cached:
+                self.cache_hits += 1
+                return
+
+            if model_id.id not in self.totals:
+                self.totals[model_id.id] = OutputInference.zero(model_id)
+
+            self.totals[model_id.id] += output_inf
+
+    def update(self, other: "Ledger") -> None:
+        """Add the totals of another ledger (ex: a game to its session)."""
+        for output_inf in list(other.totals.values()):
+            self.add(output_inf)
+
+        with self._lock:
+            self.cache_hits += other.cache_hits
+
+    @property
+    def number_requests(self) -> int:
+        """Return the number of requests (all models)."""
+        return sum(total.number_requests for total in self.totals.values())
+
+    @property
+    def inputs_tokens(self) -> int:
+        """Return the number of tokens for input (all models)."""
+        return sum(total.inputs_tokens for total in self.totals.values())
+
+    @property
+    def outputs_tokens(self) -> int:
+        """Return the number of tokens for output (all models)."""
+        return sum(total.outputs_tokens for total in self.totals.values())
+
+    @property
+    def cost(self) -> float:
+        """Return the cost in $ (all models)."""
+        return sum(total.cost for total in self.totals.values())
+
+    def __getitem__(self, model_id: str) -> OutputInference:
+        return self.totals[model_id]
+
+    def __iter__(self) -> Iterator[OutputInference]:
+        return iter(self.totals.values())
+
+    def __len__(self) -> int:
+        return len(self.totals)
+
+
+def get_ledger(game: chess.pgn.Game) -> Ledger:
+    """
+    Get the ledger of the inferences played in a game (create it on first call).
+
+    Notes:
+        'Model.play' and 'Model.auto_play' add their inferences to the ledger of the game
+
+    Args:
+        game (chess.pgn.Game): Game to get the ledger
+
+    Returns:
+        Ledger: Running totals of the inferences of the game
+    """
+    ledger = _LEDGERS.get(game)
+
+    if ledger is None:
+        ledger = Ledger()
+        _LEDGERS[game] = ledger
+
+    return ledger
@@ -0,0 +1,138 @@
+import dataclasses
+import json
+import threading
+from collections import Counter, OrderedDict
+from typing import Optional, Tuple
+
+import chess
+import chess.polyglot
+
+from bresse.identifiers.base import ModelId
+from bresse.input import ConfigInference
+from bresse.output import Output, OutputGeneration, OutputInference
+
+# Key of a position (zobrist hash, last words of the prompt, configuration)
+MemoKey = Tuple[int, str, str]
+
+
+class PositionMemo:
+    """
+    Least recently used memo of the generations by position, for transpositions.
+
+    Notes:
+        The key is the Zobrist hash of the board, the last 'suffix_tokens'
+        words of the prompt and the configuration: the history of the game
+        before the suffix (move order, headers) is ignored.
+        Positions with the same hash have the same legal moves, so the
+        validated generation (counter of SAN) is reused without inference.
+        Reused inferences are 'cached' (no request, no cost in the telemetry).
+
+    Attributes:
+        max_size (int): Maximum number of positions memorized
+        suffix_tokens (int): Number of last words of the prompt who must match (0 for the position only)
+        hits (int): Number of lookups found in the memo
+        misses (int): Number of lookups not found in the memo
+    """
+
+    max_size: int
+    suffix_tokens: int
+    hits: int
+    misses: int
+
+    def __init__(self, max_size: int = 10_000, suffix_tokens: int = 0):
+        self.max_size = max_size
+        self.suffix_tokens = suffix_tokens
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(
+        self, board: chess.Board, pgn_prompt: str, config: ConfigInference
+    ) -> MemoKey:
+        """
+        Return the key of an inference.
+
+        Args:
+            board (chess.Board): Board to play
+            pgn_prompt (str): PGN string to infer (preprocess)
+            config (ConfigInference): Configuration for LLM inference
+
+        Returns:
+            MemoKey: Zobrist hash, suffix of the prompt and configuration
+        """
+        suffix = ""
+
+        if self.suffix_tokens > 0:
+            suffix = " ".join(pgn_prompt.split()[-self.suffix_tokens :])
+
+        text_config = json.dumps(dataclasses.asdict(config), sort_keys=True)
+
+        return chess.polyglot.zobrist_hash(board), suffix, text_config
+
+    def get(self, key: MemoKey, model_id: ModelId) -> Optional[Output]:
+        """Return the memorized output of the key (None if not memorized)."""
+        with self._lock:
+            value = self._entries.get(key)
+
+            if value is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+
+        number_requests, inputs_tokens, outputs_tokens, output_gen = value
+
+        output_inf = OutputInference(
+            model_id=model_id,
+            number_requests=number_requests,
+            inputs_tokens=inputs_tokens,
+            outputs_tokens=outputs_tokens,
+            cached=True,
+        )
+
+        # Results are never modified, the counter is copied for the caller
+        output_gen = OutputGeneration(
+            counter=Counter(output_gen.counter), list_result=output_gen.list_result
+        )
+
+        return Output.from_outputs(output_gen=output_gen, output_inf=output_inf)
+
+    def set(self, key: MemoKey, output: Output) -> None:
+        """Memorize the output of the key (evict the least recently used)."""
+        value = (
+            output.number_requests,
+            output.inputs_tokens,
+            output.outputs_tokens,
+            OutputGeneration(
+                counter=Counter(output.counter), list_result=output.list_result
+            ),
+        )
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        """Return the share of lookups found in the memo."""
+        lookups = self.hits + self.misses
+
+        if not lookups:
+            return 0.0
+
+        return self.hits / lookups
+
+    def clear(self) -> None:
+        """Remove all the positions and reset the stats."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
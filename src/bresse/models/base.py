@@ -1,21 +1,77 @@
+import asyncio
+import dataclasses
+import itertools
+import time
+import weakref
 from abc import ABC, abstractmethod
-from typing import Callable, List, Optional, Tuple, Union, final
+from typing import (
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Self,
+    Tuple,
+    Union,
+    final,
+)
 
 import chess.pgn
 
-from bresse.chess_ import game_play_san, pgn_to_board
+from bresse.batching import MicroBatcher
+from bresse.cache import Cache, make_key
+from bresse.chess_ import game_play_san, get_session
+from bresse.clients import get_registry
+from bresse.constrained import legal_generations
 from bresse.identifiers.base import ModelId
 from bresse.input import ConfigInference
+from bresse.ledger import get_ledger
+from bresse.memo import MemoKey, PositionMemo
 from bresse.output import Output, OutputGeneration, OutputInference
-from bresse.process import postprocess_result, preprocess_game
+from bresse.process import (
+    RESULTS,
+    SanTokenizer,
+    estimate_tokens,
+    is_san_token,
+    postprocess_result,
+    preprocess_game,
+)
+from bresse.prompt import PromptStrategy
+from bresse.ratelimit import RateLimiter
+from bresse.sampling import is_decided, wave_config
+from bresse.telemetry import Telemetry
+from bresse.tracing import NoopTracer
 
 
 class Model(ABC):
     """
     Base class for all LLM models.
+
+    Attributes:
+        model_id (ModelId): Model identifier
+        max_concurrency (int): Maximum number of asynchronous inferences in flight
+        cache (Optional[Cache]): Cache of the inferences (None to disable)
+        cache_hits (int): Number of inferences found in the cache
+        cache_misses (int): Number of inferences not found in the cache
+        rate_limiter (Optional[RateLimiter]): Limiter of the requests (None to disable)
+        telemetry (Optional[Telemetry]): Aggregator of the inferences (None to disable)
+        batcher (Optional[MicroBatcher]): Batching of concurrent inferences (None to disable)
+        memo (Optional[PositionMemo]): Memo of the generations by position (None to disable)
+        prompt_strategy (Optional[PromptStrategy]): Builder of the prompts (None for the full game)
+        tracer (NoopTracer): Tracer of the stages of the inferences (no-op by default)
     """
 
     model_id: ModelId
+    max_concurrency: int = 16
+    cache: Optional[Cache]
+    cache_hits: int
+    cache_misses: int
+    rate_limiter: Optional[RateLimiter]
+    telemetry: Optional[Telemetry]
+    batcher: Optional[MicroBatcher]
+    memo: Optional[PositionMemo]
+    prompt_strategy: Optional[PromptStrategy]
+    tracer: NoopTracer
 
     def __init__(self, model_id: ModelId):
         """Create '__init__' method for type hinting."""
@@ -23,6 +79,20 @@ class Model(ABC):
             raise TypeError("model_id must be a ModelId instance.")
         self.model_id = model_id
 
+        # Semaphore by event loop (asyncio primitives are bound to one loop)
+        self._semaphores = weakref.WeakKeyDictionary()
+
+        self.cache = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        self.rate_limiter = None
+        self.telemetry = None
+        self.batcher = None
+        self.memo = None
+        self.prompt_strategy = None
+        self.tracer = NoopTracer()
+
     @abstractmethod
     def _inference(
         self, pgn_prompt: str, config: ConfigInference = ConfigInference()
@@ -42,6 +112,398 @@ class Model(ABC):
         """
         ...
 
+    def _inference_batch(
+        self, list_prompt: List[str], config: ConfigInference = ConfigInference()
+    ) -> List[Tuple[OutputInference, List[str]]]:
+        """
+        Inference of the model on many strings at once
+
+        Notes:
+            By default, call '_inference' for each string,
+            child class able to batch the prompts should override it
+
+        Args:
+            list_prompt (List[str]): PGN strings to infer (preprocess)
+            config (ConfigInference): Configuration for LLM inference
+
+        Returns:
+            List[Tuple[OutputInference, List[str]]]: Output of each prompt (same order)
+        """
+        return [self._inference(pgn_prompt, config) for pgn_prompt in list_prompt]
+
+    async def _ainference(
+        self, pgn_prompt: str, config: ConfigInference = ConfigInference()
+    ) -> Tuple[OutputInference, List[str]]:
+        """
+        Asynchronous inference of the model on any string
+
+        Notes:
+            By default, run the synchronous '_inference' in a thread,
+            child class with an asynchronous client should override it
+
+        Args:
+            pgn_prompt (str): PGN string to infer (preprocess)
+
+        Returns:
+            Tuple[OutputInference, List[str]]: OutputInference object and list of generated SAN
+        """
+        return await asyncio.to_thread(self._inference, pgn_prompt, config)
+
+    def _cache_get(self, key: str) -> Optional[Tuple[OutputInference, List[str]]]:
+        """Return the cached inference of the key (None if not cached)."""
+        value = self.cache.get(key)
+
+        if value is None:
+            self.cache_misses += 1
+            return None
+
+        self.cache_hits += 1
+
+        output_inf = OutputInference(
+            model_id=self.model_id,
+            number_requests=value["number_requests"],
+            inputs_tokens=value["inputs_tokens"],
+            outputs_tokens=value["outputs_tokens"],
+            cached=True,
+        )
+
+        return output_inf, value["list_san"]
+
+    def _cache_set(
+        self, key: str, output_inf: OutputInference, list_san: List[str]
+    ) -> None:
+        """Store the inference of the key in the cache."""
+        value = {
+            "number_requests": output_inf.number_requests,
+            "inputs_tokens": output_inf.inputs_tokens,
+            "outputs_tokens": output_inf.outputs_tokens,
+            "list_san": list(list_san),
+        }
+
+        self.cache.set(key, value)
+
+    def _estimate_usage(
+        self, pgn_prompt: str, config: ConfigInference
+    ) -> Tuple[int, int]:
+        """
+        Estimate the number of requests and tokens of an inference (rate limiter).
+
+        Notes:
+            By default, one request generating 'n' completions,
+            child class sending a request by completion should override it
+
+        Args:
+            pgn_prompt (str): PGN string to infer (preprocess)
+            config (ConfigInference): Configuration for LLM inference
+
+        Returns:
+            Tuple[int, int]: Number of requests and tokens
+        """
+        n = config.n or 1
+        tokens = estimate_tokens(pgn_prompt) + (config.max_tokens or 0) * n
+
+        return 1, tokens
+
+    @staticmethod
+    def _record_timing(
+        output_inf: OutputInference, start: float, attempts: int
+    ) -> None:
+        """Set the latency and retries of the last request of an inference."""
+        output_inf.latency = time.perf_counter() - start
+        output_inf.retries = attempts - 1
+
+        # Without streaming, all the tokens are received at once
+        if output_inf.ttft is None:
+            output_inf.ttft = output_inf.latency
+
+    def _record(self, output_inf: OutputInference) -> None:
+        """Add the inference to the telemetry if enabled."""
+        if self.telemetry is not None:
+            self.telemetry.record(output_inf)
+
+    def _call_inference(
+        self, pgn_prompt: str, config: ConfigInference
+    ) -> Tuple[OutputInference, List[str]]:
+        """Inference of the model, paced by the rate limiter if enabled (timed)."""
+        attempts = 0
+        start = 0.0
+
+        def inference() -> Tuple[OutputInference, List[str]]:
+            nonlocal attempts, start
+            attempts += 1
+            start = time.perf_counter()
+
+            if self.batcher is not None:
+                return self.batcher.infer(pgn_prompt, config)
+
+            return self._inference(pgn_prompt, config)
+
+        if self.rate_limiter is None:
+            output_inf, list_san = inference()
+        else:
+            requests, tokens = self._estimate_usage(pgn_prompt, config)
+            output_inf, list_san = self.rate_limiter.call(inference, requests, tokens)
+
+            actual = output_inf.inputs_tokens + output_inf.outputs_tokens
+            self.rate_limiter.settle(tokens, actual)
+
+        self._record_timing(output_inf, start, attempts)
+
+        return output_inf, list_san
+
+    async def _acall_inference(
+        self, pgn_prompt: str, config: ConfigInference
+    ) -> Tuple[OutputInference, List[str]]:
+        """Asynchronous inference of the model, paced by the rate limiter if enabled (timed)."""
+        attempts = 0
+        start = 0.0
+
+        async def inference() -> Tuple[OutputInference, List[str]]:
+            nonlocal attempts, start
+            attempts += 1
+            start = time.perf_counter()
+
+            if self.batcher is not None:
+                future = self.batcher.submit(pgn_prompt, config)
+                return await asyncio.wrap_future(future)
+
+            return await self._ainference(pgn_prompt, config)
+
+        if self.rate_limiter is None:
+            output_inf, list_san = await inference()
+        else:
+            requests, tokens = self._estimate_usage(pgn_prompt, config)
+            output_inf, list_san = await self.rate_limiter.acall(
+                inference, requests, tokens
+            )
+
+            actual = output_inf.inputs_tokens + output_inf.outputs_tokens
+            self.rate_limiter.settle(tokens, actual)
+
+        self._record_timing(output_inf, start, attempts)
+
+        return output_inf, list_san
+
+    def _run_inference(
+        self, pgn_prompt: str, config: ConfigInference
+    ) -> Tuple[OutputInference, List[str]]:
+        """Inference of the model, through the cache if enabled."""
+        key = None
+        cached = None
+
+        if self.cache is not None:
+            key = make_key(self.model_id, pgn_prompt, config)
+            cached = self._cache_get(key)
+
+        if cached is not None:
+            output_inf, list_san = cached
+        else:
+            output_inf, list_san = self._call_inference(pgn_prompt, config)
+
+            if key is not None:
+                self._cache_set(key, output_inf, list_san)
+
+        self._record(output_inf)
+
+        return output_inf, list_san
+
+    async def _arun_inference(
+        self, pgn_prompt: str, config: ConfigInference
+    ) -> Tuple[OutputInference, List[str]]:
+        """Asynchronous inference of the model, through the cache if enabled."""
+        key = None
+        cached = None
+
+        if self.cache is not None:
+            key = make_key(self.model_id, pgn_prompt, config)
+            cached = self._cache_get(key)
+
+        if cached is not None:
+            output_inf, list_san = cached
+        else:
+            output_inf, list_san = await self._acall_inference(pgn_prompt, config)
+
+            if key is not None:
+                self._cache_set(key, output_inf, list_san)
+
+        self._record(output_inf)
+
+        return output_inf, list_san
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Return the semaphore bounding the inferences of the running event loop."""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+
+        return semaphore
+
+    def _prompt(self, game: chess.pgn.Game) -> str:
+        """Return the prompt of the game (full game if no prompt strategy)."""
+        if self.prompt_strategy is None:
+            return preprocess_game(game)
+
+        return self.prompt_strategy.render(game)
+
+    def _preprocess(self, game: chess.pgn.Game) -> Tuple[str, chess.Board]:
+        """Return the prompt and the board used to validate the generation."""
+        # Reduce inputs tokens for generate san
+        with self.tracer.span("preprocess"):
+            prompt_pgn = self._prompt(game)
+
+        # Live board of the game (copy without stack, validation push/pop moves)
+        with self.tracer.span("board"):
+            board = get_session(game).board.copy(stack=False)
+
+        return prompt_pgn, board
+
+    @staticmethod
+    def _constrain(config: ConfigInference, board: chess.Board) -> ConfigInference:
+        """
+        Return the configuration with the generations allowed on the board.
+
+        Notes:
+            Only if 'config.constrained', the configuration is not modified (copy)
+            child class without constrained decoding ignore 'allowed_san'
+
+        Args:
+            config (ConfigInference): Configuration for LLM inference
+            board (chess.Board): Board to play
+
+        Returns:
+            ConfigInference: Configuration with the legal moves in 'allowed_san'
+        """
+        if not config.constrained:
+            return config
+
+        return dataclasses.replace(config, allowed_san=legal_generations(board))
+
+    def _validate(self, board: chess.Board, list_san: List[str]) -> OutputGeneration:
+        """Validate the generations on the board (traced stage)."""
+        with self.tracer.span("from_inference", samples=len(list_san)):
+            return OutputGeneration.from_inference(board=board, list_san=list_san)
+
+    def _merge(
+        self, output_inf: OutputInference, output_gen: OutputGeneration
+    ) -> Output:
+        """Merge the inference and generation outputs (traced stage)."""
+        with self.tracer.span("from_outputs"):
+            return Output.from_outputs(output_inf=output_inf, output_gen=output_gen)
+
+    def _postprocess(
+        self, board: chess.Board, output_inf: OutputInference, list_san: List[str]
+    ) -> Output:
+        """Validate the generation and merge it with the inference output."""
+        # Postprocess the output (for 1 move)
+        output_gen = self._validate(board, list_san)
+
+        # Merge the two outputs
+        output = self._merge(output_inf, output_gen)
+
+        return output
+
+    def _traced_inference(
+        self, pgn_prompt: str, config: ConfigInference
+    ) -> Tuple[OutputInference, List[str]]:
+        """Inference of the model in the 'provider' span (time out of the local CPU)."""
+        with self.tracer.span("provider", n=config.n) as span:
+            output_inf, list_san = self._run_inference(pgn_prompt, config)
+            span.set_attribute("cached", output_inf.cached)
+
+        return output_inf, list_san
+
+    async def _atraced_inference(
+        self, pgn_prompt: str, config: ConfigInference
+    ) -> Tuple[OutputInference, List[str]]:
+        """Asynchronous inference of the model in the 'provider' span."""
+        with self.tracer.span("provider", n=config.n) as span:
+            output_inf, list_san = await self._arun_inference(pgn_prompt, config)
+            span.set_attribute("cached", output_inf.cached)
+
+        return output_inf, list_san
+
+    def _memo_get(
+        self, board: chess.Board, prompt_pgn: str, config: ConfigInference
+    ) -> Tuple[Optional[MemoKey], Optional[Output]]:
+        """Return the memo key and the output memorized for the position (None if not found)."""
+        if self.memo is None:
+            return None, None
+
+        key = self.memo.key(board, prompt_pgn, config)
+        output = self.memo.get(key, self.model_id)
+
+        if output is not None:
+            self._record(output)
+
+        return key, output
+
+    @staticmethod
+    def _add_wave(
+        output_inf: Optional[OutputInference], output_wave: OutputInference
+    ) -> OutputInference:
+        """Add the inference of a wave to the previous waves (keep the first ttft)."""
+        if output_inf is None:
+            return output_wave
+
+        ttft = output_inf.ttft
+        output_inf += output_wave
+        output_inf.ttft = ttft
+
+        return output_inf
+
+    def _adaptive_inference(
+        self, prompt_pgn: str, board: chess.Board, config: ConfigInference
+    ) -> Output:
+        """Inference by waves of samples until the majority vote is decided."""
+        output_inf = None
+        list_san = []
+        drawn = 0
+
+        while True:
+            wave = wave_config(config, drawn)
+            output_wave, list_san_wave = self._traced_inference(prompt_pgn, wave)
+
+            output_inf = self._add_wave(output_inf, output_wave)
+            list_san.extend(list_san_wave)
+            drawn += wave.n
+
+            output_gen = self._validate(board, list_san)
+
+            if is_decided(output_gen.counter, drawn, config):
+                break
+
+        return self._merge(output_inf, output_gen)
+
+    async def _aadaptive_inference(
+        self, prompt_pgn: str, board: chess.Board, config: ConfigInference
+    ) -> Output:
+        """Asynchronous inference by waves of samples until the majority vote is decided."""
+        output_inf = None
+        list_san = []
+        drawn = 0
+
+        while True:
+            wave = wave_config(config, drawn)
+
+            async with self._get_semaphore():
+                output_wave, list_san_wave = await self._atraced_inference(
+                    prompt_pgn, wave
+                )
+
+            output_inf = self._add_wave(output_inf, output_wave)
+            list_san.extend(list_san_wave)
+            drawn += wave.n
+
+            output_gen = self._validate(board, list_san)
+
+            if is_decided(output_gen.counter, drawn, config):
+                break
+
+        return self._merge(output_inf, output_gen)
+
     @final
     def inference(
         self, game: chess.pgn.Game, input_: ConfigInference = ConfigInference()
@@ -49,6 +511,12 @@ class Model(ABC):
         """
         Inference the model on a given prompt
 
+        Notes:
+            With 'input_.wave_size', samples are requested by waves until
+            the leading move can't change ('input_.n' is the maximum)
+            With 'self.memo', a position already inferred (transposition) is reused
+            With 'self.tracer', each stage is timed in a span of the 'inference' span
+
         Args:
             game (str): PGN string to infer
             input_ (ConfigInference): Configuration for LLM inference
@@ -56,20 +524,83 @@ class Model(ABC):
         Returns:
             Output: Output object and CounterResult object
         """
-        # Reduce inputs tokens for generate san
-        prompt_pgn = preprocess_game(game)
-        board = pgn_to_board(pgn=prompt_pgn)
+        with self.tracer.span("inference", model=self.model_id.id):
+            prompt_pgn, board = self._preprocess(game)
+            input_ = self._constrain(input_, board)
 
-        # Inference the model
-        output_inf, list_san = self._inference(prompt_pgn, input_)
+            # Transposition of a position already inferred
+            key, output = self._memo_get(board, prompt_pgn, input_)
 
-        # Postprocess the output (for 1 move)
-        output_gen = OutputGeneration.from_inference(board=board, list_san=list_san)
+            if output is not None:
+                return output
 
-        # Merge the two outputs
-        output = Output.from_outputs(output_inf=output_inf, output_gen=output_gen)
+            if input_.wave_size:
+                output = self._adaptive_inference(prompt_pgn, board, input_)
+            else:
+                # Inference the model
+                output_inf, list_san = self._traced_inference(prompt_pgn, input_)
+                output = self._postprocess(board, output_inf, list_san)
 
-        return output
+            if key is not None:
+                self.memo.set(key, output)
+
+            return output
+
+    @final
+    async def ainference(
+        self, game: chess.pgn.Game, input_: ConfigInference = ConfigInference()
+    ) -> Output:
+        """
+        Asynchronous inference of the model on a given prompt
+
+        Notes:
+            Number of inferences in flight is bounded by 'max_concurrency'
+            With 'input_.wave_size', samples are requested by waves until
+            the leading move can't change ('input_.n' is the maximum)
+            With 'self.memo', a position already inferred (transposition) is reused
+            With 'self.tracer', each stage is timed in a span of the 'inference' span
+
+        Args:
+            game (str): PGN string to infer
+            input_ (ConfigInference): Configuration for LLM inference
+
+        Returns:
+            Output: Output object and CounterResult object
+        """
+        with self.tracer.span("inference", model=self.model_id.id):
+            prompt_pgn, board = self._preprocess(game)
+            input_ = self._constrain(input_, board)
+
+            # Transposition of a position already inferred
+            key, output = self._memo_get(board, prompt_pgn, input_)
+
+            if output is not None:
+                return output
+
+            if input_.wave_size:
+                output = await self._aadaptive_inference(prompt_pgn, board, input_)
+            else:
+                # Inference the model
+                async with self._get_semaphore():
+                    output_inf, list_san = await self._atraced_inference(
+                        prompt_pgn, input_
+                    )
+
+                output = self._postprocess(board, output_inf, list_san)
+
+            if key is not None:
+                self.memo.set(key, output)
+
+            return output
+
+    def _play_output(self, game: chess.pgn.Game, output: Output) -> None:
+        """Play the most common move of the output in the game."""
+        san = output.most_common
+
+        # Play the move in the game
+        game_play_san(game=game, san=san)
+        get_ledger(game).add(output)
+        print(f"Model '{self}' predicts: '{san}'")
 
     @final
     def play(
@@ -89,19 +620,126 @@ class Model(ABC):
             config (ConfigInference): Configuration for LLM inference.
         """
         output = self.inference(game=game, input_=config)
-        san = output.most_common
+        self._play_output(game, output)
+        return output
 
-        # Play the move in the game
-        game_play_san(game=game, san=san)
-        print(f"Model '{self}' predicts: '{san}'")
+    @final
+    async def aplay(
+        self,
+        game: chess.pgn.Game,
+        config: ConfigInference = ConfigInference(),
+    ) -> Output:
+        """
+        Asynchronous version of 'play', play a chess game with the model.
+
+        Notes:
+            game will be modified in place by adding variations
+            play white or black depending on the number of moves played and the trait
+
+        Args:
+            game (chess.pgn.Game): Game to play
+            config (ConfigInference): Configuration for LLM inference.
+        """
+        output = await self.ainference(game=game, input_=config)
+        self._play_output(game, output)
         return output
 
+    @staticmethod
+    def _auto_play_config(config: ConfigInference, max_moves: int) -> ConfigInference:
+        """Give enough tokens for a full game."""
+        config.n = 1
+        config.max_tokens = (
+            4 * max_moves * 2
+        )  # 4 tokens/avg per move x 120 moves x 2 players
+
+        return config
+
+    def _stream_inference(
+        self,
+        pgn_prompt: str,
+        config: ConfigInference,
+        output_inf: OutputInference,
+    ) -> Iterator[str]:
+        """
+        Streamed inference of the model on any string (first generation only)
+
+        Notes:
+            By default, yield the full generation of '_inference' at once,
+            child class with a streaming API should override it
+            output_inf is updated with the tokens received (exact at end of stream)
+            closing the generator cancel the request
+
+        Args:
+            pgn_prompt (str): PGN string to infer (preprocess)
+            config (ConfigInference): Configuration for LLM inference
+            output_inf (OutputInference): Output updated during the stream
+
+        Returns:
+            Iterator[str]: Chunks of the generation
+        """
+        output_inf_, list_san = self._inference(pgn_prompt, config)
+
+        output_inf.number_requests = output_inf_.number_requests
+        output_inf.inputs_tokens = output_inf_.inputs_tokens
+        output_inf.outputs_tokens = output_inf_.outputs_tokens
+
+        yield list_san[0]
+
+    @staticmethod
+    def _auto_play_tokens(
+        game: chess.pgn.Game,
+        tokens: Iterable[str],
+        preprocess_func: Callable,
+        max_moves: int,
+    ) -> None:
+        """Play each SAN move of the tokens until the first error or end of game."""
+        board = get_session(game).board
+
+        try:
+            for san in itertools.islice(tokens, max_moves * 2):
+                # Generation of the game is finished
+                if san in RESULTS or board.is_game_over():
+                    break
+
+                if is_san_token(san):
+                    preprocess_san = preprocess_func(san)
+
+                    try:
+                        game_play_san(game=game, san=preprocess_san)
+                    except ValueError as e:
+                        print(f"Error in move '{preprocess_san}': {e}")
+                        break
+        except KeyboardInterrupt:
+            ...
+
+    @staticmethod
+    def _timed_chunks(
+        chunks: Iterable[str], output_inf: OutputInference, start: float
+    ) -> Iterator[str]:
+        """Yield the streamed chunks, set the time to first token."""
+        for chunk in chunks:
+            if output_inf.ttft is None:
+                output_inf.ttft = time.perf_counter() - start
+
+            yield chunk
+
+    @staticmethod
+    def _stream_tokens(chunks: Iterable[str]) -> Iterator[str]:
+        """Split the streamed chunks into tokens."""
+        tokenizer = SanTokenizer()
+
+        for chunk in chunks:
+            yield from tokenizer.feed(chunk)
+
+        yield from tokenizer.flush()
+
     def auto_play(
         self,
         game: chess.pgn.Game,
         config: ConfigInference = ConfigInference(),
         preprocess_func: Optional[Callable] = postprocess_result,
         max_moves: int = 150,
+        stream: bool = False,
     ) -> OutputInference:
         """
         Auto-Play a full chess game with the model.
@@ -113,47 +751,141 @@ class Model(ABC):
             game will be modified in place by adding variations
             play white or black depending on the number of moves played and the trait
             there are not output for generation (handle single san move)
+            with stream, each move is played as soon as it is generated and the
+            request is cancelled at the first error (cache is not used)
 
         Args:
             game (chess.pgn.Game): Game to play
             config (ConfigInference): Configuration for LLM inference.
             preprocess_func (Callable, optional): Preprocess function for each san. Defaults to None.
             max_moves (int, optional): Maximum number of moves to play. Defaults to 150.
+            stream (bool, optional): Stream the generation. Defaults to False.
         """
-        # Give enough tokens for a full game
-        config.n = 1
-        config.max_tokens = (
-            4 * max_moves * 2
-        )  # 4 tokens/avg per move x 120 moves x 2 players
+        config = self._auto_play_config(config, max_moves)
 
         # Reduce inputs tokens for generate san
-        prompt_pgn = preprocess_game(game)
+        prompt_pgn = self._prompt(game)
+
+        if stream:
+            output_inf = self._auto_play_stream(
+                game, prompt_pgn, config, preprocess_func, max_moves
+            )
+            get_ledger(game).add(output_inf)
+
+            return output_inf
 
-        output_inf, list_san = self._inference(pgn_prompt=prompt_pgn, config=config)
+        output_inf, list_san = self._run_inference(prompt_pgn, config)
+        get_ledger(game).add(output_inf)
 
-        text = list_san[0]
+        tokens = list_san[0].split(" ")
+        self._auto_play_tokens(game, tokens, preprocess_func, max_moves)
+
+        return output_inf
+
+    def _auto_play_stream(
+        self,
+        game: chess.pgn.Game,
+        prompt_pgn: str,
+        config: ConfigInference,
+        preprocess_func: Callable,
+        max_moves: int,
+    ) -> OutputInference:
+        """Auto-Play with a streamed generation, cancelled at the first error."""
+        # Estimation until the API give the usage (end of stream)
+        output_inf = OutputInference(
+            model_id=self.model_id,
+            number_requests=1,
+            inputs_tokens=estimate_tokens(prompt_pgn),
+            outputs_tokens=0,
+        )
+
+        start = 0.0
+        chunks = iter(())
+
+        def open_stream() -> List[str]:
+            """Send the request, return the first chunk (raise if rejected)."""
+            nonlocal start, chunks
+            start = time.perf_counter()
+            chunks = self._stream_inference(prompt_pgn, config, output_inf)
+
+            return list(itertools.islice(chunks, 1))
+
+        # Same pacing and retries as the other requests, the quota is settled at the end
+        if self.rate_limiter is None:
+            first = open_stream()
+        else:
+            requests, estimated = self._estimate_usage(prompt_pgn, config)
+            first = self.rate_limiter.call(open_stream, requests, estimated)
 
         try:
-            for san in text.split(" ")[: max_moves * 2]:
-                # Skip if not san move
-                conditions = (
-                    san not in ["1-0", "0-1", "1/2-1/2", "*"],
-                    not san.startswith("#"),
-                    not san.startswith("\n"),
-                    "." not in san,
-                    not san == "",
+            chunks_ = itertools.chain(first, chunks)
+            tokens = self._stream_tokens(self._timed_chunks(chunks_, output_inf, start))
+            self._auto_play_tokens(game, tokens, preprocess_func, max_moves)
+        finally:
+            # Cancel the request if the generation is not finished
+            chunks.close()
+
+        if self.rate_limiter is not None:
+            actual = output_inf.inputs_tokens + output_inf.outputs_tokens
+            self.rate_limiter.settle(estimated, actual)
+
+        output_inf.latency = time.perf_counter() - start
+        self._record(output_inf)
+
+        return output_inf
+
+    async def aauto_play(
+        self,
+        game: chess.pgn.Game,
+        config: ConfigInference = ConfigInference(),
+        preprocess_func: Optional[Callable] = postprocess_result,
+        max_moves: int = 150,
+        stream: bool = False,
+    ) -> OutputInference:
+        """
+        Asynchronous version of 'auto_play', auto-play a full chess game with the model.
+
+        Notes:
+            game will be modified in place by adding variations
+            play white or black depending on the number of moves played and the trait
+            there are not output for generation (handle single san move)
+            with stream, the synchronous stream of 'auto_play' is read in a thread
+            (the event loop is not blocked)
+
+        Args:
+            game (chess.pgn.Game): Game to play
+            config (ConfigInference): Configuration for LLM inference.
+            preprocess_func (Callable, optional): Preprocess function for each san. Defaults to None.
+            max_moves (int, optional): Maximum number of moves to play. Defaults to 150.
+            stream (bool, optional): Stream the generation. Defaults to False.
+        """
+        config = self._auto_play_config(config, max_moves)
+
+        # Reduce inputs tokens for generate san
+        prompt_pgn = self._prompt(game)
+
+        if stream:
+            async with self._get_semaphore():
+                output_inf = await asyncio.to_thread(
+                    self._auto_play_stream,
+                    game,
+                    prompt_pgn,
+                    config,
+                    preprocess_func,
+                    max_moves,
                 )
 
-                if all(conditions):
-                    preprocess_san = preprocess_func(san)
+            get_ledger(game).add(output_inf)
 
-                    try:
-                        game_play_san(game=game, san=preprocess_san)
-                    except ValueError as e:
-                        print(f"Error in move '{preprocess_san}': {e}")
-                        break
-        except KeyboardInterrupt:
-            ...
+            return output_inf
+
+        async with self._get_semaphore():
+            output_inf, list_san = await self._arun_inference(prompt_pgn, config)
+
+        get_ledger(game).add(output_inf)
+
+        tokens = list_san[0].split(" ")
+        self._auto_play_tokens(game, tokens, preprocess_func, max_moves)
 
         return output_inf
 
@@ -167,6 +899,12 @@ class Model(ABC):
 class ModelOnline(Model, ABC):
     """
     Base class for all LLM available online (HuggingFace Hub, OpenAI, Mistral, etc.).
+
+    Notes:
+        The pooled asynchronous clients are shared by all the models of the
+        event loop, 'async with model:' hold them and release them at exit,
+        they are closed once no model hold them ('await model.aclose()'
+        release all the holds of the model).
     """
 
     model_id: ModelId
@@ -181,6 +919,25 @@ class ModelOnline(Model, ABC):
 
         super().__init__(model_id=model_id)
 
+        # Number of 'async with' of the model holding the pooled clients
+        self._holds = 0
+
+    async def aclose(self) -> None:
+        """Release the pooled asynchronous clients held by the model (running event loop)."""
+        while self._holds:
+            self._holds -= 1
+            await get_registry().release()
+
+    async def __aenter__(self) -> Self:
+        get_registry().acquire()
+        self._holds += 1
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        if self._holds:
+            self._holds -= 1
+            await get_registry().release()
+
 
 class ModelCloud(ModelOnline, ABC):
     """
@@ -230,3 +987,20 @@ class ModelCloud(ModelOnline, ABC):
                 f"Model '{model_id.id}' is not available in '{self.__class__.__name__}'"
             )
         return model_id
+
+
+class ModelLocal(Model, ABC):
+    """
+    Base class for all LLM running locally (transformers, etc.).
+
+    Notes:
+        Local models don't need an API key and are free (no cost by token).
+    """
+
+    model_id: ModelId
+
+    def __init__(self, model_id: Union[str, ModelId]):
+        if isinstance(model_id, str):
+            model_id = ModelId(id=model_id, input_cost_million=0, output_cost_million=0)
+
+        super().__init__(model_id=model_id)
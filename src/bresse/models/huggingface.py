@@ -1,59 +1,206 @@
-from typing import final, override
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple, final, override
 
-from huggingface_hub import InferenceClient
+from huggingface_hub import (
+    AsyncInferenceClient,
+    InferenceClient,
+    TextGenerationOutput,
+)
 
+from bresse.clients import get_async_huggingface_client, get_huggingface_client
+from bresse.constrained import generation_regex
 from bresse.input import ConfigInference
 from bresse.models.base import ModelOnline
 from bresse.output import OutputInference
+from bresse.process import estimate_tokens
 
 
 class HuggingFaceModel(ModelOnline):
-    """OpenAI Cloud Model class for inference."""
+    """
+    OpenAI Cloud Model class for inference.
 
-    def __init__(self, model_id: str, api_key: str):
+    Notes:
+        The API return one generation by request, the 'n' requests
+        of an inference are sent concurrently by the executor of the model
+        (at most 'max_samples_concurrency' requests for all its inferences),
+        each request is counted in 'number_requests'.
+        Clients are shared by the models with the same endpoint and API key
+        (see 'bresse.clients'), they are not created by the constructor.
+        A client set on the model ('model.client = InferenceClient(...)') is used instead.
+        Constrained generations match the regex of the legal moves ('grammar' of TGI).
+    """
+
+    max_samples_concurrency: int = 8
+
+    def __init__(self, model_id: str, api_key: str, base_url: Optional[str] = None):
         # Check if model_id is available, api_key is valid
         super().__init__(model_id, api_key)
 
-        # Initialize HuggingFace client
-        self.client = InferenceClient(api_key=api_key)  # api_key == token
+        # base_url allow to use a compatible server
+        self.api_key = api_key  # api_key == token
+        self.base_url = base_url
 
-    @final
-    @override
-    def _inference(self, pgn_prompt: str, config: ConfigInference = ConfigInference()):
-        list_san = []
-        input_tokens = 0
-        output_tokens = 0
+        self._client: Optional[InferenceClient] = None
+        self._async_client: Optional[AsyncInferenceClient] = None
+
+        # Executor of the requests, created on first inference
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def client(self) -> InferenceClient:
+        """Return the HuggingFace client (shared if not set)."""
+        if self._client is not None:
+            return self._client
+
+        return get_huggingface_client(self.api_key, self.base_url)
+
+    @client.setter
+    def client(self, client: Optional[InferenceClient]) -> None:
+        self._client = client
 
+    @property
+    def async_client(self) -> AsyncInferenceClient:
+        """Return the asynchronous HuggingFace client (shared by the running event loop if not set)."""
+        if self._async_client is not None:
+            return self._async_client
+
+        return get_async_huggingface_client(self.api_key, self.base_url)
+
+    @async_client.setter
+    def async_client(self, async_client: Optional[AsyncInferenceClient]) -> None:
+        self._async_client = async_client
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Return the executor sending the requests of the samples (shared by the inferences)."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_samples_concurrency
+                )
+
+            return self._executor
+
+    @staticmethod
+    def _generation_kwargs(config: ConfigInference) -> Dict[str, Any]:
+        """Return the parameters of the text generation request."""
         # HuggingFace throws an error if temperature is no positive
         if config.temperature == 0.0:
             config.temperature = 1e-3
 
-        for _ in range(config.n):
-            completion = self.client.text_generation(
-                pgn_prompt,
-                details=True,
-                decoder_input_details=True,
-                return_full_text=False,
-                seed=config.seed,
-                best_of=config.best_of,
-                max_new_tokens=config.max_tokens,
-                # presence_penalty=config.presence_penalty,
-                frequency_penalty=config.frequency_penalty,
-                top_p=config.top_p,
-                temperature=config.temperature,
-                # logprobs=config.logprobs,
-                # logit_bias=config.logit_bias,
-            )
+        kwargs = dict(
+            details=True,
+            decoder_input_details=True,
+            return_full_text=False,
+            seed=config.seed,
+            best_of=config.best_of,
+            max_new_tokens=config.max_tokens,
+            # presence_penalty=config.presence_penalty,
+            frequency_penalty=config.frequency_penalty,
+            top_p=config.top_p,
+            temperature=config.temperature,
+            # logprobs=config.logprobs,
+            # logit_bias=config.logit_bias,
+        )
+
+        if config.allowed_san:
+            kwargs["grammar"] = {
+                "type": "regex",
+                "value": generation_regex(config.allowed_san),
+            }
+
+            # A token has at least one character (with the separator)
+            longest = max(len(san) for san in config.allowed_san) + 1
+            kwargs["max_new_tokens"] = max(config.max_tokens or 0, longest)
+
+        return kwargs
+
+    def _parse_completions(self, list_completion: List[TextGenerationOutput]):
+        """Return the OutputInference and the generations of the completions."""
+        list_san = []
+        input_tokens = 0
+        output_tokens = 0
 
+        for completion in list_completion:
             input_tokens += len(completion.details.prefill)
             output_tokens += completion.details.generated_tokens
             list_san.append(completion.generated_text)
 
         output_inf = OutputInference(
             model_id=self.model_id,
-            number_requests=1,
+            number_requests=len(list_completion),
             inputs_tokens=input_tokens,
             outputs_tokens=output_tokens,
         )
 
         return output_inf, list_san
+
+    @override
+    def _estimate_usage(
+        self, pgn_prompt: str, config: ConfigInference
+    ) -> Tuple[int, int]:
+        # One request by completion, each request send the prompt
+        n = config.n or 1
+        tokens = (estimate_tokens(pgn_prompt) + (config.max_tokens or 0)) * n
+
+        return n, tokens
+
+    @final
+    @override
+    def _inference(self, pgn_prompt: str, config: ConfigInference = ConfigInference()):
+        kwargs = self._generation_kwargs(config)
+
+        def text_generation(_: int) -> TextGenerationOutput:
+            return self.client.text_generation(pgn_prompt, **kwargs)
+
+        # Executor.map keep the order of the requests
+        list_completion = list(self.executor.map(text_generation, range(config.n)))
+
+        return self._parse_completions(list_completion)
+
+    @final
+    @override
+    async def _ainference(
+        self, pgn_prompt: str, config: ConfigInference = ConfigInference()
+    ):
+        kwargs = self._generation_kwargs(config)
+        semaphore = asyncio.Semaphore(self.max_samples_concurrency)
+
+        async def text_generation() -> TextGenerationOutput:
+            async with semaphore:
+                return await self.async_client.text_generation(pgn_prompt, **kwargs)
+
+        # Gather keep the order of the requests
+        coroutines = (text_generation() for _ in range(config.n))
+        list_completion = await asyncio.gather(*coroutines)
+
+        return self._parse_completions(list_completion)
+
+    @final
+    @override
+    def _stream_inference(
+        self,
+        pgn_prompt: str,
+        config: ConfigInference,
+        output_inf: OutputInference,
+    ) -> Iterator[str]:
+        kwargs = self._generation_kwargs(config)
+
+        # Prefill tokens are not available when streaming (input is estimated)
+        kwargs["decoder_input_details"] = False
+        stream = self.client.text_generation(pgn_prompt, stream=True, **kwargs)
+
+        try:
+            for chunk in stream:
+                output_inf.outputs_tokens += 1
+
+                # Last chunk give the details (only if the stream is finished)
+                if chunk.details is not None:
+                    output_inf.outputs_tokens = chunk.details.generated_tokens
+
+                yield chunk.token.text
+        finally:
+            stream.close()
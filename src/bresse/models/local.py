@@ -0,0 +1,415 @@
+import copy
+import threading
+from collections import OrderedDict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    final,
+    override,
+)
+
+from bresse.constrained import TokenTrie
+from bresse.identifiers.base import ModelId
+from bresse.input import ConfigInference
+from bresse.models.base import ModelLocal
+from bresse.output import OutputInference
+
+
+def _import_transformers():
+    """Import 'torch' and 'transformers' (optional dependencies)."""
+    try:
+        import torch
+        import transformers
+    except ImportError as exception:
+        raise ImportError(
+            "Local models require the 'transformers' and 'torch' packages "
+            "(pip install bresse[local])"
+        ) from exception
+
+    return torch, transformers
+
+
+def generation_kwargs(config: ConfigInference, pad_token_id: int) -> Dict[str, Any]:
+    """
+    Return the parameters of 'model.generate' (without constraint).
+
+    Args:
+        config (ConfigInference): Configuration for LLM inference
+        pad_token_id (int): Padding token of the tokenizer
+
+    Returns:
+        Dict[str, Any]: Parameters of the generation
+    """
+    do_sample = bool(config.temperature)
+
+    kwargs = dict(
+        max_new_tokens=config.max_tokens,
+        do_sample=do_sample,
+        # Greedy generation can't return many sequences
+        num_return_sequences=(config.n or 1) if do_sample else 1,
+        pad_token_id=pad_token_id,
+    )
+
+    if do_sample:
+        kwargs.update(temperature=config.temperature, top_p=config.top_p)
+
+    return kwargs
+
+
+def split_generations(
+    model_id: ModelId,
+    list_text: List[str],
+    list_tokens: List[int],
+    prompt_lengths: List[int],
+    num_return_sequences: int,
+    n: int,
+) -> List[Tuple[OutputInference, List[str]]]:
+    """
+    Split the decoded sequences of a batch by prompt.
+
+    Notes:
+        Sequences of a prompt are contiguous, a greedy generation
+        (one sequence by prompt) is repeated for the 'n' samples
+
+    Args:
+        model_id (ModelId): Model identifier
+        list_text (List[str]): Generation of each sequence (decoded)
+        list_tokens (List[int]): Number of tokens generated by each sequence
+        prompt_lengths (List[int]): Number of tokens of each prompt (without padding)
+        num_return_sequences (int): Number of sequences by prompt
+        n (int): Number of samples by prompt
+
+    Returns:
+        List[Tuple[OutputInference, List[str]]]: OutputInference and generations of each prompt
+    """
+    list_output = []
+
+    for index, prompt_length in enumerate(prompt_lengths):
+        start = index * num_return_sequences
+        end = start + num_return_sequences
+
+        list_san = list_text[start:end]
+        output_inf = OutputInference(
+            model_id=model_id,
+            number_requests=1,
+            inputs_tokens=prompt_length,
+            outputs_tokens=sum(list_tokens[start:end]),
+        )
+
+        if len(list_san) != n:
+            list_san = list_san * n
+
+        list_output.append((output_inf, list_san))
+
+    return list_output
+
+
+class PrefixCache:
+    """
+    Least recently used cache of the KV cache of prompts, by token ids.
+
+    Notes:
+        The prompt of a game is the prompt of the previous move plus the
+        new moves, so the KV cache of the previous prompt is a prefix of it.
+
+    Attributes:
+        max_size (int): Maximum number of prompts cached
+        hits (int): Number of lookups who found a prefix
+        misses (int): Number of lookups without prefix
+    """
+
+    max_size: int
+    hits: int
+    misses: int
+
+    def __init__(self, max_size: int = 32):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, ids: Sequence[int]) -> Tuple[int, Optional[Any]]:
+        """
+        Return the longest cached prefix of the token ids.
+
+        Args:
+            ids (Sequence[int]): Token ids of the prompt
+
+        Returns:
+            Tuple[int, Optional[Any]]: Length of the prefix and its KV cache (0 and None if not found)
+        """
+        ids = tuple(ids)
+        best = None
+
+        for key in self._entries:
+            if len(key) <= len(ids) and ids[: len(key)] == key:
+                if best is None or len(key) > len(best):
+                    best = key
+
+        if best is None:
+            self.misses += 1
+            return 0, None
+
+        self.hits += 1
+        self._entries.move_to_end(best)
+
+        return len(best), self._entries[best]
+
+    def take(self, ids: Sequence[int]) -> Tuple[int, Optional[Any]]:
+        """
+        Return the longest cached prefix, removed from the cache if shorter than the ids.
+
+        Notes:
+            The caller extend the KV cache in place (no copy) and store it
+            again with its new token ids, the shorter prefix is replaced
+
+        Args:
+            ids (Sequence[int]): Token ids of the prompt
+
+        Returns:
+            Tuple[int, Optional[Any]]: Length of the prefix and its KV cache (0 and None if not found)
+        """
+        length, value = self.get(ids)
+
+        if value is not None and length < len(ids):
+            del self._entries[tuple(ids[:length])]
+
+        return length, value
+
+    def set(self, ids: Sequence[int], value: Any) -> None:
+        """Store the KV cache of the token ids (evict the least recently used)."""
+        ids = tuple(ids)
+        self._entries[ids] = value
+        self._entries.move_to_end(ids)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def copy_cache(cache, repeats: int = 1):
+    """
+    Return the KV cache of a prefix for a generation (cached prefix is not modified).
+
+    Notes:
+        A 'Cache' object is extended in place by the generation, it is copied.
+        Legacy caches (tuples of tensors, ex: GPT-2) are never modified.
+
+    Args:
+        cache (Union[Cache, Tuple]): KV cache of the prefix (batch of one)
+        repeats (int): Number of sequences generated
+
+    Returns:
+        Union[Cache, Tuple]: KV cache with a row by sequence
+    """
+    if isinstance(cache, tuple):
+        if repeats == 1:
+            return cache
+
+        return tuple(
+            tuple(tensor.repeat_interleave(repeats, dim=0) for tensor in layer)
+            for layer in cache
+        )
+
+    cache = copy.deepcopy(cache)
+
+    if repeats > 1:
+        cache.batch_repeat_interleave(repeats)
+
+    return cache
+
+
+class TransformerModel(ModelLocal):
+    """
+    Causal LM running locally with 'transformers' (CPU by default).
+
+    Notes:
+        Many prompts are generated in one padded forward pass ('_inference_batch').
+        A single prompt reuse the KV cache of its longest cached prefix
+        (the previous moves of the game), only the new tokens are computed,
+        the KV cache is copied once by generation (created by the first forward,
+        legacy caches of models like GPT-2 are kept as tuples).
+        'n' samples are generated with 'num_return_sequences' (one greedy
+        generation is repeated if the temperature is 0).
+        Generations are serialized by a lock (the model is shared by threads).
+        Constrained generations only follow the tokens of the legal moves
+        ('prefix_allowed_tokens_fn'), then end.
+
+    Attributes:
+        device (str): Device of the model (ex: 'cpu', 'cuda')
+        tokenizer (PreTrainedTokenizer): Tokenizer of the model (left padding)
+        model (PreTrainedModel): Causal LM
+        prefix_cache (PrefixCache): KV cache of the last prompts
+    """
+
+    device: str
+    prefix_cache: PrefixCache
+
+    def __init__(
+        self,
+        model_id: str,
+        device: str = "cpu",
+        prefix_cache_size: int = 32,
+        **model_kwargs,
+    ):
+        torch, transformers = _import_transformers()
+        super().__init__(model_id)
+
+        self.device = device
+        self.tokenizer = transformers.AutoTokenizer.from_pretrained(
+            model_id, padding_side="left"
+        )
+
+        # Causal LM often have no padding token
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+
+        self.model = transformers.AutoModelForCausalLM.from_pretrained(
+            model_id, **model_kwargs
+        )
+        self.model.to(device)
+        self.model.eval()
+
+        self.prefix_cache = PrefixCache(max_size=prefix_cache_size)
+        self._lock = threading.Lock()
+
+    def _constraint(
+        self, list_san: List[str], prompt_length: int
+    ) -> Tuple[Callable, int]:
+        """Return the function allowing only the tokens of the moves and their maximum length."""
+        trie = TokenTrie.from_generations(
+            list_san, lambda text: self.tokenizer.encode(text, add_special_tokens=False)
+        )
+        eos_token_id = self.tokenizer.eos_token_id
+
+        def prefix_allowed_tokens_fn(batch_id: int, input_ids) -> List[int]:
+            generated = input_ids[prompt_length:].tolist()
+            return trie.next_tokens(generated, eos_token_id)
+
+        return prefix_allowed_tokens_fn, trie.depth
+
+    def _generate_kwargs(
+        self, config: ConfigInference, prompt_length: int
+    ) -> Dict[str, Any]:
+        """Return the parameters of the generation (prompt length of the padded inputs)."""
+        kwargs = generation_kwargs(config, self.tokenizer.pad_token_id)
+
+        if config.allowed_san:
+            function, depth = self._constraint(config.allowed_san, prompt_length)
+            kwargs["prefix_allowed_tokens_fn"] = function
+            kwargs["max_new_tokens"] = depth + 1
+
+        return kwargs
+
+    def _parse_generations(
+        self,
+        sequences,
+        prompt_lengths: List[int],
+        padded_length: int,
+        config: ConfigInference,
+        num_return_sequences: int,
+    ) -> List[Tuple[OutputInference, List[str]]]:
+        """Return the OutputInference and the generations of each prompt."""
+        generated = sequences[:, padded_length:]
+        list_text = self.tokenizer.batch_decode(generated, skip_special_tokens=True)
+        list_tokens = (generated != self.tokenizer.pad_token_id).sum(dim=1).tolist()
+
+        return split_generations(
+            self.model_id,
+            list_text,
+            list_tokens,
+            prompt_lengths,
+            num_return_sequences,
+            config.n or 1,
+        )
+
+    def _prefill(self, ids: List[int]):
+        """Return the cached KV cache of the prompt without its last token (reuse its prefix)."""
+        torch, transformers = _import_transformers()
+
+        # Last token is computed by the generation
+        prefix_ids = ids[:-1]
+        length, cache = self.prefix_cache.take(prefix_ids)
+
+        if length == len(prefix_ids):
+            return cache
+
+        # Shorter prefix is extended (removed from the cache), else the forward create the cache
+        input_ids = torch.tensor([prefix_ids[length:]], device=self.device)
+        output = self.model(input_ids=input_ids, past_key_values=cache, use_cache=True)
+        cache = output.past_key_values
+
+        # Models supporting 'Cache' objects return a legacy cache if none is given
+        if isinstance(cache, tuple) and self.model._supports_cache_class:
+            cache = transformers.DynamicCache.from_legacy_cache(cache)
+
+        self.prefix_cache.set(prefix_ids, cache)
+
+        return cache
+
+    def _generate_prefix(
+        self, pgn_prompt: str, config: ConfigInference
+    ) -> Tuple[OutputInference, List[str]]:
+        """Generate the samples of one prompt with the KV cache of its prefix."""
+        inputs = self.tokenizer(pgn_prompt, return_tensors="pt").to(self.device)
+        ids = inputs["input_ids"][0].tolist()
+
+        # Prompt without prefix to cache
+        if len(ids) < 2:
+            return self._generate_batch([pgn_prompt], config)[0]
+
+        kwargs = self._generate_kwargs(config, len(ids))
+
+        cache = copy_cache(self._prefill(ids), kwargs["num_return_sequences"])
+        sequences = self.model.generate(**inputs, past_key_values=cache, **kwargs)
+
+        return self._parse_generations(
+            sequences, [len(ids)], len(ids), config, kwargs["num_return_sequences"]
+        )[0]
+
+    def _generate_batch(
+        self, list_prompt: List[str], config: ConfigInference
+    ) -> List[Tuple[OutputInference, List[str]]]:
+        """Generate the samples of many prompts in one padded forward pass."""
+        inputs = self.tokenizer(list_prompt, return_tensors="pt", padding=True)
+        inputs = inputs.to(self.device)
+        kwargs = self._generate_kwargs(config, inputs["input_ids"].shape[1])
+        prompt_lengths = inputs["attention_mask"].sum(dim=1).tolist()
+
+        sequences = self.model.generate(**inputs, **kwargs)
+
+        return self._parse_generations(
+            sequences,
+            prompt_lengths,
+            inputs["input_ids"].shape[1],
+            config,
+            kwargs["num_return_sequences"],
+        )
+
+    @final
+    @override
+    def _inference_batch(
+        self, list_prompt: List[str], config: ConfigInference = ConfigInference()
+    ) -> List[Tuple[OutputInference, List[str]]]:
+        torch, _ = _import_transformers()
+
+        with self._lock, torch.inference_mode():
+            if config.seed is not None:
+                torch.manual_seed(config.seed)
+
+            if len(list_prompt) == 1:
+                return [self._generate_prefix(list_prompt[0], config)]
+
+            return self._generate_batch(list_prompt, config)
+
+    @final
+    @override
+    def _inference(self, pgn_prompt: str, config: ConfigInference = ConfigInference()):
+        return self._inference_batch([pgn_prompt], config)[0]
@@ -1,7 +1,10 @@
-from typing import List, Literal, final, override
+from typing import Any, Dict, Iterator, List, Literal, Optional, final, override
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+from openai.types import Completion
 
+from bresse.clients import get_async_openai_client, get_openai_client
+from bresse.constrained import TokenTrie
 from bresse.identifiers.base import ModelId
 from bresse.identifiers.openai import GPT35Turbo
 from bresse.input import ConfigInference
@@ -11,37 +14,116 @@ from bresse.output import OutputInference
 AVAILABLE_MODELS = Literal["gpt-3.5-turbo-instruct",]
 
 
+def _import_tiktoken():
+    """Import 'tiktoken' (optional dependency)."""
+    try:
+        import tiktoken
+    except ImportError as exception:
+        raise ImportError(
+            "Constrained decoding of OpenAI models requires the 'tiktoken' package "
+            "(pip install bresse[constrained])"
+        ) from exception
+
+    return tiktoken
+
+
 class OpenAIModel(ModelCloud):
-    """OpenAI Cloud Model class for inference."""
+    """
+    OpenAI Cloud Model class for inference.
+
+    Notes:
+        Clients are shared by the models with the same endpoint and API key
+        (see 'bresse.clients'), they are not created by the constructor.
+        A client set on the model ('model.client = OpenAI(...)') is used instead.
+        With a rate limiter, the shared clients don't retry the rejected
+        requests (only the rate limiter does, a set client should do the same).
+        Constrained generations only use the tokens of the legal moves
+        ('logit_bias'), the tokens are found with 'tiktoken'. The tokens
+        can be combined into an illegal move, such samples are rejected
+        by the validation of the generations.
+    """
 
     list_models: List[ModelId] = [GPT35Turbo()]
 
-    def __init__(self, model_id: AVAILABLE_MODELS, api_key: str):
+    def __init__(
+        self,
+        model_id: AVAILABLE_MODELS,
+        api_key: str,
+        base_url: Optional[str] = None,
+    ):
         # Check if model_id is available, api_key is valid
         super().__init__(model_id, api_key)
 
-        # Initialize OpenAI client
-        self.client = OpenAI(api_key=api_key)
+        # base_url allow to use a compatible server
+        self.api_key = api_key
+        self.base_url = base_url
 
-    @final
-    @override
-    def _inference(self, pgn_prompt: str, config: ConfigInference = ConfigInference()):
-        completion = self.client.completions.create(
+        self._client: Optional[OpenAI] = None
+        self._async_client: Optional[AsyncOpenAI] = None
+
+    @property
+    def client(self) -> OpenAI:
+        """Return the OpenAI client (shared if not set, without retries if rate limited)."""
+        if self._client is not None:
+            return self._client
+
+        # Retries of a rejected request are done by the rate limiter only
+        retries = self.rate_limiter is None
+        return get_openai_client(self.api_key, self.base_url, retries)
+
+    @client.setter
+    def client(self, client: Optional[OpenAI]) -> None:
+        self._client = client
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """Return the AsyncOpenAI client (shared by the running event loop if not set, without retries if rate limited)."""
+        if self._async_client is not None:
+            return self._async_client
+
+        retries = self.rate_limiter is None
+        return get_async_openai_client(self.api_key, self.base_url, retries)
+
+    @async_client.setter
+    def async_client(self, async_client: Optional[AsyncOpenAI]) -> None:
+        self._async_client = async_client
+
+    def _encode(self, text: str) -> List[int]:
+        """Return the token ids of the text (tokenizer of the model)."""
+        tiktoken = _import_tiktoken()
+        return tiktoken.encoding_for_model(self.model_id.id).encode(text)
+
+    def _completion_kwargs(
+        self, pgn_prompt: str, config: ConfigInference
+    ) -> Dict[str, Any]:
+        """Return the parameters of the completion request."""
+        logit_bias = config.logit_bias
+        max_tokens = config.max_tokens
+
+        # Only the tokens of the legal moves, no more tokens than the longest move
+        if config.allowed_san:
+            trie = TokenTrie.from_generations(config.allowed_san, self._encode)
+            logit_bias = {**trie.logit_bias(), **config.logit_bias}
+            max_tokens = trie.depth
+
+        return dict(
             model=self.model_id.id,
             prompt=pgn_prompt,
             # stop=["\n", "#", "1-0", "0-1"],  # '1/2-1/2' is not a valid stop token
             seed=config.seed,
             n=config.n,
             best_of=config.best_of,
-            max_tokens=config.max_tokens,
+            max_tokens=max_tokens,
             presence_penalty=config.presence_penalty,
             frequency_penalty=config.frequency_penalty,
             top_p=config.top_p,
             temperature=config.temperature,
             logprobs=config.logprobs,
-            logit_bias=config.logit_bias,
+            logit_bias=logit_bias,
         )
 
+    def _parse_completion(self, completion: Completion):
+        """Return the OutputInference and the generations of the completion."""
         input_tokens = completion.usage.prompt_tokens
         output_tokens = completion.usage.completion_tokens
 
@@ -55,3 +137,49 @@ class OpenAIModel(ModelCloud):
         list_generation = [choice.text for choice in completion.choices]
 
         return output_inf, list_generation
+
+    @final
+    @override
+    def _inference(self, pgn_prompt: str, config: ConfigInference = ConfigInference()):
+        kwargs = self._completion_kwargs(pgn_prompt, config)
+        completion = self.client.completions.create(**kwargs)
+
+        return self._parse_completion(completion)
+
+    @final
+    @override
+    async def _ainference(
+        self, pgn_prompt: str, config: ConfigInference = ConfigInference()
+    ):
+        kwargs = self._completion_kwargs(pgn_prompt, config)
+        completion = await self.async_client.completions.create(**kwargs)
+
+        return self._parse_completion(completion)
+
+    @final
+    @override
+    def _stream_inference(
+        self,
+        pgn_prompt: str,
+        config: ConfigInference,
+        output_inf: OutputInference,
+    ) -> Iterator[str]:
+        kwargs = self._completion_kwargs(pgn_prompt, config)
+        stream = self.client.completions.create(
+            **kwargs,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+
+        try:
+            for chunk in stream:
+                # Last chunk give the usage (only if the stream is finished)
+                if chunk.usage is not None:
+                    output_inf.inputs_tokens = chunk.usage.prompt_tokens
+                    output_inf.outputs_tokens = chunk.usage.completion_tokens
+
+                for choice in chunk.choices:
+                    output_inf.outputs_tokens += 1
+                    yield choice.text
+        finally:
+            stream.close()
@@ -1,16 +1,19 @@
 import math
+from array import array
 from collections import Counter
 from dataclasses import dataclass
-from typing import Callable, Iterable, List, Optional, Self
+from enum import IntEnum
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Self, Union
 
 import chess
-from chess import InvalidMoveError
+from chess import AmbiguousMoveError, IllegalMoveError, InvalidMoveError
 
+from bresse.chess_ import get_legal_san
 from bresse.identifiers.base import ModelId
 from bresse.process import postprocess_result
 
 
-@dataclass
+@dataclass(slots=True)
 class Result:
     """Result of LLM generation."""
 
@@ -19,6 +22,129 @@ class Result:
     exception: Optional[InvalidMoveError]
 
 
+class ErrorKind(IntEnum):
+    """Kind of error of a LLM generation (stored in ResultList)."""
+
+    NONE = 0
+    INVALID = 1
+    ILLEGAL = 2
+    AMBIGUOUS = 3
+    OTHER = 4
+
+    @classmethod
+    def from_exception(cls, exception: Optional[Exception]) -> "ErrorKind":
+        """Return the kind of error of an exception."""
+        if exception is None:
+            return cls.NONE
+
+        # IllegalMoveError and AmbiguousMoveError inherit from InvalidMoveError
+        if isinstance(exception, IllegalMoveError):
+            return cls.ILLEGAL
+
+        if isinstance(exception, AmbiguousMoveError):
+            return cls.AMBIGUOUS
+
+        if isinstance(exception, InvalidMoveError):
+            return cls.INVALID
+
+        return cls.OTHER
+
+
+class ResultList:
+    """
+    Compact list of Result, the SAN are interned and stored as integer codes.
+
+    Notes:
+        Each unique string is stored once, each result only cost 9 bytes
+        (SAN code, postprocess SAN code and error kind). Exceptions are
+        stored once by postprocess SAN, Result are created on demand.
+        Behave like a list of Result (index, slice, iteration, append).
+    """
+
+    def __init__(self, list_result: Iterable[Result] = ()):
+        self._strings: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self._exceptions: Dict[int, Exception] = {}
+
+        self._san = array("I")
+        self._postprocess_san = array("I")
+        self._errors = array("B")
+
+        for result in list_result:
+            self.append(result)
+
+    def _intern(self, string: str) -> int:
+        """Return the code of a string (add it on first call)."""
+        code = self._codes.get(string)
+
+        if code is None:
+            code = len(self._strings)
+            self._strings.append(string)
+            self._codes[string] = code
+
+        return code
+
+    def append(self, result: Result) -> None:
+        """Add a Result (same as a list of Result)."""
+        self.add(result.san, result.postprocess_san, result.exception)
+
+    def add(
+        self, san: str, postprocess_san: str, exception: Optional[Exception]
+    ) -> None:
+        """Add the result of a LLM generation (without creating a Result)."""
+        code = self._intern(postprocess_san)
+
+        self._san.append(self._intern(san))
+        self._postprocess_san.append(code)
+        self._errors.append(ErrorKind.from_exception(exception))
+
+        if exception is not None:
+            self._exceptions.setdefault(code, exception)
+
+    def error_kind(self, index: int) -> ErrorKind:
+        """Return the kind of error of a result."""
+        return ErrorKind(self._errors[index])
+
+    @property
+    def errors(self) -> int:
+        """Return the number of results with an error."""
+        return len(self._errors) - self._errors.count(ErrorKind.NONE)
+
+    def counter(self) -> Counter:
+        """Return the Counter of the valid postprocess SAN."""
+        counter = Counter()
+
+        for code, error in zip(self._postprocess_san, self._errors):
+            if error == ErrorKind.NONE:
+                counter[self._strings[code]] += 1
+
+        return counter
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Result, "ResultList"]:
+        if isinstance(index, slice):
+            indices = range(len(self))[index]
+            return ResultList(self[i] for i in indices)
+
+        code = self._postprocess_san[index]
+        exception = None
+
+        if self._errors[index] != ErrorKind.NONE:
+            exception = self._exceptions[code]
+
+        return Result(
+            san=self._strings[self._san[index]],
+            postprocess_san=self._strings[code],
+            exception=exception,
+        )
+
+    def __iter__(self) -> Iterator[Result]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def __len__(self) -> int:
+        return len(self._errors)
+
+
 class OutputInference:
     """
     Output of LLM Inference.
@@ -28,17 +154,29 @@ class OutputInference:
         number_requests (int): Number of requests
         inputs_tokens (int): Number of tokens for input
         outputs_tokens (int): Number of tokens for output
+        latency (float): Wall-clock time of the request in seconds (0 if cached)
+        ttft (Optional[float]): Time to first token in seconds (None if unknown)
+        retries (int): Number of retries of the request (rate limited)
+        cached (bool): True if the inference was found in the cache
 
     Properties:
         cost (float): Cost of the inference in $ (input + output)
         number_requests_per_dollar (float): Number of requests available for 1$
         avg_outputs_tokens (float): Average number of tokens for output
+
+    Notes:
+        Inferences of the same model can be added ('a + b', 'sum(list_output)'),
+        counters and latencies are summed. '+=' accumulate in place (O(1)).
     """
 
     model_id: ModelId
     number_requests: int
     inputs_tokens: int
     outputs_tokens: int
+    latency: float
+    ttft: Optional[float]
+    retries: int
+    cached: bool
 
     def __init__(
         self,
@@ -46,11 +184,73 @@ class OutputInference:
         number_requests: int,
         inputs_tokens: int,
         outputs_tokens: int,
+        latency: float = 0.0,
+        ttft: Optional[float] = None,
+        retries: int = 0,
+        cached: bool = False,
     ):
         self.model_id = model_id
         self.number_requests = number_requests
         self.inputs_tokens = inputs_tokens
         self.outputs_tokens = outputs_tokens
+        self.latency = latency
+        self.ttft = ttft
+        self.retries = retries
+        self.cached = cached
+
+    @classmethod
+    def zero(cls, model_id: ModelId) -> "OutputInference":
+        """Return an empty inference of the model (start of an accumulation)."""
+        return cls(
+            model_id=model_id, number_requests=0, inputs_tokens=0, outputs_tokens=0
+        )
+
+    def _check_model(self, other: "OutputInference") -> None:
+        """Raise an error if the inferences are not from the same model."""
+        if self.model_id != other.model_id:
+            raise ValueError(
+                f"Can't add inferences of different models: "
+                f"'{self.model_id.id}' and '{other.model_id.id}'"
+            )
+
+    def __add__(self, other: "OutputInference") -> "OutputInference":
+        if not isinstance(other, OutputInference):
+            return NotImplemented
+
+        self._check_model(other)
+
+        return OutputInference(
+            model_id=self.model_id,
+            number_requests=self.number_requests + other.number_requests,
+            inputs_tokens=self.inputs_tokens + other.inputs_tokens,
+            outputs_tokens=self.outputs_tokens + other.outputs_tokens,
+            latency=self.latency + other.latency,
+            retries=self.retries + other.retries,
+            cached=self.cached and other.cached,
+        )
+
+    def __radd__(self, other: object) -> "OutputInference":
+        # Start of 'sum()'
+        if other == 0:
+            return self + OutputInference.zero(self.model_id)
+
+        return NotImplemented
+
+    def __iadd__(self, other: "OutputInference") -> Self:
+        if not isinstance(other, OutputInference):
+            return NotImplemented
+
+        self._check_model(other)
+
+        self.number_requests += other.number_requests
+        self.inputs_tokens += other.inputs_tokens
+        self.outputs_tokens += other.outputs_tokens
+        self.latency += other.latency
+        self.retries += other.retries
+        self.cached = self.cached and other.cached
+        self.ttft = None
+
+        return self
 
     @property
     def cost(self) -> float:
@@ -77,13 +277,16 @@ class OutputGeneration:
 
     Attributes:
         counter (Dict[int]): Counter of each san
-        list_result (List[Result]): List of result
+        list_result (ResultList): List of result
     """
 
     counter: Counter
-    list_result: List[Result]
+    list_result: ResultList
+
+    def __init__(self, counter: Counter, list_result: Iterable[Result]):
+        if not isinstance(list_result, ResultList):
+            list_result = ResultList(list_result)
 
-    def __init__(self, counter: Counter, list_result: List[Result]):
         self.counter = counter
         self.list_result = list_result
 
@@ -125,38 +328,41 @@ class OutputGeneration:
         Returns:
             OutputGeneration: instance with all results
         """
-        list_results = []
+        list_results = ResultList()
         counter = Counter()
 
         # If no preprocess function, don't change san
         if preprocess_func is None:
             preprocess_func = postprocess_result
 
+        # Each unique generation is cleaned and validated once
+        cache_postprocess = {}
+        cache_exception = {}
+        legal_san = None
+
         for san in list_san:
-            exception = None
-            postprocess_san = preprocess_func(san)
-
-            try:
-                # Test if the san is valid move
-                board.push_san(postprocess_san)
-            except Exception as _exception:
-                # Get error for stock in Result
-                exception = _exception
-            else:
-                # Board don't push on error
-                board.pop()
-
-                # Add to Counter only if don't have error
-                counter.update([postprocess_san])
-            finally:
-                # Any case, stock result of validation move
-                result = Result(
-                    san=san,
-                    postprocess_san=postprocess_san,
-                    exception=exception,
+            postprocess_san = cache_postprocess.get(san)
+
+            if postprocess_san is None:
+                postprocess_san = preprocess_func(san)
+                cache_postprocess[san] = postprocess_san
+
+            if postprocess_san not in cache_exception:
+                if legal_san is None:
+                    legal_san = _legal_san_index(board)
+
+                cache_exception[postprocess_san] = _validate_san(
+                    board, legal_san, postprocess_san
                 )
 
-                list_results.append(result)
+            exception = cache_exception[postprocess_san]
+
+            # Add to Counter only if don't have error
+            if exception is None:
+                counter[postprocess_san] += 1
+
+            # Any case, stock result of validation move
+            list_results.add(san, postprocess_san, exception)
 
         return cls(
             counter=counter,
@@ -164,6 +370,34 @@ class OutputGeneration:
         )
 
 
+def _legal_san_index(board: chess.Board) -> Dict[str, chess.Move]:
+    """Return the legal moves of the board by SAN (without '+' and '#')."""
+    legal_san = get_legal_san(board)
+    return {_strip_check(san): move for san, move in legal_san.items()}
+
+
+def _strip_check(san: str) -> str:
+    """Return the SAN without its check or checkmate suffix (only one)."""
+    return san[:-1] if san[-1:] in ("+", "#") else san
+
+
+def _validate_san(
+    board: chess.Board, legal_san: Dict[str, chess.Move], san: str
+) -> Optional[Exception]:
+    """Return the error of a SAN move (None if the move is legal)."""
+    # Standard SAN of a legal move, no need to parse it
+    if _strip_check(san) in legal_san:
+        return None
+
+    # Else parse it, for non-standard SAN (ex: 'Ng1f3') and the error message
+    try:
+        board.parse_san(san)
+    except Exception as exception:
+        return exception
+
+    return None
+
+
 class Output(OutputGeneration, OutputInference):
     """Output of LLM Inference and generation."""
 
@@ -174,7 +408,11 @@ class Output(OutputGeneration, OutputInference):
         inputs_tokens: int,
         outputs_tokens: int,
         counter: Counter,
-        list_result: List[Result],
+        list_result: Iterable[Result],
+        latency: float = 0.0,
+        ttft: Optional[float] = None,
+        retries: int = 0,
+        cached: bool = False,
     ):
         OutputGeneration.__init__(
             self,
@@ -188,6 +426,10 @@ class Output(OutputGeneration, OutputInference):
             number_requests=number_requests,
             inputs_tokens=inputs_tokens,
             outputs_tokens=outputs_tokens,
+            latency=latency,
+            ttft=ttft,
+            retries=retries,
+            cached=cached,
         )
 
     @classmethod
@@ -204,4 +446,8 @@ class Output(OutputGeneration, OutputInference):
             number_requests=output_inf.number_requests,
             inputs_tokens=output_inf.inputs_tokens,
             outputs_tokens=output_inf.outputs_tokens,
+            latency=output_inf.latency,
+            ttft=output_inf.ttft,
+            retries=output_inf.retries,
+            cached=output_inf.cached,
         )
@@ -1,36 +1,231 @@
+import weakref
+from typing import List, Optional, Tuple
+
+import chess
 import chess.pgn
 
 
-def preprocess_game(game: chess.pgn.Game):
+class _PromptExporter(chess.pgn.StringExporter):
+    """StringExporter who stop before the result (game can continue)."""
+
+    def visit_result(self, result: str) -> None:
+        """Result is written when rendering the prompt."""
+
+    def end_game(self) -> None:
+        """Keep the current line open for the next moves."""
+
+
+# Annotations of a node (starting comment, comment, NAGs)
+NodeAnnotations = Tuple[str, str, frozenset]
+
+
+class PromptBuilder:
     """
-    Preprocess a game to be used as prompt for LLM
+    Build the prompt of a game, extended incrementally when a move is played.
+
+    Notes:
+        The game is exported once (headers and movetext), then only the SAN
+        of each new move (and its number) is appended to the exporter.
+        The game is exported again if the headers, the annotations of the
+        last node, or the variations of the last node change (checked in
+        constant time on each prompt). Edits of earlier nodes (annotations,
+        variations, promotions) are not detected, call 'rebuild' (or
+        'invalidate_prompt') after such edits.
+
+    Attributes:
+        exporter (_PromptExporter): Exporter with the text of the game
+        board (chess.Board): Board at the position of the last node
+        length_moves (int): Number of moves in the mainline
+    """
+
+    exporter: _PromptExporter
+    board: chess.Board
+    length_moves: int
+
+    def __init__(self, game: chess.pgn.Game):
+        self._game = weakref.ref(game)
+        self.rebuild()
+
+    @property
+    def game(self) -> Optional[chess.pgn.Game]:
+        """Return the game of the builder (None if released)."""
+        return self._game()
+
+    @property
+    def node(self) -> Optional[chess.pgn.GameNode]:
+        """Return the last node exported (None if removed from the game)."""
+        return self._node()
+
+    def rebuild(self) -> None:
+        """Export the full game (headers and movetext)."""
+        game = self.game
+
+        self.exporter = _PromptExporter(columns=None)
+        game.accept(self.exporter)
+
+        node = game
+        length_moves = 0
+
+        while node.variations:
+            node = node.variations[0]
+            length_moves += 1
+
+        self._node = weakref.ref(node)
+        self._headers = list(game.headers.items())
+        self._annotations = self._annotations_of(node)
+        self._prompt = None
+
+        self.board = node.board()
+        self.length_moves = length_moves
+
+    @staticmethod
+    def _annotations_of(node: chess.pgn.GameNode) -> NodeAnnotations:
+        """Return the annotations of a node."""
+        return node.starting_comment, node.comment, frozenset(node.nags)
+
+    def _is_stale(self) -> bool:
+        """Return True if the game changed in a way who need a full export (constant time)."""
+        node = self.node
+
+        if node is None:
+            return True
+
+        # Last node removed, or replaced by a variation in the mainline
+        parent = node.parent
+
+        conditions = (
+            list(self.game.headers.items()) != self._headers,
+            self._annotations_of(node) != self._annotations,
+            parent is not None and parent.variations[:1] != [node],
+        )
+
+        return any(conditions)
+
+    def sync(self) -> None:
+        """Append the moves played since the last call."""
+        if self._is_stale():
+            self.rebuild()
+            return
+
+        node = self.node
+
+        while node.variations:
+            # Variations and annotations are only handled by a full export
+            child = node.variations[0]
+            conditions = (
+                len(node.variations) > 1,
+                child.starting_comment,
+                child.comment,
+                child.nags,
+            )
+
+            if any(conditions):
+                self.rebuild()
+                return
+
+            self.exporter.visit_move(self.board, child.move)
+            self.board.push(child.move)
+            self.length_moves += 1
+            self._prompt = None
+            node = child
+
+        self._node = weakref.ref(node)
+        self._annotations = self._annotations_of(node)
+
+    @property
+    def prompt(self) -> str:
+        """Return the prompt of the game (cached until a move is played)."""
+        self.sync()
+
+        if self._prompt is None:
+            self._prompt = self._render()
+
+        return self._prompt
+
+    def _render(self) -> str:
+        """Render the prompt like 'str(game)', without the result."""
+        exporter = self.exporter
+        result = self.game.headers["Result"]
+
+        # Write the result like 'str(game)', then restore the exporter
+        current_line = exporter.current_line
+        length_lines = len(exporter.lines)
+
+        exporter.write_token(f"{result} ")
+        str_game = exporter.result()
+
+        del exporter.lines[length_lines:]
+        exporter.current_line = current_line
+
+        # Trait of the board (game can start from a FEN with Black to move)
+        trait = self.board.turn == chess.WHITE
+
+        # Delete at end the '1-0' if exist (for LLM predict next move)
+        str_game = str_game[: -len(result)]
+
+        """If trait is for White, need to add number of move
+        Allow to add number without intervention of LLM"""
+        if trait:
+            count_move = self.board.fullmove_number
+
+            """Note: Don't add space after number, LLM have better result
+            if he can set by himself the space (first black move give always '1...', idk why)
+            set strip at end because chess library set space at end with black trait"""
+            str_game += f"{count_move}."
+
+        return str_game.strip()
+
+
+# Builders are released with their game (no need to close them)
+_BUILDERS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def get_prompt_builder(game: chess.pgn.Game) -> PromptBuilder:
+    """
+    Get the prompt builder of a game (create it on first call).
 
     Args:
-        game (chess.pgn.Game): Game (pgn) to preprocess pgn text (str)
+        game (chess.pgn.Game): Game to get the prompt builder
 
     Returns:
-        str: Preprocessed game
+        PromptBuilder: Prompt builder of the game
     """
-    str_game = str(game)
-    list_moves = list(game.mainline())
-    length_moves = len(list_moves)
-    trait = length_moves % 2 == 0
+    builder = _BUILDERS.get(game)
 
-    # Delete at end the '1-0' if exist (for LLM predict next move)
-    length_result = len(game.headers["Result"])
-    str_game = str_game[:-length_result]
+    if builder is None:
+        builder = PromptBuilder(game)
+        _BUILDERS[game] = builder
 
-    """If trait is for White, need to add number of move
-    Allow to add number without intervention of LLM"""
-    if trait:
-        count_move = length_moves // 2 + 1
+    return builder
 
-        """Note: Don't add space after number, LLM have better result
-        if he can set by himself the space (first black move give always '1...', idk why)
-        set strip at end because chess library set space at end with black trait"""
-        str_game += f"{count_move}."
 
-    return str_game.strip()
+def invalidate_prompt(game: chess.pgn.Game) -> None:
+    """
+    Export the game again on the next prompt (after edits of earlier nodes).
+
+    Args:
+        game (chess.pgn.Game): Game edited outside the last node
+    """
+    _BUILDERS.pop(game, None)
+
+
+def preprocess_game(game: chess.pgn.Game):
+    """
+    Preprocess a game to be used as prompt for LLM
+
+    Notes:
+        The prompt is built incrementally, the full game is only exported
+        on first call (or when the headers or the last node change), call
+        'invalidate_prompt' after edits of earlier nodes
+
+    Args:
+        game (chess.pgn.Game): Game (pgn) to preprocess pgn text (str)
+
+    Returns:
+        str: Preprocessed game
+    """
+    builder = get_prompt_builder(game)
+    return builder.prompt
 
 
 def postprocess_result(result: str):
@@ -60,3 +255,69 @@ def postprocess_result(result: str):
     result = result.strip()
 
     return result
+
+
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+
+
+def is_san_token(token: str) -> bool:
+    """
+    Check if a token of generation can be a SAN move
+
+    Args:
+        token (str): Token of generation (ex: '1.', 'e4', '1-0')
+
+    Returns:
+        bool: True if the token can be a SAN move
+    """
+    # Skip if not san move (result, comment, new line, move number)
+    conditions = (
+        token not in RESULTS,
+        not token.startswith("#"),
+        not token.startswith("\n"),
+        "." not in token,
+        not token == "",
+    )
+
+    return all(conditions)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens of a text (without tokenizer)
+
+    Notes:
+        PGN have many short tokens (move numbers, SAN), the estimation
+        is about 1 token for 3 characters, round up
+
+    Args:
+        text (str): Text to estimate
+
+    Returns:
+        int: Estimated number of tokens
+    """
+    return -(-len(text) // 3)
+
+
+class SanTokenizer:
+    """
+    Split a streamed generation into tokens, like 'text.split(" ")'.
+
+    Notes:
+        A token is complete when the next space is received,
+        the last token is only complete at the end of the stream.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        """Add a chunk of generation, return the completed tokens."""
+        self._buffer += text
+        *tokens, self._buffer = self._buffer.split(" ")
+        return tokens
+
+    def flush(self) -> List[str]:
+        """End of the stream, return the last token."""
+        token, self._buffer = self._buffer, ""
+        return [token]
@@ -0,0 +1,242 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Sequence
+
+import chess
+import chess.pgn
+
+from bresse.chess_ import get_session
+from bresse.process import PromptBuilder, estimate_tokens, preprocess_game
+
+# Headers who help the model to predict the moves (strength of the players)
+ESSENTIAL_HEADERS = ("White", "Black", "WhiteElo", "BlackElo", "Result")
+
+# Headers of the starting position (never dropped)
+SETUP_HEADERS = ("SetUp", "FEN")
+
+# Values of the unknown headers (dropped)
+UNKNOWN_VALUES = ("?", "????.??.??", "")
+
+
+def _essential_headers(game: chess.pgn.Game, names: Sequence[str]) -> Dict[str, str]:
+    """Return the headers of the game in 'names' (and the setup headers), without unknown values."""
+    headers = {}
+
+    for name, value in game.headers.items():
+        if name not in names and name not in SETUP_HEADERS:
+            continue
+
+        if value in UNKNOWN_VALUES:
+            continue
+
+        headers[name] = value
+
+    return headers
+
+
+def _render_headers(headers: Dict[str, str]) -> str:
+    """Return the header section of a PGN (empty if no headers)."""
+    lines = []
+
+    for name, value in headers.items():
+        escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+        lines.append(f'[{name} "{escaped}"]')
+
+    if not lines:
+        return ""
+
+    return "\n".join(lines) + "\n\n"
+
+
+class PromptStrategy(ABC):
+    """
+    Base class of the strategies building the prompt of a game.
+
+    Notes:
+        The full prompt grow with the game (input tokens of a game are
+        quadratic with its length), strategies can cap it.
+        Set it with 'model.prompt_strategy = LastMoves(20)'.
+    """
+
+    @abstractmethod
+    def render(self, game: chess.pgn.Game) -> str:
+        """
+        Return the prompt of the game (the model predict the next move).
+
+        Args:
+            game (chess.pgn.Game): Game to play
+
+        Returns:
+            str: Prompt of the game
+        """
+        ...
+
+    def estimate_tokens(self, game: chess.pgn.Game) -> int:
+        """Return the estimated number of tokens of the prompt of the game."""
+        return estimate_tokens(self.render(game))
+
+    @property
+    def name(self) -> str:
+        """Return the name of the strategy (ex: benchmark report)."""
+        return repr(self)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}()"
+
+
+class FullPrompt(PromptStrategy):
+    """All the headers and the movetext of the game (default of the models)."""
+
+    def render(self, game: chess.pgn.Game) -> str:
+        """Return the full prompt of the game (built incrementally)."""
+        return preprocess_game(game)
+
+
+class EssentialHeaders(PromptStrategy):
+    """
+    Full movetext with only the essential headers (known values).
+
+    Attributes:
+        headers (Sequence[str]): Names of the headers kept
+    """
+
+    headers: Sequence[str]
+
+    def __init__(self, headers: Sequence[str] = ESSENTIAL_HEADERS):
+        self.headers = headers
+
+    def render(self, game: chess.pgn.Game) -> str:
+        """Return the prompt of the game without the non-essential headers."""
+        prompt = preprocess_game(game)
+
+        # Movetext is after the first empty line (no empty line without headers)
+        if prompt.startswith("[") and "\n\n" in prompt:
+            prompt = prompt.split("\n\n", 1)[1]
+
+        return _render_headers(_essential_headers(game, self.headers)) + prompt
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(headers={len(self.headers)})"
+
+
+class LastMoves(PromptStrategy):
+    """
+    Only the last moves, after the FEN of the position before them ('SetUp' header).
+
+    Notes:
+        The prompt is rebuilt from the live board of the mainline
+        (side variations are ignored, as in the validation board),
+        its length is bounded by 'k' moves (not by the game length).
+
+    Attributes:
+        k (int): Number of last half-moves kept
+        headers (Sequence[str]): Names of the headers kept
+    """
+
+    k: int
+    headers: Sequence[str]
+
+    def __init__(self, k: int = 20, headers: Sequence[str] = ESSENTIAL_HEADERS):
+        if k < 1:
+            raise ValueError("k must be greater than 0.")
+
+        self.k = k
+        self.headers = headers
+
+    def _start_ply(self, length: int) -> int:
+        """Return the index of the first move kept."""
+        return max(0, length - self.k)
+
+    def render(self, game: chess.pgn.Game) -> str:
+        """Return the prompt of the last moves of the game."""
+        board = get_session(game).board
+        length = len(board.move_stack)
+        kept = length - self._start_ply(length)
+
+        # Board before the moves kept (copy only their stack)
+        start_board = board.copy(stack=kept)
+        moves = list(start_board.move_stack)
+
+        for _ in moves:
+            start_board.pop()
+
+        window = chess.pgn.Game(headers=_essential_headers(game, self.headers))
+        window.headers["Result"] = game.headers.get("Result", "*")
+
+        # FEN of the first position (no setup headers for the standard start)
+        window.setup(start_board)
+        node = window
+
+        for move in moves:
+            node = node.add_variation(move)
+
+        return PromptBuilder(window).prompt
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(k={self.k})"
+
+
+class SlidingWindow(LastMoves):
+    """
+    Last moves in a window who move by steps (prefix stable between steps).
+
+    Notes:
+        The first move kept only change every 'step' half-moves, the
+        prompts of these moves share their prefix (cache of the prompt
+        prefix of the providers and of local models).
+        The prompt has between 'k' and 'k + step - 1' half-moves.
+
+    Attributes:
+        k (int): Minimum number of last half-moves kept
+        step (int): Number of half-moves between two moves of the window
+    """
+
+    step: int
+
+    def __init__(
+        self, k: int = 20, step: int = 10, headers: Sequence[str] = ESSENTIAL_HEADERS
+    ):
+        super().__init__(k=k, headers=headers)
+
+        if step < 1:
+            raise ValueError("step must be greater than 0.")
+
+        self.step = step
+
+    def _start_ply(self, length: int) -> int:
+        """Return the index of the first move kept (multiple of 'step')."""
+        return (max(0, length - self.k) // self.step) * self.step
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(k={self.k}, step={self.step})"
+
+
+def estimate_game_tokens(game: chess.pgn.Game, strategy: PromptStrategy) -> int:
+    """
+    Estimate the input tokens of all the prompts of a game (one by move).
+
+    Args:
+        game (chess.pgn.Game): Game to replay
+        strategy (PromptStrategy): Strategy building the prompts
+
+    Returns:
+        int: Estimated number of input tokens of the game
+    """
+    replay = chess.pgn.Game(headers=dict(game.headers))
+    replay.headers["Result"] = "*"
+    node = replay
+    total = 0
+
+    for move in game.mainline_moves():
+        total += strategy.estimate_tokens(replay)
+        node = node.add_variation(move)
+
+    return total
+
+
+def compare_strategies(
+    game: chess.pgn.Game, strategies: Iterable[PromptStrategy]
+) -> Dict[str, int]:
+    """Return the estimated input tokens of a game by strategy name."""
+    return {
+        strategy.name: estimate_game_tokens(game, strategy) for strategy in strategies
+    }
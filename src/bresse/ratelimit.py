@@ -0,0 +1,298 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Rate limiters shared by all model instances (ex: same API key and model)
+_LIMITERS: Dict[str, "RateLimiter"] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def is_rate_limited(exception: BaseException) -> bool:
+    """Return True if the exception is a 'Too Many Requests' (429) of any client."""
+    response = getattr(exception, "response", None)
+    status_codes = (
+        getattr(exception, "status_code", None),  # openai
+        getattr(exception, "status", None),  # aiohttp
+        getattr(response, "status_code", None),  # requests (huggingface_hub)
+    )
+
+    if 429 in status_codes:
+        return True
+
+    # Client errors parsed from the response (ex: 'OverloadedError' of TGI)
+    if exception.__cause__ is not None:
+        return is_rate_limited(exception.__cause__)
+
+    return False
+
+
+def _retry_after(exception: BaseException) -> Optional[float]:
+    """Return the delay asked by the server in the 'Retry-After' header (if any)."""
+    response = getattr(exception, "response", None)
+    headers = getattr(response, "headers", None) or getattr(exception, "headers", None)
+
+    if not headers:
+        return None
+
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class _Bucket:
+    """
+    Token bucket refilled continuously, the level can be negative (debt).
+
+    Attributes:
+        capacity (float): Maximum level of the bucket
+        rate (float): Refill rate by second
+        level (float): Current level of the bucket
+        updated (float): Time of the last refill
+    """
+
+    def __init__(self, capacity: float, now: float):
+        self.capacity = capacity
+        self.rate = capacity / 60
+        self.level = capacity
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take the amount from the bucket, return the time to wait before using it."""
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+        # Request bigger than the bucket would wait forever
+        self.level -= min(amount, self.capacity)
+
+        if self.level >= 0:
+            return 0.0
+
+        return -self.level / self.rate
+
+    def refund(self, amount: float) -> None:
+        """Give back (or take if negative) an amount to the bucket."""
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """
+    Pace the requests of models to stay under the requests and tokens per minute.
+
+    Notes:
+        Each call reserve its requests and estimated tokens, then wait until the
+        quota is available (calls are served in order). The estimation is
+        corrected with the real usage once the call is finished.
+        Calls rejected by the server (429) are retried with a jittered
+        exponential backoff, which pause all the calls sharing the limiter,
+        the quota reserved by a rejected call is given back.
+        State is protected by a thread lock, the limiter can be shared by
+        threads and event loops.
+
+    Attributes:
+        requests_per_minute (Optional[int]): Maximum requests by minute (None is unlimited)
+        tokens_per_minute (Optional[int]): Maximum tokens by minute (None is unlimited)
+        max_retries (int): Maximum number of retries of a call rejected by the server
+        base_delay (float): Delay of the first retry in seconds (doubled at each retry)
+        max_delay (float): Maximum delay between two retries in seconds
+        retries (int): Number of calls retried
+        wait_time (float): Total time waited by the calls in seconds
+        clock (Callable[[], float]): Monotonic clock in seconds
+    """
+
+    requests_per_minute: Optional[int]
+    tokens_per_minute: Optional[int]
+    max_retries: int
+    base_delay: float
+    max_delay: float
+    retries: int
+    wait_time: float
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_retries: int = 6,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        self.wait_time = 0.0
+
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+
+        now = self.clock()
+        self._requests = (
+            None if requests_per_minute is None else _Bucket(requests_per_minute, now)
+        )
+        self._tokens = (
+            None if tokens_per_minute is None else _Bucket(tokens_per_minute, now)
+        )
+
+    def reserve(self, requests: int = 1, tokens: int = 0) -> float:
+        """
+        Reserve the quota of a call.
+
+        Args:
+            requests (int): Number of requests of the call
+            tokens (int): Estimated number of tokens of the call
+
+        Returns:
+            float: Time to wait in seconds before doing the call
+        """
+        with self._lock:
+            now = self.clock()
+            delay = max(0.0, self._paused_until - now)
+
+            if self._requests is not None:
+                delay = max(delay, self._requests.reserve(requests, now))
+
+            if self._tokens is not None:
+                delay = max(delay, self._tokens.reserve(tokens, now))
+
+            self.wait_time += delay
+
+            return delay
+
+    def settle(self, estimated: int, actual: int) -> None:
+        """Correct the tokens reserved with the real usage of the call."""
+        if self._tokens is None:
+            return
+
+        with self._lock:
+            self._tokens.refund(estimated - actual)
+
+    def refund(self, requests: int = 1, tokens: int = 0) -> None:
+        """Give back the quota reserved by a call rejected by the server."""
+        with self._lock:
+            if self._requests is not None:
+                self._requests.refund(min(requests, self._requests.capacity))
+
+            if self._tokens is not None:
+                self._tokens.refund(min(tokens, self._tokens.capacity))
+
+    def backoff(self, attempt: int, exception: BaseException) -> float:
+        """
+        Pause all the calls after a rejected call, return the delay to wait.
+
+        Args:
+            attempt (int): Number of the retry (0 for the first)
+            exception (BaseException): Exception raised by the rejected call
+
+        Returns:
+            float: Delay before retrying the call in seconds
+        """
+        delay = _retry_after(exception)
+
+        # Full jitter, avoid retrying all the calls at the same time
+        if delay is None:
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+        with self._lock:
+            self.retries += 1
+            self._paused_until = max(self._paused_until, self.clock() + delay)
+
+        return delay
+
+    def call(self, func: Callable[[], T], requests: int = 1, tokens: int = 0) -> T:
+        """
+        Call the function when the quota is available (retry if rate limited).
+
+        Args:
+            func (Callable[[], T]): Function doing the requests
+            requests (int): Number of requests of the call
+            tokens (int): Estimated number of tokens of the call
+
+        Returns:
+            T: Result of the function
+        """
+        for attempt in range(self.max_retries + 1):
+            time.sleep(self.reserve(requests, tokens))
+
+            try:
+                return func()
+            except Exception as exception:
+                if not is_rate_limited(exception) or attempt == self.max_retries:
+                    raise
+
+                self.refund(requests, tokens)
+                time.sleep(self.backoff(attempt, exception))
+
+    async def acall(
+        self, func: Callable[[], Awaitable[T]], requests: int = 1, tokens: int = 0
+    ) -> T:
+        """
+        Asynchronous version of 'call', await the coroutine function when the quota is available.
+
+        Args:
+            func (Callable[[], Awaitable[T]]): Coroutine function doing the requests
+            requests (int): Number of requests of the call
+            tokens (int): Estimated number of tokens of the call
+
+        Returns:
+            T: Result of the coroutine
+        """
+        for attempt in range(self.max_retries + 1):
+            await asyncio.sleep(self.reserve(requests, tokens))
+
+            try:
+                return await func()
+            except Exception as exception:
+                if not is_rate_limited(exception) or attempt == self.max_retries:
+                    raise
+
+                self.refund(requests, tokens)
+                await asyncio.sleep(self.backoff(attempt, exception))
+
+
+def get_rate_limiter(
+    name: str,
+    requests_per_minute: Optional[int] = None,
+    tokens_per_minute: Optional[int] = None,
+) -> RateLimiter:
+    """
+    Return the rate limiter shared under this name (create it on first call).
+
+    Notes:
+        Models sharing a quota (same API key and model) should share a limiter,
+        ex: 'model.rate_limiter = get_rate_limiter("openai:gpt-3.5-turbo-instruct", 3_500, 90_000)'
+        Without limits, return the existing limiter. Limits different from
+        the existing limiter raise ValueError (a quota has one limit).
+
+    Args:
+        name (str): Name of the quota
+        requests_per_minute (Optional[int]): Maximum requests by minute (None is unlimited)
+        tokens_per_minute (Optional[int]): Maximum tokens by minute (None is unlimited)
+
+    Returns:
+        RateLimiter: Rate limiter of the quota
+    """
+    limits = (requests_per_minute, tokens_per_minute)
+
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(name)
+
+        if limiter is None:
+            limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+            _LIMITERS[name] = limiter
+        elif limits != (None, None):
+            existing = (limiter.requests_per_minute, limiter.tokens_per_minute)
+
+            if limits != existing:
+                raise ValueError(
+                    f"Rate limiter '{name}' already exists with limits {existing}, not {limits}."
+                )
+
+        return limiter
@@ -0,0 +1,71 @@
+import dataclasses
+from collections import Counter
+
+from bresse.input import ConfigInference
+
+
+def wave_config(config: ConfigInference, drawn: int) -> ConfigInference:
+    """
+    Return the configuration of the next wave of an adaptive sampling.
+
+    Notes:
+        The seed is shifted by the samples already drawn,
+        else each wave would repeat the samples of the first one.
+
+    Args:
+        config (ConfigInference): Configuration of the inference ('n' is the maximum)
+        drawn (int): Number of samples already drawn
+
+    Returns:
+        ConfigInference: Configuration requesting the next 'wave_size' samples
+    """
+    n = min(config.wave_size, config.n - drawn)
+    seed = None if config.seed is None else config.seed + drawn
+
+    return dataclasses.replace(
+        config,
+        n=n,
+        best_of=min(config.best_of or 1, n),
+        seed=seed,
+        wave_size=None,
+    )
+
+
+def is_decided(counter: Counter, drawn: int, config: ConfigInference) -> bool:
+    """
+    Return True if the leading SAN of the samples can't change anymore.
+
+    Notes:
+        The vote is decided if the remaining samples can't overturn the lead
+        of the leading SAN, or if its share of the samples drawn (illegal
+        samples included) pass 'config.confidence'.
+
+    Args:
+        counter (Counter): Count of the legal SAN of the samples
+        drawn (int): Number of samples drawn (legal or not)
+        config (ConfigInference): Configuration of the inference ('n' is the maximum)
+
+    Returns:
+        bool: True if the sampling can stop
+    """
+    remaining = config.n - drawn
+
+    if remaining <= 0:
+        return True
+
+    list_count = [count for _, count in counter.most_common(2)]
+
+    # All samples are illegal, the vote has no leader
+    if not list_count:
+        return False
+
+    first = list_count[0]
+    second = list_count[1] if len(list_count) > 1 else 0
+
+    if first - second > remaining:
+        return True
+
+    if config.confidence is not None and first / drawn >= config.confidence:
+        return True
+
+    return False
@@ -0,0 +1,358 @@
+import math
+import random
+import threading
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from bresse.output import OutputInference
+
+# Quantiles of the latencies in the summaries and the exporter
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Maximum number of latencies kept by model (uniform sample of the requests)
+RESERVOIR_SIZE = 4_096
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Return the percentile of the values (linear interpolation between ranks).
+
+    Args:
+        values (List[float]): Values (not sorted)
+        q (float): Quantile between 0 and 1
+
+    Returns:
+        float: Percentile of the values (0 if there are no values)
+    """
+    if not values:
+        return 0.0
+
+    values = sorted(values)
+    rank = (len(values) - 1) * q
+    low = math.floor(rank)
+    high = math.ceil(rank)
+
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+def escape_label(value: str) -> str:
+    """Escape a label value of the Prometheus text format ('\\', '"' and newline)."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Reservoir:
+    """
+    Uniform sample of a stream of values, with the exact count and sum.
+
+    Notes:
+        Memory is bounded by 'size' (reservoir sampling), the percentiles
+        are estimated on the sample once there are more values.
+
+    Attributes:
+        size (int): Maximum number of values kept
+        values (array): Values kept (all the values until 'size')
+        count (int): Number of values added
+        total (float): Sum of the values added
+    """
+
+    size: int
+    values: array
+    count: int
+    total: float
+
+    def __init__(self, size: int = RESERVOIR_SIZE, seed: Optional[int] = None):
+        self.size = size
+        self.values = array("d")
+        self.count = 0
+        self.total = 0.0
+        self._random = random.Random(seed)
+
+    def add(self, value: float) -> None:
+        """Add a value (replace a kept value with a probability 'size / count')."""
+        self.count += 1
+        self.total += value
+
+        if len(self.values) < self.size:
+            self.values.append(value)
+            return
+
+        index = self._random.randrange(self.count)
+
+        if index < self.size:
+            self.values[index] = value
+
+    def merge(self, list_reservoir: Iterable["Reservoir"]) -> None:
+        """Add the counts and sums of reservoirs, and their samples (bounded)."""
+        for reservoir in list_reservoir:
+            self.count += reservoir.count
+            self.total += reservoir.total
+            self.values.extend(reservoir.values)
+
+        if len(self.values) > self.size:
+            self.values = array("d", self._random.sample(self.values, self.size))
+
+    def percentile(self, q: float) -> float:
+        """Return the percentile of the values (estimated on the sample)."""
+        return percentile(self.values, q)
+
+    def __len__(self) -> int:
+        return self.count
+
+
+@dataclass
+class ModelTelemetry:
+    """
+    Telemetry of the inferences of a model.
+
+    Attributes:
+        model_id (str): Model identifier
+        requests (int): Number of requests sent (without the cached inferences)
+        inferences (int): Number of inferences (with the cached inferences)
+        cache_hits (int): Number of inferences found in the cache
+        retries (int): Number of retries of the requests (rate limited)
+        inputs_tokens (int): Number of tokens for input
+        outputs_tokens (int): Number of tokens for output
+        cost (float): Cost of the inferences in $
+        latencies (Reservoir): Latencies of the requests in seconds (not cached)
+        ttfts (Reservoir): Times to first token of the requests in seconds (not cached)
+    """
+
+    model_id: str
+    requests: int = 0
+    inferences: int = 0
+    cache_hits: int = 0
+    retries: int = 0
+    inputs_tokens: int = 0
+    outputs_tokens: int = 0
+    cost: float = 0.0
+    latencies: Reservoir = field(default_factory=Reservoir)
+    ttfts: Reservoir = field(default_factory=Reservoir)
+
+    def record(self, output_inf: OutputInference) -> None:
+        """Add an inference to the telemetry."""
+        self.inferences += 1
+        self.retries += output_inf.retries
+
+        # Cached inferences have no request, no latency and no cost
+        if output_inf.cached:
+            self.cache_hits += 1
+            return
+
+        self.requests += output_inf.number_requests
+        self.inputs_tokens += output_inf.inputs_tokens
+        self.outputs_tokens += output_inf.outputs_tokens
+        self.cost += output_inf.cost
+        self.latencies.add(output_inf.latency)
+
+        if output_inf.ttft is not None:
+            self.ttfts.add(output_inf.ttft)
+
+    def latency(self, q: float) -> float:
+        """Return the percentile of the latencies in seconds."""
+        return self.latencies.percentile(q)
+
+    def ttft(self, q: float) -> float:
+        """Return the percentile of the times to first token in seconds."""
+        return self.ttfts.percentile(q)
+
+    @property
+    def tokens_per_second(self) -> float:
+        """Return the output tokens generated by second of request."""
+        duration = self.latencies.total
+
+        if not duration:
+            return 0.0
+
+        return self.outputs_tokens / duration
+
+
+class Telemetry:
+    """
+    Aggregate the telemetry of the inferences of a session (by model).
+
+    Notes:
+        Models record their inferences when 'model.telemetry' is set,
+        games are counted with 'add_game' (ex: by the Tournament).
+        A telemetry can be shared by models and threads.
+
+    Attributes:
+        models (Dict[str, ModelTelemetry]): Telemetry by model identifier
+        games (int): Number of games played in the session
+    """
+
+    models: Dict[str, ModelTelemetry]
+    games: int
+
+    def __init__(self):
+        self.models = {}
+        self.games = 0
+        self._lock = threading.Lock()
+
+    def record(self, output_inf: OutputInference) -> None:
+        """Add an inference to the telemetry of its model."""
+        model_id = output_inf.model_id.id
+
+        with self._lock:
+            if model_id not in self.models:
+                self.models[model_id] = ModelTelemetry(model_id=model_id)
+
+            self.models[model_id].record(output_inf)
+
+    def add_game(self, number: int = 1) -> None:
+        """Count the games played in the session."""
+        with self._lock:
+            self.games += number
+
+    @property
+    def cost(self) -> float:
+        """Return the cost of the session in $ (all models)."""
+        return sum(telemetry.cost for telemetry in self.models.values())
+
+    @property
+    def cost_per_game(self) -> float:
+        """Return the cost by game of the session in $."""
+        if not self.games:
+            return 0.0
+
+        return self.cost / self.games
+
+    def summary(self, model_id: Optional[str] = None) -> Dict[str, float]:
+        """
+        Return the summary of the telemetry (one model or all models).
+
+        Args:
+            model_id (Optional[str]): Model identifier (None for all models)
+
+        Returns:
+            Dict[str, float]: Latency percentiles, throughput and costs
+        """
+        if model_id is None:
+            list_telemetry = list(self.models.values())
+        else:
+            list_telemetry = [self.models[model_id]]
+
+        merged = ModelTelemetry(model_id=model_id or "*")
+
+        for telemetry in list_telemetry:
+            merged.requests += telemetry.requests
+            merged.inferences += telemetry.inferences
+            merged.cache_hits += telemetry.cache_hits
+            merged.retries += telemetry.retries
+            merged.outputs_tokens += telemetry.outputs_tokens
+            merged.cost += telemetry.cost
+
+        merged.latencies.merge(telemetry.latencies for telemetry in list_telemetry)
+        merged.ttfts.merge(telemetry.ttfts for telemetry in list_telemetry)
+
+        summary = {
+            "requests": merged.requests,
+            "inferences": merged.inferences,
+            "cache_hits": merged.cache_hits,
+            "retries": merged.retries,
+        }
+
+        for q in QUANTILES:
+            summary[f"latency_p{q * 100:g}"] = merged.latency(q)
+
+        for q in QUANTILES:
+            summary[f"ttft_p{q * 100:g}"] = merged.ttft(q)
+
+        summary["tokens_per_second"] = merged.tokens_per_second
+        summary["cost"] = merged.cost
+        summary["cost_per_game"] = merged.cost / self.games if self.games else 0.0
+
+        return summary
+
+    def to_prometheus(self, prefix: str = "bresse") -> str:
+        """
+        Export the telemetry in the Prometheus (OpenMetrics) text format.
+
+        Args:
+            prefix (str): Prefix of the metric names
+
+        Returns:
+            str: Metrics in the text exposition format
+        """
+        lines = []
+
+        def metric(name: str, type_: str, help_: str, samples: List[tuple]) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_}")
+            lines.append(f"# TYPE {prefix}_{name} {type_}")
+
+            for suffix, labels, value in samples:
+                text = ",".join(
+                    f'{key}="{escape_label(value_)}"' for key, value_ in labels.items()
+                )
+                lines.append(f"{prefix}_{name}{suffix}{{{text}}} {value!r}")
+
+        def by_model(attribute: str) -> List[tuple]:
+            return [
+                ("", {"model": model_id}, getattr(telemetry, attribute))
+                for model_id, telemetry in self.models.items()
+            ]
+
+        latency_samples = []
+
+        for model_id, telemetry in self.models.items():
+            for q in QUANTILES:
+                labels = {"model": model_id, "quantile": f"{q:g}"}
+                latency_samples.append(("", labels, telemetry.latency(q)))
+
+            labels = {"model": model_id}
+            latency_samples.append(("_sum", labels, telemetry.latencies.total))
+            latency_samples.append(("_count", labels, telemetry.latencies.count))
+
+        metric(
+            "inference_latency_seconds",
+            "summary",
+            "Latency of the requests",
+            latency_samples,
+        )
+        metric(
+            "inference_requests_total",
+            "counter",
+            "Number of requests sent",
+            by_model("requests"),
+        )
+        metric(
+            "inference_cache_hits_total",
+            "counter",
+            "Number of inferences found in the cache",
+            by_model("cache_hits"),
+        )
+        metric(
+            "inference_retries_total",
+            "counter",
+            "Number of retries of the requests",
+            by_model("retries"),
+        )
+
+        tokens_samples = []
+
+        for model_id, telemetry in self.models.items():
+            tokens_samples.append(
+                ("", {"model": model_id, "type": "input"}, telemetry.inputs_tokens)
+            )
+            tokens_samples.append(
+                ("", {"model": model_id, "type": "output"}, telemetry.outputs_tokens)
+            )
+
+        metric(
+            "inference_tokens_total",
+            "counter",
+            "Number of tokens",
+            tokens_samples,
+        )
+        metric(
+            "inference_cost_dollars_total",
+            "counter",
+            "Cost of the inferences in $",
+            by_model("cost"),
+        )
+
+        lines.append(f"# HELP {prefix}_games_total Number of games played")
+        lines.append(f"# TYPE {prefix}_games_total counter")
+        lines.append(f"{prefix}_games_total {self.games}")
+
+        return "\n".join(lines) + "\n"
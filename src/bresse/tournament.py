@@ -0,0 +1,415 @@
+import asyncio
+import itertools
+import time
+import warnings
+from dataclasses import dataclass, field
+from os import PathLike
+from typing import Dict, Iterable, List, Optional, TextIO, Union
+
+import chess
+import chess.pgn
+
+from bresse.chess_ import game_play_san, generate_pgn, get_session
+from bresse.input import ConfigInference
+from bresse.ledger import get_ledger
+from bresse.models.base import Model
+from bresse.output import Output, OutputInference
+from bresse.telemetry import Telemetry
+
+
+@dataclass
+class Match:
+    """
+    Game to play between two models.
+
+    Attributes:
+        white (Model): Model playing White
+        black (Model): Model playing Black
+        opening (Optional[chess.pgn.Game]): Opening played before the models
+        round_ (int): Round number of tournament
+    """
+
+    white: Model
+    black: Model
+    opening: Optional[chess.pgn.Game] = None
+    round_: int = 1
+
+
+def _matches(
+    pairs: Iterable[tuple], openings: Optional[List[chess.pgn.Game]]
+) -> List[Match]:
+    """Create a match for each pair of models and each opening."""
+    list_opening = openings or [None]
+    list_match = []
+
+    for round_, (white, black) in enumerate(pairs, start=1):
+        for opening in list_opening:
+            match = Match(white=white, black=black, opening=opening, round_=round_)
+            list_match.append(match)
+
+    return list_match
+
+
+def round_robin(
+    models: List[Model],
+    openings: Optional[List[chess.pgn.Game]] = None,
+    self_play: bool = False,
+) -> List[Match]:
+    """
+    Create the matches of a round-robin (each model play each other with both colors).
+
+    Args:
+        models (List[Model]): Models of the tournament
+        openings (Optional[List[chess.pgn.Game]]): Openings played by each pair
+        self_play (bool): Each model also play against itself
+
+    Returns:
+        List[Match]: Matches of the tournament
+    """
+    pairs = list(itertools.permutations(models, 2))
+
+    if self_play:
+        pairs.extend((model, model) for model in models)
+
+    return _matches(pairs, openings)
+
+
+def gauntlet(
+    model: Model,
+    opponents: List[Model],
+    openings: Optional[List[chess.pgn.Game]] = None,
+) -> List[Match]:
+    """
+    Create the matches of a gauntlet (one model play each opponent with both colors).
+
+    Args:
+        model (Model): Model running the gauntlet
+        opponents (List[Model]): Opponents of the model (can contain the model)
+        openings (Optional[List[chess.pgn.Game]]): Openings played by each pair
+
+    Returns:
+        List[Match]: Matches of the tournament
+    """
+    pairs = []
+
+    for opponent in opponents:
+        pairs.append((model, opponent))
+        pairs.append((opponent, model))
+
+    return _matches(pairs, openings)
+
+
+@dataclass
+class ModelStats:
+    """
+    Statistics of a model over a tournament.
+
+    Attributes:
+        model (Model): Model of the statistics
+        output_inf (OutputInference): Total inference of the model (without the cached inferences)
+        cache_hits (int): Number of cached inferences (no request, no cost)
+        moves (int): Number of moves played
+        samples (int): Number of SAN generated
+        illegal_samples (int): Number of SAN generated who are not a legal move
+        forfeits (int): Number of games lost without any legal SAN generated
+        errors (int): Number of games abandoned after an error of the inference
+        wins (int): Number of games won
+        draws (int): Number of games drawn
+        losses (int): Number of games lost
+    """
+
+    model: Model
+    output_inf: OutputInference = field(init=False)
+    cache_hits: int = 0
+    moves: int = 0
+    samples: int = 0
+    illegal_samples: int = 0
+    forfeits: int = 0
+    errors: int = 0
+    wins: int = 0
+    draws: int = 0
+    losses: int = 0
+
+    def __post_init__(self):
+        self.output_inf = OutputInference.zero(self.model.model_id)
+
+    @property
+    def number_requests(self) -> int:
+        """Return the number of requests."""
+        return self.output_inf.number_requests
+
+    @property
+    def inputs_tokens(self) -> int:
+        """Return the number of tokens for input."""
+        return self.output_inf.inputs_tokens
+
+    @property
+    def outputs_tokens(self) -> int:
+        """Return the number of tokens for output."""
+        return self.output_inf.outputs_tokens
+
+    @property
+    def illegal_rate(self) -> float:
+        """Return the rate of generated SAN who are not a legal move."""
+        if not self.samples:
+            return 0.0
+
+        return self.illegal_samples / self.samples
+
+    def add_output(self, output: Output) -> None:
+        """Accumulate the inference and generation of one move."""
+        # Cached inferences have no request and no cost (same as the telemetry)
+        if output.cached:
+            self.cache_hits += 1
+        else:
+            self.output_inf += output
+
+        self.samples += len(output.list_result)
+        self.illegal_samples += output.list_result.errors
+
+
+@dataclass
+class TournamentReport:
+    """
+    Aggregated results of a tournament.
+
+    Notes:
+        Models are named like their repr ('OpenAIModel('gpt-3.5-turbo-instruct')'),
+        a number is added if another model of the tournament has the same
+        name (ex: same model with another configuration, 'OpenAIModel(...) #2').
+
+    Attributes:
+        stats (Dict[str, ModelStats]): Statistics by model name
+        games (int): Number of games finished
+        errors (int): Number of games abandoned after an error of the inference
+        duration (float): Duration of the tournament in seconds
+    """
+
+    stats: Dict[str, ModelStats] = field(default_factory=dict)
+    games: int = 0
+    errors: int = 0
+    duration: float = 0.0
+    _names: Dict[int, str] = field(default_factory=dict, repr=False)
+
+    @property
+    def cost(self) -> float:
+        """Return the cost of the tournament in $ (all models)."""
+        return sum(stats.output_inf.cost for stats in self.stats.values())
+
+    @property
+    def games_per_minute(self) -> float:
+        """Return the throughput of the tournament."""
+        if not self.duration:
+            return 0.0
+
+        return self.games / self.duration * 60
+
+    def get_name(self, model: Model) -> str:
+        """Return the name of a model instance (create its statistics on first call)."""
+        name = self._names.get(id(model))
+
+        if name is None:
+            name = f"{model}"
+            number = 1
+
+            # Other instance with the same name (repr)
+            while name in self.stats:
+                number += 1
+                name = f"{model} #{number}"
+
+            self._names[id(model)] = name
+            self.stats[name] = ModelStats(model=model)
+
+        return name
+
+    def get_stats(self, model: Model) -> ModelStats:
+        """Return the statistics of a model instance (create it on first call)."""
+        return self.stats[self.get_name(model)]
+
+
+class Tournament:
+    """
+    Play many games concurrently between models.
+
+    Notes:
+        Each worker play one game at a time, all workers share the event loop,
+        so the requests of many games are multiplexed (bounded by 'max_concurrency'
+        of each model). Finished games are appended to the PGN file.
+        A game whose inference fail (ex: provider error) is abandoned
+        (result '*', termination 'abandoned'), the other games continue.
+
+    Attributes:
+        matches (List[Match]): Matches to play
+        config (ConfigInference): Configuration for LLM inference
+        workers (int): Number of games played concurrently
+        max_moves (int): Maximum number of moves by game (game is unfinished '*')
+        path_pgn (Optional[Union[str, PathLike]]): File where finished games are appended
+        telemetry (Optional[Telemetry]): Telemetry counting the games played
+    """
+
+    matches: List[Match]
+    config: ConfigInference
+    workers: int
+    max_moves: int
+    path_pgn: Optional[Union[str, PathLike]]
+    telemetry: Optional[Telemetry]
+
+    def __init__(
+        self,
+        matches: List[Match],
+        config: ConfigInference = ConfigInference(),
+        workers: int = 8,
+        max_moves: int = 150,
+        path_pgn: Optional[Union[str, PathLike]] = None,
+        telemetry: Optional[Telemetry] = None,
+    ):
+        self.matches = matches
+        self.config = config
+        self.workers = workers
+        self.max_moves = max_moves
+        self.path_pgn = path_pgn
+        self.telemetry = telemetry
+
+    @staticmethod
+    def _create_game(match: Match, report: TournamentReport) -> chess.pgn.Game:
+        """Create the game of a match (with the moves of the opening)."""
+        game = generate_pgn(
+            round_=match.round_,
+            white=report.get_name(match.white),
+            black=report.get_name(match.black),
+        )
+
+        if match.opening is not None:
+            node = game
+
+            for move in match.opening.mainline_moves():
+                node = node.add_variation(move)
+
+        return game
+
+    async def play_match(
+        self, match: Match, report: TournamentReport
+    ) -> chess.pgn.Game:
+        """
+        Play a match until the end of the game (or 'max_moves').
+
+        Args:
+            match (Match): Match to play
+            report (TournamentReport): Report where statistics are accumulated
+
+        Returns:
+            chess.pgn.Game: Game played (abandoned if an inference failed)
+        """
+        game = self._create_game(match, report)
+        board = get_session(game).board
+
+        while not board.is_game_over() and board.ply() < self.max_moves * 2:
+            model = match.white if board.turn == chess.WHITE else match.black
+            stats = report.get_stats(model)
+
+            try:
+                output = await model.ainference(game, self.config)
+            except Exception as exception:
+                white = game.headers["White"]
+                black = game.headers["Black"]
+                warnings.warn(
+                    f"Game of '{white}' vs '{black}' abandoned: {exception!r}",
+                    stacklevel=2,
+                )
+                stats.errors += 1
+                report.errors += 1
+                game.headers["Termination"] = "abandoned"
+                game.headers["Result"] = "*"
+                return game
+
+            stats.add_output(output)
+            get_ledger(game).add(output)
+
+            # Model without legal SAN lose the game
+            if not output.counter:
+                stats.forfeits += 1
+                game.headers["Termination"] = "rules infraction"
+                game.headers["Result"] = "0-1" if board.turn == chess.WHITE else "1-0"
+                break
+
+            game_play_san(game, output.most_common)
+            stats.moves += 1
+        else:
+            game.headers["Result"] = board.result()
+
+        self._update_results(match, game, report)
+
+        if self.telemetry is not None:
+            self.telemetry.add_game()
+
+        return game
+
+    @staticmethod
+    def _update_results(
+        match: Match, game: chess.pgn.Game, report: TournamentReport
+    ) -> None:
+        """Count the win, draw or loss of each model."""
+        result = game.headers["Result"]
+        white = report.get_stats(match.white)
+        black = report.get_stats(match.black)
+
+        if result == "1-0":
+            white.wins += 1
+            black.losses += 1
+        elif result == "0-1":
+            white.losses += 1
+            black.wins += 1
+        elif result == "1/2-1/2":
+            white.draws += 1
+            black.draws += 1
+
+        report.games += 1
+
+    async def _worker(
+        self,
+        queue: asyncio.Queue,
+        report: TournamentReport,
+        file: Optional[TextIO],
+    ) -> None:
+        """Play the matches of the queue, stream finished games to the file."""
+        while True:
+            try:
+                match = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            game = await self.play_match(match, report)
+
+            if file is not None:
+                print(game, file=file, end="\n\n")
+                file.flush()
+
+    async def arun(self) -> TournamentReport:
+        """Play all the matches, return the aggregated report."""
+        report = TournamentReport()
+        queue = asyncio.Queue()
+
+        for match in self.matches:
+            queue.put_nowait(match)
+
+            # Names by order of the matches (not by order of the first move)
+            report.get_name(match.white)
+            report.get_name(match.black)
+
+        file = None if self.path_pgn is None else open(self.path_pgn, "a")
+        start = time.perf_counter()
+
+        try:
+            workers = (self._worker(queue, report, file) for _ in range(self.workers))
+            await asyncio.gather(*workers)
+        finally:
+            report.duration = time.perf_counter() - start
+
+            if file is not None:
+                file.close()
+
+        return report
+
+    def run(self) -> TournamentReport:
+        """Play all the matches (synchronous entrypoint)."""
+        return asyncio.run(self.arun())
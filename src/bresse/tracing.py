@@ -0,0 +1,315 @@
+import contextlib
+import random
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Sequence
+
+# Epoch of the performance counter, start and end of spans use the same clock
+_EPOCH_NS = time.time_ns() - time.perf_counter_ns()
+
+
+@dataclass
+class Span:
+    """
+    Timed stage of a trace (ex: prompt building, provider request).
+
+    Attributes:
+        name (str): Name of the stage
+        trace_id (int): Identifier of the trace (same for all its spans)
+        span_id (int): Identifier of the span
+        parent_id (Optional[int]): Identifier of the parent span (None for the root)
+        start_time (int): Start of the span, nanoseconds since epoch
+        duration (float): Wall-clock duration in seconds
+        net_blocks_delta (int): Net change of the allocated memory blocks of the process
+            during the span (allocated minus freed, other threads included, can be negative)
+        attributes (Dict[str, Any]): Attributes of the span (ex: model identifier)
+    """
+
+    name: str
+    trace_id: int
+    span_id: int
+    parent_id: Optional[int]
+    start_time: int
+    duration: float = 0.0
+    net_blocks_delta: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def end_time(self) -> int:
+        """Return the end of the span, nanoseconds since epoch."""
+        return self.start_time + int(self.duration * 1e9)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Set an attribute of the span."""
+        self.attributes[key] = value
+
+
+class _NoopSpan:
+    """Span of the no-op tracer (attributes are ignored)."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Ignore the attribute."""
+
+
+# Shared context of the no-op tracer, nothing is recorded
+_NOOP_CONTEXT = contextlib.nullcontext(_NoopSpan())
+
+
+@dataclass
+class StageStats:
+    """
+    Aggregated spans of a stage.
+
+    Attributes:
+        count (int): Number of spans
+        total (float): Total duration in seconds
+        maximum (float): Longest duration in seconds
+        net_blocks_delta (int): Sum of the net changes of the memory blocks of the spans
+    """
+
+    count: int = 0
+    total: float = 0.0
+    maximum: float = 0.0
+    net_blocks_delta: int = 0
+
+    def add(self, span: Span) -> None:
+        """Add a finished span to the stats."""
+        self.count += 1
+        self.total += span.duration
+        self.maximum = max(self.maximum, span.duration)
+        self.net_blocks_delta += span.net_blocks_delta
+
+    @property
+    def mean(self) -> float:
+        """Return the mean duration in seconds."""
+        if not self.count:
+            return 0.0
+
+        return self.total / self.count
+
+
+class SpanExporter(ABC):
+    """Base class of the exporters of the finished traces."""
+
+    @abstractmethod
+    def export(self, spans: List[Span]) -> None:
+        """
+        Export the spans of a finished trace.
+
+        Args:
+            spans (List[Span]): Spans of the trace (children before their parent)
+        """
+        ...
+
+
+class InMemoryExporter(SpanExporter):
+    """
+    Keep the finished traces in memory (tests, notebooks).
+
+    Attributes:
+        traces (List[List[Span]]): Spans of each finished trace
+    """
+
+    traces: List[List[Span]]
+
+    def __init__(self):
+        self.traces = []
+
+    def export(self, spans: List[Span]) -> None:
+        """Keep the spans of the trace."""
+        self.traces.append(spans)
+
+
+def _import_opentelemetry():
+    """Import 'opentelemetry' (optional dependency)."""
+    try:
+        from opentelemetry import trace
+    except ImportError as exception:
+        raise ImportError(
+            "OpenTelemetry export requires the 'opentelemetry-api' package "
+            "(pip install bresse[tracing])"
+        ) from exception
+
+    return trace
+
+
+class OpenTelemetryExporter(SpanExporter):
+    """
+    Forward the finished traces to an OpenTelemetry tracer.
+
+    Notes:
+        Spans are created with their original start and end times and
+        parents, the OpenTelemetry SDK configured by the application
+        export them (OTLP, console, etc.).
+
+    Attributes:
+        tracer (opentelemetry.trace.Tracer): Tracer creating the spans
+    """
+
+    def __init__(self, tracer=None):
+        trace = _import_opentelemetry()
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer("bresse")
+
+    def export(self, spans: List[Span]) -> None:
+        """Create the OpenTelemetry spans of the trace (parents first)."""
+        otel_spans = {}
+
+        for span in sorted(spans, key=lambda span: span.start_time):
+            parent = otel_spans.get(span.parent_id)
+            context = None
+
+            if parent is not None:
+                context = self._trace.set_span_in_context(parent)
+
+            attributes = dict(span.attributes)
+            attributes["bresse.net_blocks_delta"] = span.net_blocks_delta
+
+            otel_spans[span.span_id] = self.tracer.start_span(
+                span.name,
+                context=context,
+                start_time=span.start_time,
+                attributes=attributes,
+            )
+
+        for span in spans:
+            otel_spans[span.span_id].end(end_time=span.end_time)
+
+
+class NoopTracer:
+    """Tracer recording nothing (default of the models, no overhead)."""
+
+    def span(self, name: str, **attributes: Any) -> ContextManager:
+        """Return a context doing nothing."""
+        return _NOOP_CONTEXT
+
+
+class Tracer(NoopTracer):
+    """
+    Record the spans of the stages, aggregate them by name and export the traces.
+
+    Notes:
+        Spans opened inside another span (same thread or asyncio task)
+        are its children, a trace is exported when its root span ends.
+        Set it with 'model.tracer = Tracer()', the stats give the time
+        spent in each stage (local CPU or provider).
+
+    Attributes:
+        exporters (Sequence[SpanExporter]): Exporters of the finished traces
+        stats (Dict[str, StageStats]): Aggregated spans by name
+    """
+
+    exporters: Sequence[SpanExporter]
+    stats: Dict[str, StageStats]
+
+    def __init__(self, exporters: Sequence[SpanExporter] = ()):
+        self.exporters = exporters
+        self.stats = {}
+
+        self._current: ContextVar[Optional[Span]] = ContextVar(
+            f"bresse_span_{id(self)}", default=None
+        )
+        self._traces: Dict[int, List[Span]] = {}
+        self._lock = threading.Lock()
+        self._random = random.Random()
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """
+        Time the block as a span (child of the current span).
+
+        Args:
+            name (str): Name of the stage
+            **attributes (Any): Attributes of the span
+
+        Returns:
+            Iterator[Span]: Span of the block (attributes can be added)
+        """
+        parent = self._current.get()
+
+        if parent is None:
+            trace_id, parent_id = self._random.getrandbits(128), None
+        else:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+
+        start = time.perf_counter_ns()
+        span = Span(
+            name=name,
+            trace_id=trace_id,
+            span_id=self._random.getrandbits(64),
+            parent_id=parent_id,
+            start_time=_EPOCH_NS + start,
+            attributes=attributes,
+        )
+
+        token = self._current.set(span)
+        blocks = sys.getallocatedblocks()
+
+        try:
+            yield span
+        except BaseException as exception:
+            span.set_attribute("error", type(exception).__name__)
+            raise
+        finally:
+            span.duration = (time.perf_counter_ns() - start) / 1e9
+            # Net change only (blocks freed during the span are subtracted)
+            span.net_blocks_delta = sys.getallocatedblocks() - blocks
+            self._current.reset(token)
+            self._finish(span)
+
+    def _finish(self, span: Span) -> None:
+        """Add the span to the stats, export its trace if this is the root."""
+        with self._lock:
+            if span.name not in self.stats:
+                self.stats[span.name] = StageStats()
+
+            self.stats[span.name].add(span)
+            spans = self._traces.setdefault(span.trace_id, [])
+            spans.append(span)
+
+            if span.parent_id is not None:
+                return
+
+            del self._traces[span.trace_id]
+
+        for exporter in self.exporters:
+            exporter.export(spans)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Return the count, total and mean duration and net change of memory blocks by stage."""
+        return {
+            name: {
+                "count": stats.count,
+                "total": stats.total,
+                "mean": stats.mean,
+                "max": stats.maximum,
+                "net_blocks_delta": stats.net_blocks_delta,
+            }
+            for name, stats in self.stats.items()
+        }
+
+    def latency_split(
+        self, root: str = "inference", remote: str = "provider"
+    ) -> Dict[str, float]:
+        """
+        Split the time of the root spans between the local CPU and the provider.
+
+        Args:
+            root (str): Name of the spans of the whole operation
+            remote (str): Name of the spans waiting for the provider
+
+        Returns:
+            Dict[str, float]: Total, provider and local time in seconds
+        """
+        total = self.stats.get(root, StageStats()).total
+        provider = self.stats.get(remote, StageStats()).total
+
+        return {
+            "total": total,
+            "provider": provider,
+            "local": max(0.0, total - provider),
+        }
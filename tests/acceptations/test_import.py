@@ -73,3 +73,11 @@ def test_generate_opening():
         importlib.util.find_spec("bresse generate_opening")
     except ImportError:
         assert False, "Can't import generate_opening with 'from bresse._chess import generate_opening'"
+
+
+def test_get_session():
+    """Test if user can import 'get_session' as usual."""
+    try:
+        importlib.util.find_spec("bresse get_session")
+    except ImportError:
+        assert False, "Can't import get_session with 'from bresse import get_session'"
@@ -1,6 +1,13 @@
+import itertools
+import json
+import re
+import threading
 from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import List, Literal, Optional, final, override
+from typing import Iterator, List, Literal, Optional, final, override
+
+import pytest
 
 from bresse.chess_ import pgn_to_board
 from bresse.identifiers.base import ModelId
@@ -56,6 +63,41 @@ class FakeModel(ModelCloud):
         return output_inf, self.list_san
 
 
+class FakeModelCount(FakeModel):
+    """
+    Fake Model class counting the requests sent to the provider ('_inference').
+
+    Attributes:
+        list_config (List[ConfigInference]): Configuration of each request
+        iter_san (Optional[Iterator[str]]): Cycle of the SAN, 'n' samples by request (None to return 'list_san')
+    """
+
+    def __init__(
+        self,
+        model_id: Literal["gpt-3.5-turbo-instruct"] = "gpt-3.5-turbo-instruct",
+        list_san: Optional[List[str]] = None,
+        cycle: bool = False,
+    ):
+        super().__init__(model_id, list_san=list_san)
+        self.list_config: List[ConfigInference] = []
+        self.iter_san = itertools.cycle(self.list_san) if cycle else None
+
+    @property
+    def calls(self) -> int:
+        """Return the number of requests sent to the provider."""
+        return len(self.list_config)
+
+    @override
+    def _inference(self, pgn_prompt: str, config: ConfigInference = ConfigInference()):
+        self.list_config.append(config)
+        output_inf, list_san = super()._inference(pgn_prompt, config)
+
+        if self.iter_san is not None:
+            list_san = [next(self.iter_san) for _ in range(config.n or 1)]
+
+        return output_inf, list_san
+
+
 def load_path_pgn(sub_folder: Literal["error", "valid"] = "valid") -> List[Path]:
     """Parametrize func, return all PGN files in the "data" directory."""
     generator = DATA_FOLDER.glob(f"{sub_folder}/**/*.pgn")
@@ -71,3 +113,185 @@ def load_path_pgn(sub_folder: Literal["error", "valid"] = "valid") -> List[Path]
 
     assert list_path_pgn, "No PGN files found in the 'data' directory."
     return list_path_pgn
+
+
+class FakeServer:
+    """
+    Local HTTP server faking OpenAI (completions) and HuggingFace (TGI) APIs.
+
+    Attributes:
+        url (str): Base URL of the server (ex: 'http://127.0.0.1:8000')
+        list_request (List[dict]): JSON body of each request received
+        list_event (List[dict]): Each event sent by a stream (one by word)
+        rate_limited (int): Number of next requests rejected with a 429 status
+    """
+
+    def __init__(self, list_san: Optional[List[str]] = None, rate_limited: int = 0):
+        if list_san is None:
+            list_san = ["e4", "e5", "Nf3", "Nc6", "Bc4", "Bc5", "Ka1"]
+
+        self.rate_limited = rate_limited
+        self.list_request = []
+        self.list_event = []
+        self._lock = threading.Lock()
+        self._iter_san = itertools.cycle(list_san)
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:
+                """Don't print the requests in the tests output."""
+
+            def do_POST(self) -> None:
+                length = int(self.headers["Content-Length"])
+                body = json.loads(self.rfile.read(length))
+
+                if server.is_rate_limited():
+                    if self.path.endswith("/completions"):
+                        error = {"error": {"message": "Rate limit reached"}}
+                    else:
+                        error = {
+                            "error": "Model is overloaded",
+                            "error_type": "overloaded",
+                        }
+
+                    content = json.dumps(error).encode()
+                    self.send_response(429)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", f"{len(content)}")
+                    self.end_headers()
+                    self.wfile.write(content)
+                    return
+
+                if body.get("stream") or body.get("parameters", {}).get("stream"):
+                    self.send_stream(server.handle_stream(self.path, body))
+                    return
+
+                status, payload = server.handle(self.path, body)
+                content = json.dumps(payload).encode()
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", f"{len(content)}")
+                self.end_headers()
+                self.wfile.write(content)
+
+            def send_stream(self, events: Iterator[dict]) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+
+                try:
+                    for event in events:
+                        self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                        self.wfile.flush()
+                        server.list_event.append(event)
+
+                    self.wfile.write(b"data: [DONE]\n\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client cancelled the stream
+                    ...
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+
+    def is_rate_limited(self) -> bool:
+        """Return True if the request must be rejected (429)."""
+        with self._lock:
+            if self.rate_limited <= 0:
+                return False
+
+            self.rate_limited -= 1
+            return True
+
+    def next_san(self) -> str:
+        """Return the next SAN generated by the server."""
+        with self._lock:
+            return next(self._iter_san)
+
+    def handle(self, path: str, body: dict):
+        """Return the status code and the JSON response of a request."""
+        with self._lock:
+            self.list_request.append(body)
+
+        if path.endswith("/completions"):
+            n = body.get("n") or 1
+            choices = [
+                {"text": self.next_san(), "index": i, "finish_reason": "length"}
+                for i in range(n)
+            ]
+            usage = {
+                "prompt_tokens": len(body["prompt"]),
+                "completion_tokens": 3 * n,
+                "total_tokens": len(body["prompt"]) + 3 * n,
+            }
+            payload = {
+                "id": "cmpl-fake",
+                "object": "text_completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": choices,
+                "usage": usage,
+            }
+            return 200, payload
+
+        details = {
+            "finish_reason": "length",
+            "generated_tokens": 3,
+            "seed": body["parameters"].get("seed"),
+            "prefill": [{"id": 0, "logprob": None, "text": body["inputs"]}],
+            "tokens": [],
+        }
+        return 200, [{"generated_text": self.next_san(), "details": details}]
+
+    def handle_stream(self, path: str, body: dict) -> Iterator[dict]:
+        """Yield the events of a streamed request (one by word of generation)."""
+        with self._lock:
+            self.list_request.append(body)
+
+        list_chunk = re.findall(r"\s*\S+", self.next_san())
+
+        for index, chunk in enumerate(list_chunk):
+            if path.endswith("/completions"):
+                choice = {"text": chunk, "index": 0, "finish_reason": None}
+                yield {
+                    "id": "cmpl-fake",
+                    "object": "text_completion",
+                    "created": 0,
+                    "model": body["model"],
+                    "choices": [choice],
+                }
+            else:
+                token = {"id": index, "logprob": 0.0, "special": False, "text": chunk}
+                yield {"index": index, "token": token}
+
+        # Usage is only sent when the stream is finished
+        if path.endswith("/completions"):
+            yield {
+                "id": "cmpl-fake",
+                "object": "text_completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [],
+                "usage": {
+                    "prompt_tokens": len(body["prompt"]),
+                    "completion_tokens": len(list_chunk),
+                    "total_tokens": len(body["prompt"]) + len(list_chunk),
+                },
+            }
+
+    def __enter__(self) -> "FakeServer":
+        thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def fake_server() -> Iterator[FakeServer]:
+    """Start a local fake LLM server for the duration of a test."""
+    with FakeServer() as server:
+        yield server
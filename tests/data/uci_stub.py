@@ -0,0 +1,91 @@
+"""Tiny UCI engine for the tests: material evaluation searched at depth 1."""
+
+import sys
+
+import chess
+
+VALUES = {
+    chess.PAWN: 100,
+    chess.KNIGHT: 300,
+    chess.BISHOP: 300,
+    chess.ROOK: 500,
+    chess.QUEEN: 900,
+    chess.KING: 0,
+}
+
+
+def evaluate(board: chess.Board) -> int:
+    """Return the material of the side to move minus the material of the opponent."""
+    score = 0
+
+    for piece in board.piece_map().values():
+        value = VALUES[piece.piece_type]
+        score += value if piece.color == board.turn else -value
+
+    return score
+
+
+def search(board: chess.Board) -> tuple:
+    """Return the best score and move at depth 1 (first move by UCI if equal)."""
+    best = None
+
+    for move in sorted(board.legal_moves, key=lambda move: move.uci()):
+        board.push(move)
+        score = -evaluate(board)
+        board.pop()
+
+        if best is None or score > best[0]:
+            best = (score, move)
+
+    return best
+
+
+def set_position(tokens: list) -> chess.Board:
+    """Return the board of a 'position' command."""
+    if tokens[1] == "startpos":
+        board = chess.Board()
+        index = 2
+    else:
+        board = chess.Board(" ".join(tokens[2:8]))
+        index = 8
+
+    if index < len(tokens) and tokens[index] == "moves":
+        for uci in tokens[index + 1 :]:
+            board.push_uci(uci)
+
+    return board
+
+
+def main() -> None:
+    """Answer the UCI commands of stdin."""
+    board = chess.Board()
+
+    for line in sys.stdin:
+        tokens = line.split()
+
+        if not tokens:
+            continue
+
+        command = tokens[0]
+
+        if command == "uci":
+            print("id name UciStub")
+            print("uciok")
+        elif command == "isready":
+            print("readyok")
+        elif command == "ucinewgame":
+            board = chess.Board()
+        elif command == "position":
+            board = set_position(tokens)
+        elif command == "go":
+            score, move = search(board)
+            print(f"info depth 1 score cp {score} pv {move.uci()}")
+            print(f"bestmove {move.uci()}")
+        elif command == "quit":
+            return
+
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
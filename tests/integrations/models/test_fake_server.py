@@ -0,0 +1,318 @@
+import asyncio
+from typing import List
+
+import chess.pgn
+import pytest
+
+from bresse.input import ConfigInference
+from bresse.models.huggingface import HuggingFaceModel
+from bresse.models.openai import OpenAIModel
+from bresse.output import Output
+from bresse.ratelimit import RateLimiter, is_rate_limited
+from bresse.telemetry import Telemetry
+from tests.conftest import FakeServer
+
+
+def test_openai_ainference(fake_server: FakeServer) -> None:
+    """Test the asynchronous inference of OpenAIModel on a local server."""
+    game = chess.pgn.Game()
+    model = OpenAIModel(
+        model_id="gpt-3.5-turbo-instruct",
+        api_key="api_key",
+        base_url=f"{fake_server.url}/v1",
+    )
+
+    output = asyncio.run(model.ainference(game, ConfigInference(n=2)))
+
+    assert isinstance(output, Output)
+    assert output.number_requests == 1
+    assert output.outputs_tokens == 6
+    assert output.most_common == "e4"
+
+
+def test_huggingface_ainference(fake_server: FakeServer) -> None:
+    """Test the asynchronous inference of HuggingFaceModel on a local server."""
+    game = chess.pgn.Game()
+    model = HuggingFaceModel(
+        model_id="mistralai/Mistral-7B-Instruct-v0.3",
+        api_key="api_key",
+        base_url=fake_server.url,
+    )
+
+    output = asyncio.run(model.ainference(game, ConfigInference(n=2)))
+
+    assert isinstance(output, Output)
+    assert output.outputs_tokens == 6
+    assert output.number_requests == 2
+    # Samples are requested concurrently (any order)
+    assert sorted(result.san for result in output.list_result) == ["e4", "e5"]
+
+
+def test_openai_aplay_games() -> None:
+    """Test many games share one event loop with the asynchronous play."""
+    games = [chess.pgn.Game() for _ in range(10)]
+
+    async def play_all(model: OpenAIModel):
+        coroutines = (model.aplay(game) for game in games)
+        return await asyncio.gather(*coroutines)
+
+    with FakeServer(list_san=["e4"]) as server:
+        model = OpenAIModel(
+            model_id="gpt-3.5-turbo-instruct",
+            api_key="api_key",
+            base_url=f"{server.url}/v1",
+        )
+        model.max_concurrency = 4
+        list_output = asyncio.run(play_all(model))
+
+    assert len(list_output) == 10
+    assert len(server.list_request) == 10
+    assert all(game.variations for game in games), "Move could not be played"
+
+
+def test_huggingface_inference_samples(fake_server: FakeServer) -> None:
+    """Test the n samples of HuggingFaceModel are all requested and counted."""
+    game = chess.pgn.Game()
+    model = HuggingFaceModel(
+        model_id="mistralai/Mistral-7B-Instruct-v0.3",
+        api_key="api_key",
+        base_url=fake_server.url,
+    )
+    model.max_samples_concurrency = 3
+
+    output = model.inference(game, ConfigInference(n=7))
+    executor = model.executor
+    model.inference(game, ConfigInference(n=2))
+
+    assert len(output.list_result) == 7
+    assert output.outputs_tokens == 3 * 7
+    assert output.number_requests == 7
+    assert len(fake_server.list_request) == 9
+    assert model.executor is executor, "Executor is not reused"
+    assert executor._max_workers == 3
+
+
+def test_openai_auto_play_stream() -> None:
+    """Test the streamed auto_play of OpenAIModel play each move of the stream."""
+    game = chess.pgn.Game()
+    text = " e4 e5 2. Nf3 Nc6 3. Bb5 a6 1-0"
+
+    with FakeServer(list_san=[text]) as server:
+        model = OpenAIModel(
+            model_id="gpt-3.5-turbo-instruct",
+            api_key="api_key",
+            base_url=f"{server.url}/v1",
+        )
+        output_inf = model.auto_play(game, ConfigInference(), stream=True)
+
+    moves = [move.uci() for move in game.mainline_moves()]
+
+    assert moves == ["e2e4", "e7e5", "g1f3", "b8c6", "f1b5", "a7a6"]
+    assert output_inf.outputs_tokens == 9, "Usage of the finished stream not used"
+
+
+def test_openai_aauto_play_stream() -> None:
+    """Test the streamed aauto_play of OpenAIModel play each move of the stream."""
+    game = chess.pgn.Game()
+
+    with FakeServer(list_san=[" e4 e5 2. Nf3 1-0"]) as server:
+        model = OpenAIModel(
+            model_id="gpt-3.5-turbo-instruct",
+            api_key="api_key",
+            base_url=f"{server.url}/v1",
+        )
+        coroutine = model.aauto_play(game, ConfigInference(), stream=True)
+        output_inf = asyncio.run(coroutine)
+
+    moves = [move.uci() for move in game.mainline_moves()]
+
+    assert moves == ["e2e4", "e7e5", "g1f3"]
+    assert output_inf.ttft is not None, "Generation is not streamed"
+    assert server.list_request[0]["stream"]
+
+
+def test_huggingface_auto_play_stream_cancel() -> None:
+    """Test the streamed auto_play of HuggingFaceModel stop at the first error."""
+    game = chess.pgn.Game()
+    text = " e4 e5 2. Ka1" + " Nf3" * 5_000
+
+    with FakeServer(list_san=[text]) as server:
+        model = HuggingFaceModel(
+            model_id="mistralai/Mistral-7B-Instruct-v0.3",
+            api_key="api_key",
+            base_url=server.url,
+        )
+        output_inf = model.auto_play(game, ConfigInference(), stream=True)
+
+    moves = [move.uci() for move in game.mainline_moves()]
+
+    assert moves == ["e2e4", "e7e5"]
+    assert output_inf.outputs_tokens < 5_000, "Stream not cancelled"
+
+
+def test_openai_rate_limiter_retry() -> None:
+    """Test the rate limiter of OpenAIModel retry the rejected requests (429)."""
+    game = chess.pgn.Game()
+
+    with FakeServer(rate_limited=2) as server:
+        model = OpenAIModel(
+            model_id="gpt-3.5-turbo-instruct",
+            api_key="api_key",
+            base_url=f"{server.url}/v1",
+        )
+        model.rate_limiter = RateLimiter(requests_per_minute=600, base_delay=0.01)
+
+        output = asyncio.run(model.ainference(game))
+
+    assert output.most_common == "e4"
+    assert len(server.list_request) == 1, "Rejected requests are handled"
+    assert model.rate_limiter.retries == 2, "Client retry the rejected requests"
+
+
+def test_huggingface_rate_limiter_error() -> None:
+    """Test HuggingFaceModel retry the rejected requests only with a rate limiter."""
+    game = chess.pgn.Game()
+
+    with FakeServer(rate_limited=2) as server:
+        model = HuggingFaceModel(
+            model_id="mistralai/Mistral-7B-Instruct-v0.3",
+            api_key="api_key",
+            base_url=server.url,
+        )
+
+        with pytest.raises(Exception) as info:
+            model.inference(game)
+
+        model.rate_limiter = RateLimiter(base_delay=0.01)
+        output = model.inference(game)
+
+    assert is_rate_limited(info.value)
+    assert output.most_common == "e4"
+    assert model.rate_limiter.retries == 1
+
+
+def test_openai_auto_play_stream_rate_limiter() -> None:
+    """Test the streamed auto_play go through the rate limiter (retry and settle)."""
+    game = chess.pgn.Game()
+
+    with FakeServer(list_san=[" e4 e5 1-0"], rate_limited=1) as server:
+        model = OpenAIModel(
+            model_id="gpt-3.5-turbo-instruct",
+            api_key="api_key",
+            base_url=f"{server.url}/v1",
+        )
+        model.rate_limiter = RateLimiter(tokens_per_minute=100_000, base_delay=0.01)
+        model.auto_play(game, ConfigInference(), stream=True)
+
+    moves = [move.uci() for move in game.mainline_moves()]
+
+    assert moves == ["e2e4", "e7e5"]
+    assert model.rate_limiter.retries == 1
+    assert model.rate_limiter._tokens.level > 90_000, "Estimation is not settled"
+
+
+def test_openai_shared_clients() -> None:
+    """Test OpenAIModel instances with the same endpoint share their clients."""
+    game = chess.pgn.Game()
+
+    async def infer_all(list_model: List[OpenAIModel]):
+        coroutines = (model.ainference(game) for model in list_model)
+        list_output = await asyncio.gather(*coroutines)
+        clients = {id(model.async_client) for model in list_model}
+        return list_output, clients
+
+    with FakeServer(list_san=["e4"]) as server:
+        list_model = [
+            OpenAIModel(
+                model_id="gpt-3.5-turbo-instruct",
+                api_key="api_key",
+                base_url=f"{server.url}/v1",
+            )
+            for _ in range(3)
+        ]
+        list_output, clients = asyncio.run(infer_all(list_model))
+
+    assert len(clients) == 1, "Asynchronous clients are not shared"
+    assert len({id(model.client) for model in list_model}) == 1
+    assert all(output.most_common == "e4" for output in list_output)
+
+
+def test_openai_auto_play_stream_ttft() -> None:
+    """Test the streamed auto_play record the time to first token."""
+    game = chess.pgn.Game()
+
+    with FakeServer(list_san=[" e4 e5 2. Nf3 Nc6"]) as server:
+        model = OpenAIModel(
+            model_id="gpt-3.5-turbo-instruct",
+            api_key="api_key",
+            base_url=f"{server.url}/v1",
+        )
+        model.telemetry = Telemetry()
+        output_inf = model.auto_play(game, ConfigInference(), stream=True)
+
+    assert 0 < output_inf.ttft <= output_inf.latency
+    assert model.telemetry.summary()["requests"] == 1
+
+
+class CharOpenAIModel(OpenAIModel):
+    """OpenAIModel tokenizing by character (no 'tiktoken' download)."""
+
+    def _encode(self, text: str) -> List[int]:
+        """Tokenize the text by character."""
+        return [ord(char) for char in text]
+
+
+def test_openai_constrained_logit_bias() -> None:
+    """Test a constrained OpenAIModel send only the tokens of the legal moves."""
+    game = chess.pgn.Game()
+
+    with FakeServer(list_san=["e4"]) as server:
+        model = CharOpenAIModel(
+            model_id="gpt-3.5-turbo-instruct",
+            api_key="api_key",
+            base_url=f"{server.url}/v1",
+        )
+        output = model.inference(game, ConfigInference(constrained=True))
+        body = server.list_request[0]
+
+    allowed = {str(ord(char)) for char in " abcdefghN34"}
+
+    assert set(body["logit_bias"]) == allowed
+    assert body["max_tokens"] == len(" Nf3")
+    assert output.most_common == "e4"
+
+
+def test_openai_constrained_illegal() -> None:
+    """Test a constrained OpenAIModel reject the illegal combinations of tokens."""
+    game = chess.pgn.Game()
+
+    # Tokens of legal moves, but the move is illegal
+    with FakeServer(list_san=["e3", "h4", "N3"]) as server:
+        model = CharOpenAIModel(
+            model_id="gpt-3.5-turbo-instruct",
+            api_key="api_key",
+            base_url=f"{server.url}/v1",
+        )
+        config = ConfigInference(n=3, constrained=True)
+        output = model.inference(game, config)
+
+    assert output.counter == {"e3": 1, "h4": 1}
+    assert output.list_result.errors == 1
+
+
+def test_huggingface_constrained_grammar() -> None:
+    """Test a constrained HuggingFaceModel send the regex of the legal moves."""
+    game = chess.pgn.Game()
+
+    with FakeServer(list_san=["e4"]) as server:
+        model = HuggingFaceModel(
+            model_id="mistralai/Mistral-7B-Instruct-v0.3",
+            api_key="api_key",
+            base_url=server.url,
+        )
+        output = model.inference(game, ConfigInference(constrained=True))
+        parameters = server.list_request[0]["parameters"]
+
+    assert parameters["grammar"]["type"] == "regex"
+    assert "Nf3" in parameters["grammar"]["value"]
+    assert output.most_common == "e4"
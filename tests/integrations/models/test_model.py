@@ -5,7 +5,9 @@ import chess.pgn
 import pytest
 from dotenv import load_dotenv
 
+from bresse.input import ConfigInference
 from bresse.models.huggingface import HuggingFaceModel
+from bresse.models.local import TransformerModel
 from bresse.models.openai import OpenAIModel
 from bresse.output import Output
 from tests.conftest import load_path_pgn
@@ -54,3 +56,52 @@ def test_huggingface_inference(path_pgn: Path) -> None:
     assert output.number_requests == 1
     # assert output.inputs_tokens == ... # Depends on the PGN
     # OutputGeneration depends on Board (and therefore PGN, test only the type)
+
+
+@pytest.mark.costly
+@pytest.mark.parametrize("path_pgn", load_path_pgn())
+def test_transformer_inference(path_pgn: Path) -> None:
+    """Test the inference method of the local model (download a tiny model)."""
+    pytest.importorskip("transformers")
+
+    with path_pgn.open() as pgn_file:
+        game = chess.pgn.read_game(pgn_file)
+
+    model = TransformerModel(model_id="sshleifer/tiny-gpt2")
+    output = model.inference(game, ConfigInference(n=3, temperature=1.0))
+    cached = model.inference(game, ConfigInference(n=3, temperature=1.0))
+
+    assert isinstance(output, Output)
+    assert output.number_requests == 1
+    assert len(output.list_result) == 3
+    assert output.cost == 0
+    assert model.prefix_cache.hits >= 1, "KV cache of the prompt is not reused"
+    assert cached.inputs_tokens == output.inputs_tokens
+
+
+@pytest.mark.costly
+def test_transformer_inference_batch() -> None:
+    """Test the local model generate many prompts in one batch."""
+    pytest.importorskip("transformers")
+
+    model = TransformerModel(model_id="sshleifer/tiny-gpt2")
+    list_prompt = ["1.", "1. e4 e5 2.", "1. d4 d5 2. c4 e6 3."]
+    list_output = model._inference_batch(list_prompt, ConfigInference(n=2))
+
+    assert len(list_output) == 3
+    assert all(len(list_san) == 2 for _, list_san in list_output)
+    assert list_output[0][0].inputs_tokens < list_output[2][0].inputs_tokens
+
+
+@pytest.mark.costly
+def test_transformer_constrained() -> None:
+    """Test the constrained local model generate only legal moves."""
+    pytest.importorskip("transformers")
+
+    game = chess.pgn.Game()
+    model = TransformerModel(model_id="sshleifer/tiny-gpt2")
+    config = ConfigInference(n=4, temperature=1.0, constrained=True)
+    output = model.inference(game, config)
+
+    assert len(output.list_result) == 4
+    assert all(result.exception is None for result in output.list_result)
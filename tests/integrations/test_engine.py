@@ -0,0 +1,229 @@
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator
+from unittest import mock
+
+import chess
+import chess.engine
+import chess.pgn
+import pytest
+
+from bresse.engine import MATE_SCORE, EnginePool, EvaluationCache
+from tests.conftest import FakeModel
+
+PATH_STUB = Path(__file__).parents[1] / "data" / "uci_stub.py"
+
+
+def single_pool() -> EnginePool:
+    """Pool of one tiny UCI engine."""
+    return EnginePool(
+        [sys.executable, f"{PATH_STUB}"], size=1, limit=chess.engine.Limit(depth=1)
+    )
+
+
+@pytest.fixture
+def pool() -> Iterator[EnginePool]:
+    """Pool of tiny UCI engines (material evaluation)."""
+    with EnginePool(
+        [sys.executable, f"{PATH_STUB}"], size=2, limit=chess.engine.Limit(depth=1)
+    ) as pool:
+        yield pool
+
+
+def test_evaluate_cache(pool: EnginePool) -> None:
+    """Test the evaluations of a position are cached."""
+    board = chess.Board()
+
+    evaluation = pool.evaluate(board)
+    cached = pool.evaluate(board)
+
+    assert evaluation.cp(chess.WHITE) == 0
+    assert evaluation.best_move == chess.Move.from_uci("a2a3")
+    assert cached is evaluation
+    assert pool.cache.hits == 1 and pool.starts == 1
+
+
+def test_evaluate_game_over(pool: EnginePool) -> None:
+    """Test the finished games are evaluated without engine."""
+    board = chess.Board()
+
+    for san in ("f3", "e5", "g4", "Qh4"):
+        board.push_san(san)
+
+    evaluation = pool.evaluate(board)
+
+    assert evaluation.cp(chess.BLACK) == MATE_SCORE
+    assert evaluation.cp(chess.WHITE) == -MATE_SCORE
+    assert pool.starts == 0
+
+
+def test_score_game(pool: EnginePool) -> None:
+    """Test the centipawn loss of each move of a game."""
+    game = chess.pgn.Game()
+    node = game
+
+    # White hang a knight
+    for san in ("Nf3", "e6", "Ng5", "Qxg5"):
+        node = node.add_variation(node.board().parse_san(san))
+
+    game_score = pool.score_game(game)
+
+    assert [move.san for move in game_score] == ["Nf3", "e6", "Ng5", "Qxg5"]
+    assert [move.cp_loss for move in game_score] == [0, 0, 300, 0]
+    assert game_score.list_move[0].best_san == "a3"
+    assert game_score.average_cp_loss(chess.WHITE) == 150
+    assert game_score.average_cp_loss() == 75
+
+
+def test_score_games_no_restart(pool: EnginePool) -> None:
+    """Test the engines are started once for many games played by a model."""
+    list_game = [chess.pgn.Game() for _ in range(3)]
+
+    for game in list_game:
+        model = FakeModel("gpt-3.5-turbo-instruct", list_san=["e4", "e5", "Nf3"])
+
+        for _ in range(3):
+            model.play(game)
+
+    for game in list_game:
+        assert len(pool.score_game(game)) == 3
+
+    # Same positions in each game, evaluated once
+    assert pool.starts <= pool.size
+    assert len(pool.cache) == 4
+
+
+def test_shared_cache() -> None:
+    """Test pools sharing a cache don't evaluate the same position twice."""
+    cache = EvaluationCache()
+    command = [sys.executable, f"{PATH_STUB}"]
+    limit = chess.engine.Limit(depth=1)
+
+    with EnginePool(command, limit=limit, cache=cache) as pool:
+        pool.evaluate(chess.Board())
+
+    with EnginePool(command, limit=limit, cache=cache) as pool:
+        pool.evaluate(chess.Board())
+
+        assert pool.starts == 0
+
+    with EnginePool(command, limit=chess.engine.Limit(depth=2), cache=cache) as pool:
+        pool.evaluate(chess.Board())
+
+        assert pool.starts == 1, "Deeper evaluation must not use the cache"
+
+
+def test_annotate(pool: EnginePool) -> None:
+    """Test the evaluation of each position is added to the comments."""
+    game = chess.pgn.Game()
+    game.add_variation(chess.Move.from_uci("e2e4"))
+
+    pool.annotate(game)
+
+    assert game.eval().white() == chess.engine.Cp(0)
+    assert "[%eval 0.00" in str(game)
+
+
+def test_annotate_positions(pool: EnginePool) -> None:
+    """Test each node is annotated with the evaluation of its own position."""
+    game = chess.pgn.Game()
+    node = game
+
+    for uci in ("e2e4", "d7d5", "e4d5"):
+        node = node.add_variation(chess.Move.from_uci(uci))
+
+    pool.annotate(game)
+    nodes = [game, *game.mainline()]
+
+    for node in nodes:
+        assert node.eval().white() == pool.evaluate(node.board()).score
+
+
+def test_engine_error_in_block() -> None:
+    """Test an engine is given back after an error of the caller (no deadlock)."""
+    with single_pool() as pool:
+        with pytest.raises(RuntimeError):
+            with pool.engine():
+                raise RuntimeError("caller error")
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            evaluation = executor.submit(pool.evaluate, chess.Board()).result(
+                timeout=30
+            )
+
+        assert evaluation.best_move is not None
+        assert pool.starts == 1, "Healthy engine not reused"
+
+
+def test_engine_failed_replaced() -> None:
+    """Test a waiting thread start a new engine when the borrowed one fail."""
+    with single_pool() as pool, ThreadPoolExecutor(max_workers=1) as executor:
+        with pytest.raises(chess.engine.EngineError):
+            with pool.engine() as engine:
+                future = executor.submit(pool.evaluate, chess.Board())
+                raise chess.engine.EngineError("engine error")
+
+        assert future.result(timeout=30).best_move is not None
+        assert (
+            engine.transport.get_returncode() is not None
+        ), "Failed engine not stopped"
+        assert pool.starts == 2, "Failed engine not replaced"
+
+
+def test_start_outside_lock() -> None:
+    """Test the pool is not locked while an engine process is started."""
+    started, resume = threading.Event(), threading.Event()
+
+    with single_pool() as pool, ThreadPoolExecutor(max_workers=1) as executor:
+        start = pool._start
+
+        def slow_start() -> chess.engine.SimpleEngine:
+            started.set()
+            resume.wait(30)
+            return start()
+
+        with mock.patch.object(pool, "_start", side_effect=slow_start):
+            future = executor.submit(pool.evaluate, chess.Board())
+            started.wait(30)
+
+            locked = pool._condition.acquire(timeout=5)
+
+            if locked:
+                pool._condition.release()
+
+            resume.set()
+
+        assert future.result(timeout=30).best_move is not None
+        assert locked, "Pool is locked during the startup"
+        assert pool.starts == 1
+
+
+def test_start_error() -> None:
+    """Test a failed startup free its slot in the pool."""
+    with single_pool() as pool:
+        error = OSError("engine not found")
+
+        with mock.patch.object(pool, "_start", side_effect=error):
+            with pytest.raises(OSError):
+                pool.evaluate(chess.Board())
+
+        assert pool.evaluate(chess.Board()).best_move is not None
+        assert pool.starts == 1
+
+
+def test_close_wake_waiting() -> None:
+    """Test the threads waiting for an engine are woken up by close."""
+    pool = single_pool()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        with pool.engine():
+            future = executor.submit(pool.evaluate, chess.Board())
+            pool.close()
+
+        assert future.result(timeout=30).best_move is not None
+
+    pool.close()
+
+    assert pool.starts == 2
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+from typing import List
+from unittest import mock
+
+import chess.pgn
+import pytest
+
+from bresse.batching import MicroBatcher
+from bresse.input import ConfigInference
+from tests.conftest import FakeModel
+
+
+class BatchFakeModel(FakeModel):
+    """Fake model recording the size of each batch."""
+
+    def __init__(self):
+        super().__init__("gpt-3.5-turbo-instruct", list_san=["e4"])
+        self.list_batch_size: List[int] = []
+
+    def _inference_batch(self, list_prompt, config=ConfigInference()):
+        """Record the size of the batch, then infer each prompt."""
+        self.list_batch_size.append(len(list_prompt))
+
+        if "error" in list_prompt:
+            raise RuntimeError("Batch failed")
+
+        if "missing" in list_prompt:
+            return super()._inference_batch(list_prompt[1:], config)
+
+        return super()._inference_batch(list_prompt, config)
+
+
+def test_batcher_async_callers():
+    """Test MicroBatcher infer the prompts of concurrent tasks in batches."""
+    model = BatchFakeModel()
+    model.batcher = MicroBatcher(model, max_batch_size=4, max_wait=0.5)
+    games = [chess.pgn.Game() for _ in range(8)]
+
+    async def infer_all():
+        return await asyncio.gather(*(model.ainference(game) for game in games))
+
+    list_output = asyncio.run(infer_all())
+    model.batcher.close()
+
+    assert all(output.most_common == "e4" for output in list_output)
+    assert model.list_batch_size == [4, 4], "Prompts are not batched"
+    assert model.batcher.requests == 8
+
+
+def test_batcher_thread_callers():
+    """Test MicroBatcher scatter the results back to each thread."""
+    model = BatchFakeModel()
+    model.batcher = MicroBatcher(model, max_batch_size=16, max_wait=0.2)
+    list_output = [None] * 6
+
+    def infer(index: int):
+        game = chess.pgn.Game()
+        game.headers["Round"] = f"{index}"
+        list_output[index] = model.inference(game)
+
+    threads = [threading.Thread(target=infer, args=(i,)) for i in range(6)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    model.batcher.close()
+
+    assert sum(model.list_batch_size) == 6 and len(model.list_batch_size) < 6
+    assert all(output.most_common == "e4" for output in list_output)
+
+
+def test_batcher_group_by_config():
+    """Test MicroBatcher only batch the prompts with the same configuration."""
+    model = BatchFakeModel()
+    batcher = MicroBatcher(model, max_batch_size=8, max_wait=0.2)
+
+    futures = [batcher.submit("1.", ConfigInference(n=n)) for n in (1, 2, 1, 2)]
+    results = [future.result() for future in futures]
+    batcher.close()
+
+    assert sorted(model.list_batch_size) == [2, 2]
+    assert len(results) == 4 and batcher.batches == 2
+
+
+def test_batcher_error():
+    """Test MicroBatcher raise the error of the batch to each caller."""
+    model = BatchFakeModel()
+    batcher = MicroBatcher(model, max_batch_size=2, max_wait=0.2)
+
+    futures = [batcher.submit(prompt, ConfigInference()) for prompt in ("1.", "error")]
+
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result()
+
+    batcher.close()
+
+
+def test_batcher_wrong_number_results():
+    """Test MicroBatcher raise an error if the batch don't return a result by prompt."""
+    model = BatchFakeModel()
+    batcher = MicroBatcher(model, max_batch_size=2, max_wait=0.2)
+
+    futures = [
+        batcher.submit(prompt, ConfigInference()) for prompt in ("1.", "missing")
+    ]
+
+    for future in futures:
+        with pytest.raises(ValueError, match="returned 1 results"):
+            future.result(timeout=5)
+
+    batcher.close()
+
+
+def test_batcher_dispatch_error():
+    """Test MicroBatcher raise an error outside the inference to each caller."""
+    model = BatchFakeModel()
+    batcher = MicroBatcher(model, max_batch_size=2, max_wait=0.2)
+    error = TypeError("unserializable config")
+
+    with mock.patch("bresse.batching._config_key", side_effect=error):
+        futures = [batcher.submit("1.", ConfigInference()) for _ in range(2)]
+
+        for future in futures:
+            with pytest.raises(TypeError):
+                future.result(timeout=5)
+
+    # Dispatcher thread is still alive
+    assert batcher.infer("1.", ConfigInference())[1] == ["e4"]
+    batcher.close()
@@ -0,0 +1,81 @@
+from pathlib import Path
+
+import chess.pgn
+import pytest
+
+from bresse.cache import LRUCache, SQLiteCache, make_key
+from bresse.input import ConfigInference
+from tests.conftest import FakeModelCount, FakeModelId
+
+
+def test_make_key():
+    """Test make_key depends on the model, prompt and configuration."""
+    model_id = FakeModelId()
+    key = make_key(model_id, "1.", ConfigInference())
+
+    assert key == make_key(model_id, "1.", ConfigInference())
+    assert key != make_key(model_id, "1. e4", ConfigInference())
+    assert key != make_key(model_id, "1.", ConfigInference(n=2))
+
+
+def test_lru_cache_eviction():
+    """Test LRUCache evict the least recently used entry."""
+    cache = LRUCache(max_size=2)
+
+    cache.set("a", {"value": 1})
+    cache.set("b", {"value": 2})
+    cache.get("a")
+    cache.set("c", {"value": 3})
+
+    assert len(cache) == 2
+    assert cache.get("b") is None, "Least recently used entry not evicted"
+    assert cache.get("a") == {"value": 1}
+
+
+@pytest.mark.parametrize("cache_type", ["lru", "sqlite"])
+def test_cache_ttl(cache_type, tmp_path: Path, monkeypatch):
+    """Test the caches don't return expired entries."""
+    if cache_type == "lru":
+        cache = LRUCache(ttl=10)
+    else:
+        cache = SQLiteCache(tmp_path / "cache.db", ttl=10)
+
+    monkeypatch.setattr("bresse.cache.time.time", lambda: 0.0)
+    cache.set("a", {"value": 1})
+    assert cache.get("a") == {"value": 1}
+
+    monkeypatch.setattr("bresse.cache.time.time", lambda: 10.0)
+    assert cache.get("a") is None, "Expired entry returned"
+    assert len(cache) == 0
+
+
+def test_sqlite_cache_persistence(tmp_path: Path):
+    """Test SQLiteCache keep the entries between instances and evict the oldest."""
+    path = tmp_path / "cache.db"
+
+    cache = SQLiteCache(path, max_size=2)
+    cache.set("a", {"list_san": ["e4"]})
+    cache.set("b", {"list_san": ["d4"]})
+    cache.set("c", {"list_san": ["c4"]})
+    cache.close()
+
+    cache = SQLiteCache(path, max_size=2)
+
+    assert len(cache) == 2
+    assert cache.get("a") is None, "Least recently used entry not evicted"
+    assert cache.get("c") == {"list_san": ["c4"]}
+
+
+def test_model_cache():
+    """Test the model don't call '_inference' when the prompt is cached."""
+    game = chess.pgn.Game()
+    model = FakeModelCount(model_id="gpt-3.5-turbo-instruct")
+    model.cache = LRUCache()
+
+    output_1 = model.inference(game)
+    output_2 = model.inference(game)
+
+    assert model.calls == 1, "Inference not cached"
+    assert (model.cache_hits, model.cache_misses) == (1, 1)
+    assert output_1.counter == output_2.counter
+    assert output_1.inputs_tokens == output_2.inputs_tokens
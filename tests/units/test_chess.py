@@ -1,10 +1,17 @@
+from io import StringIO
 from pathlib import Path
 
 import chess.pgn
 import pytest
 
-from bresse import game_play_san, generate_pgn, get_child_node, pgn_to_board
-from bresse.chess_ import generate_opening
+from bresse import (
+    game_play_san,
+    generate_pgn,
+    get_child_node,
+    get_session,
+    pgn_to_board,
+)
+from bresse.chess_ import OpeningBook, generate_opening
 from tests.conftest import load_path_pgn
 
 POLYGLOT_PATH = Path(__file__).parents[1] / "data" / "gm2600.bin"
@@ -48,6 +55,66 @@ def test_game_play_san():
     ), "Second move not found"
 
 
+def test_game_play_san_illegal():
+    """Test game_play_san function raise ValueError on illegal move."""
+    game = chess.pgn.Game()
+
+    with pytest.raises(ValueError):
+        game_play_san(game, "e5")
+
+    assert not game.variations, "Illegal move added to the game"
+
+
+@pytest.mark.parametrize("path_pgn", load_path_pgn())
+def test_get_session_board(path_pgn):
+    """Test get_session function keep the board in step with the game."""
+    pgn = path_pgn.read_text()
+    game = chess.pgn.read_game(StringIO(pgn))
+
+    session = get_session(game)
+    game_play_san(game, session.board.san(next(iter(session.board.legal_moves))))
+
+    assert session is get_session(game), "Session not reused for the same game"
+    assert session.node is game.end(), "Session node is not the last node"
+    assert session.board == pgn_to_board(f"{game}"), "Session board out of step"
+
+
+def test_get_session_sync():
+    """Test get_session function catch up moves added outside the session."""
+    game = chess.pgn.Game()
+    session = get_session(game)
+
+    game.add_variation(chess.Move.from_uci("e2e4"))
+    game_play_san(game, "e5")
+
+    assert session.board.fen() == pgn_to_board(f"{game}").fen(), "Move not caught up"
+
+
+def test_get_session_side_variation():
+    """Test get_session function follow the mainline, not the last variation."""
+    game = chess.pgn.read_game(StringIO("1. e4 e5 (1... c5 2. Nf3) 2. Nf3 Nc6 *"))
+    session = get_session(game)
+
+    assert session.board.turn == chess.WHITE, "Session board not on the mainline"
+    assert session.board == pgn_to_board(f"{game}"), "Session board out of step"
+
+    game_play_san(game, "Bb5")
+
+    assert game.end().san() == "Bb5", "Move not played at the end of the mainline"
+    assert session.board == game.end().board(), "Session board out of step"
+
+
+def test_get_session_promote_variation():
+    """Test get_session function rebuild the session if the mainline change."""
+    game = chess.pgn.read_game(StringIO("1. e4 e5 (1... c5 2. Nf3) *"))
+    session = get_session(game)
+
+    game.next().promote_to_main(game.next().variations[1].move)
+
+    assert get_session(game) is not session, "Stale session reused"
+    assert get_session(game).board == game.end().board(), "Session board out of step"
+
+
 def test_generate_pgn():
     """Test generate_pgn function success to generate a PGN."""
     game = generate_pgn(
@@ -97,3 +164,18 @@ def test_generate_opening():
     game = generate_opening(POLYGLOT_PATH, seed=42)
 
     assert isinstance(game, chess.pgn.Game), "Opening game not generated"
+
+
+def test_opening_book_generate_openings():
+    """Test OpeningBook generate reproducible and unique openings."""
+    with OpeningBook(POLYGLOT_PATH) as book:
+        openings = list(book.generate_openings(20, max_depth=4, seed=42, unique=True))
+        openings_2 = list(book.generate_openings(20, max_depth=4, seed=42, unique=True))
+
+    list_moves = [tuple(game.mainline_moves()) for game in openings]
+    list_moves_2 = [tuple(game.mainline_moves()) for game in openings_2]
+
+    assert len(openings) == 20, "Number of openings is not correct"
+    assert len(set(list_moves)) == 20, "Openings are not unique"
+    assert list_moves == list_moves_2, "Openings are not reproducible"
+    assert all(len(moves) == 4 for moves in list_moves)
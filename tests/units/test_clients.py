@@ -0,0 +1,147 @@
+import asyncio
+
+import huggingface_hub
+from openai import OpenAI
+
+from bresse.clients import (
+    ClientRegistry,
+    HTTPConfig,
+    get_async_openai_client,
+    get_huggingface_client,
+    get_openai_client,
+    get_registry,
+)
+from bresse.models.openai import OpenAIModel
+from bresse.ratelimit import RateLimiter
+
+
+def test_registry_shared_clients():
+    """Test the clients are shared by key and use the same transport."""
+    client = get_openai_client("key_a", "http://127.0.0.1:1/v1")
+
+    assert get_openai_client("key_a", "http://127.0.0.1:1/v1") is client
+    assert get_openai_client("key_b", "http://127.0.0.1:1/v1") is not client
+    assert get_openai_client("key_a", "http://127.0.0.1:2/v1") is not client
+
+    other = get_openai_client("key_b", "http://127.0.0.1:1/v1")
+    assert client._client is other._client, "Transport is not shared"
+
+
+def test_registry_no_retries():
+    """Test the clients of the rate limited models don't retry the requests."""
+    model = OpenAIModel("gpt-3.5-turbo-instruct", api_key="key_a")
+
+    assert model.client.max_retries == get_registry().config.max_retries
+
+    model.rate_limiter = RateLimiter()
+
+    assert model.client.max_retries == 0
+    assert model.client is get_openai_client("key_a", retries=False)
+
+
+def test_registry_provider_key():
+    """Test clients of different providers with the same key are not mixed."""
+    client = get_huggingface_client("key_a", "http://127.0.0.1:1")
+
+    assert client is not get_openai_client("key_a", "http://127.0.0.1:1")
+    assert client is get_huggingface_client("key_a", "http://127.0.0.1:1")
+
+
+def test_registry_async_by_event_loop():
+    """Test asynchronous clients are shared in a loop, not across loops."""
+
+    async def get_clients():
+        client = get_async_openai_client("key_a")
+        return client, get_async_openai_client("key_a")
+
+    first, same = asyncio.run(get_clients())
+    second, _ = asyncio.run(get_clients())
+
+    assert first is same
+    assert first is not second, "Client is bound to a closed event loop"
+
+
+def test_registry_config():
+    """Test the transport is created with the configuration of the pool."""
+    config = HTTPConfig(max_connections=4, max_keepalive_connections=2, timeout=3.0)
+    registry = ClientRegistry(config)
+    factory_calls = []
+
+    client = registry.get(("test", None, "key"), lambda: factory_calls.append(1))
+    registry.get(("test", None, "key"), lambda: factory_calls.append(1))
+
+    pool = registry.http_client._transport._pool
+
+    assert client is None and len(factory_calls) == 1
+    assert pool._max_connections == 4 and pool._max_keepalive_connections == 2
+    assert registry.http_client.timeout.read == 3.0
+
+    registry.close()
+    assert registry._http_client is None
+
+
+def test_registry_huggingface_session():
+    """Test the sessions of 'huggingface_hub' use the pool of the registry."""
+    registry = ClientRegistry(HTTPConfig(max_connections=4))
+    registry.get(("huggingface", None, "key"), registry.configure_huggingface)
+
+    session = huggingface_hub.get_session()
+    adapter = session.get_adapter("http://127.0.0.1:1")
+
+    assert huggingface_hub.get_session() is session, "Session is not reused by thread"
+    assert adapter._pool_maxsize == 4
+
+    registry.close()
+    assert huggingface_hub.get_session() is not session
+
+
+def test_registry_aclose():
+    """Test the asynchronous transport of the event loop is closed and replaced."""
+
+    async def close_clients():
+        client = get_async_openai_client("key_a")
+        await get_registry().aclose()
+
+        return client, get_async_openai_client("key_a")
+
+    client, new_client = asyncio.run(close_clients())
+
+    assert client._client.is_closed, "Transport is not closed"
+    assert new_client is not client and not new_client._client.is_closed
+
+
+def test_registry_release():
+    """Test the asynchronous transport is closed once no model hold it."""
+    model = OpenAIModel("gpt-3.5-turbo-instruct", api_key="key_a")
+    other = OpenAIModel("gpt-3.5-turbo-instruct", api_key="key_b")
+
+    async def close_models():
+        async with model:
+            async with other:
+                client = other.async_client
+
+            # Model still use the transport
+            assert not client._client.is_closed
+
+        return client
+
+    assert asyncio.run(close_models())._client.is_closed
+
+
+def test_model_client_setter():
+    """Test a client set on the model is used instead of the shared client."""
+    model = OpenAIModel("gpt-3.5-turbo-instruct", api_key="key_a")
+    shared = model.client
+    client = OpenAI(api_key="key_b")
+
+    model.client = client
+    assert model.client is client
+
+    model.client = None
+    assert model.client is shared
+
+    async def close_model():
+        async with model:
+            return model.async_client
+
+    assert asyncio.run(close_model())._client.is_closed
@@ -0,0 +1,103 @@
+import re
+
+import chess
+import chess.pgn
+import pytest
+
+from bresse.constrained import (
+    MAX_LOGIT_BIAS,
+    TokenTrie,
+    generation_regex,
+    legal_generations,
+)
+from bresse.input import ConfigInference
+from tests.conftest import FakeModel
+
+
+def encode(text: str):
+    """Tokenize the text by character."""
+    return [ord(char) for char in text]
+
+
+def test_legal_generations():
+    """Test legal_generations return the SAN of each legal move."""
+    list_san = legal_generations(chess.Board())
+
+    assert len(list_san) == 20
+    assert "e4" in list_san and "Nf3" in list_san
+
+
+def test_token_trie_allowed():
+    """Test TokenTrie return the next tokens of the generations."""
+    trie = TokenTrie.from_generations(["e4", "e3", "Nf3"], encode)
+
+    assert sorted(trie.allowed([])) == [ord(" ")]
+    assert sorted(trie.allowed(encode(" e"))) == [ord("3"), ord("4")]
+    assert trie.allowed(encode(" d")) == []
+    assert trie.allowed(encode(" e4")) == []
+    assert trie.depth == 4
+
+
+def test_token_trie_complete():
+    """Test TokenTrie detect the complete generations (prefix of another one)."""
+    trie = TokenTrie([[1, 2], [1, 2, 3]])
+
+    assert trie.is_complete([1, 2])
+    assert trie.is_complete([1, 2, 3])
+    assert not trie.is_complete([1])
+    assert not trie.is_complete([4])
+
+
+def test_token_trie_next_tokens():
+    """Test TokenTrie allow to end a move who is the prefix of another move."""
+    board = chess.Board("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+    list_san = legal_generations(board)
+    trie = TokenTrie.from_generations(list_san, encode)
+    eos_token_id = 0
+
+    assert "O-O" in list_san and "O-O-O" in list_san
+    assert sorted(trie.next_tokens(encode(" O-O"), eos_token_id)) == [0, ord("-")]
+    assert trie.next_tokens(encode(" O-O-O"), eos_token_id) == [eos_token_id]
+    assert trie.next_tokens(encode(" O-"), eos_token_id) == [ord("O")]
+    assert trie.next_tokens(encode(" Z"), eos_token_id) == [eos_token_id]
+
+
+def test_token_trie_logit_bias():
+    """Test TokenTrie give a bias to the tokens of the generations only."""
+    trie = TokenTrie.from_generations(["e4", "d4"], encode)
+    logit_bias = trie.logit_bias()
+
+    assert logit_bias == {str(ord(char)): 100 for char in " de4"}
+
+
+def test_token_trie_logit_bias_too_many():
+    """Test TokenTrie don't constrain the generation above the API limit."""
+    trie = TokenTrie([[token] for token in range(MAX_LOGIT_BIAS + 1)])
+
+    with pytest.warns(UserWarning, match="Too many tokens"):
+        assert trie.logit_bias() == {}
+
+
+def test_generation_regex():
+    """Test generation_regex match only the generations."""
+    regex = generation_regex(["e4", "Nf3", "O-O", "exd8=Q+"])
+
+    assert re.fullmatch(regex, " Nf3")
+    assert re.fullmatch(regex, " exd8=Q+")
+    assert re.fullmatch(regex, " O-O")
+    assert not re.fullmatch(regex, " e5")
+    assert not re.fullmatch(regex, " exd8=QQ")
+
+
+def test_model_constrain():
+    """Test the model fill the legal moves only if the inference is constrained."""
+    model = FakeModel("gpt-3.5-turbo-instruct")
+    board = chess.Board()
+    config = ConfigInference()
+
+    assert model._constrain(config, board) is config
+
+    constrained = model._constrain(ConfigInference(constrained=True), board)
+
+    assert constrained.allowed_san == legal_generations(board)
+    assert config.allowed_san is None
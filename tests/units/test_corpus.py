@@ -0,0 +1,74 @@
+from pathlib import Path
+
+import chess.pgn
+import pytest
+
+from bresse.corpus import PGNCorpus
+from bresse.process import preprocess_game
+from tests.conftest import load_path_pgn
+
+
+@pytest.fixture
+def path_corpus(tmp_path: Path) -> Path:
+    """Create a corpus with all PGN files of the 'data' directory (twice)."""
+    list_path = load_path_pgn("valid") + load_path_pgn("error")
+    text = "\n".join(path.read_text() for path in list_path * 2)
+
+    path = tmp_path / "corpus.pgn"
+    path.write_text(text)
+
+    return path
+
+
+def test_corpus_offsets(path_corpus: Path):
+    """Test PGNCorpus find the offset of each game."""
+    corpus = PGNCorpus(path_corpus)
+    offsets = list(corpus.offsets())
+    games = [corpus.read_game(offset) for offset in offsets]
+
+    assert len(offsets) == 8, "Number of games is not correct"
+    assert all(game.headers["White"] == "Carlsen, M." for game in games)
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_corpus_iter(path_corpus: Path, workers: int):
+    """Test PGNCorpus yield the game, board and prompt of each valid game."""
+    corpus = PGNCorpus(path_corpus, workers=workers, batch_size=1, max_pending=2)
+    list_item = list(corpus)
+
+    assert len(list_item) == 4 and corpus.errors == 4, "Errors are not skipped"
+
+    for game, board, prompt in list_item:
+        assert isinstance(game, chess.pgn.Game)
+        assert board == game.end().board(), "Board is not at the end of game"
+        assert prompt == preprocess_game(game), "Prompt is not correct"
+
+
+def test_corpus_zst(path_corpus: Path):
+    """Test PGNCorpus read a corpus compressed with zstandard."""
+    zstandard = pytest.importorskip("zstandard")
+
+    path_zst = path_corpus.with_suffix(".pgn.zst")
+    compressed = zstandard.ZstdCompressor().compress(path_corpus.read_bytes())
+    path_zst.write_bytes(compressed)
+
+    corpus = PGNCorpus(path_zst, workers=0)
+
+    assert list(corpus.offsets()) == list(PGNCorpus(path_corpus).offsets())
+    assert len(list(corpus)) == 4
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_corpus_side_variation(tmp_path: Path, workers: int):
+    """Test PGNCorpus build the prompt from the mainline (without variations)."""
+    path = tmp_path / "corpus.pgn"
+    path.write_text(
+        '[White "A"]\n[Black "B"]\n\n1. e4 { best } e5 (1... c5) 2. Nf3 $1 *\n'
+    )
+
+    corpus = PGNCorpus(path, workers=workers)
+    ((game, _, prompt),) = list(corpus)
+
+    assert prompt == preprocess_game(game), "Prompt is not the game yielded"
+    assert "c5" not in prompt, "Side variation is in the prompt"
+    assert "{ best }" in prompt and "$1" in prompt, "Annotations are removed"
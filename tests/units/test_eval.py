@@ -0,0 +1,143 @@
+import asyncio
+import threading
+from pathlib import Path
+from unittest import mock
+
+import chess
+import pytest
+
+from bresse.corpus import PGNCorpus
+from bresse.eval import Evaluation, benchmark_strategies, sample_positions
+from bresse.prompt import FullPrompt, LastMoves
+from tests.conftest import FakeModel, load_path_pgn
+
+
+@pytest.fixture
+def corpus(tmp_path: Path) -> PGNCorpus:
+    """Create a corpus with the valid PGN files of the 'data' directory."""
+    text = "\n".join(path.read_text() for path in load_path_pgn("valid"))
+
+    path = tmp_path / "corpus.pgn"
+    path.write_text(text)
+
+    return PGNCorpus(path, workers=0)
+
+
+def test_sample_positions(corpus: PGNCorpus):
+    """Test sample_positions is reproducible and keep the move played."""
+    list_position = list(sample_positions(corpus, positions_per_game=3, seed=42))
+    list_id = [position.id for position in sample_positions(corpus, 3, seed=42)]
+
+    assert [position.id for position in list_position] == list_id
+    assert len(list_position) == 3 * len(load_path_pgn("valid"))
+
+    for position in list_position:
+        board = position.game.end().board()
+
+        assert position.game.headers["Result"] == "*", "Result is leaked"
+        assert board.parse_san(position.expected) in board.legal_moves
+
+
+def test_evaluation_scores(corpus: PGNCorpus):
+    """Test Evaluation score the most common move against the move played."""
+    model = FakeModel("gpt-3.5-turbo-instruct", list_san=["e4"])
+    positions = list(sample_positions(corpus, positions_per_game=5, seed=0))
+
+    report = Evaluation(model, iter(positions), workers=4).run()
+    correct = sum(position.expected == "e4" for position in positions)
+    illegal = 0
+
+    for position in positions:
+        board = position.game.end().board()
+
+        try:
+            board.parse_san("e4")
+        except chess.IllegalMoveError:
+            illegal += 1
+
+    assert report.positions == len(positions)
+    assert report.accuracy == correct / len(positions)
+    assert report.illegal_rate == illegal / len(positions)
+
+
+def test_evaluation_resume(corpus: PGNCorpus, tmp_path: Path):
+    """Test Evaluation resume from the checkpoint without inferring again."""
+    path_checkpoint = tmp_path / "checkpoint.jsonl"
+    model = FakeModel("gpt-3.5-turbo-instruct")
+    positions = list(sample_positions(corpus, positions_per_game=4, seed=1))
+
+    Evaluation(model, iter(positions[:3]), path_checkpoint=path_checkpoint).run()
+
+    with mock.patch.object(model, "_inference", wraps=model._inference) as spy:
+        evaluation = Evaluation(model, iter(positions), path_checkpoint=path_checkpoint)
+        report = evaluation.run()
+
+    lines = path_checkpoint.read_text().splitlines()
+    ids = sorted(score.id for score in report.scores)
+
+    assert spy.call_count == len(positions) - 3, "Positions are inferred twice"
+    assert len(lines) == len(positions)
+    assert ids == sorted(position.id for position in positions)
+
+
+def test_benchmark_strategies(corpus: PGNCorpus):
+    """Test benchmark_strategies report the tokens and accuracy by strategy."""
+    model = FakeModel("gpt-3.5-turbo-instruct", list_san=["e4"])
+    positions = sample_positions(corpus, positions_per_game=2, min_ply=20, seed=1)
+    strategies = [FullPrompt(), LastMoves(k=8)]
+
+    reports = benchmark_strategies(model, positions, strategies, workers=2)
+
+    full, last = reports["FullPrompt()"], reports["LastMoves(k=8)"]
+
+    assert full.positions == last.positions > 0
+    assert last.avg_inputs_tokens < full.avg_inputs_tokens
+    assert last.accuracy == full.accuracy
+    assert model.prompt_strategy is None, "Strategy of the model is not restored"
+
+
+def test_evaluation_model_error(corpus: PGNCorpus, tmp_path: Path):
+    """Test Evaluation record the failed positions and don't block."""
+    path_checkpoint = tmp_path / "checkpoint.jsonl"
+    model = FakeModel("gpt-3.5-turbo-instruct", list_san=["e4"])
+    positions = list(sample_positions(corpus, positions_per_game=5, seed=0))
+    error = RuntimeError("provider error")
+
+    # More positions than the queue and the workers (producer must not block)
+    assert len(positions) > 3 * 2
+
+    with mock.patch.object(model, "_inference", side_effect=error):
+        evaluation = Evaluation(
+            model, iter(positions), workers=2, path_checkpoint=path_checkpoint
+        )
+        report = evaluation.run()
+
+    assert report.positions == len(positions)
+    assert report.errors == len(positions)
+    assert report.accuracy == 0.0
+    assert report.scores[0].error == "RuntimeError: provider error"
+    assert path_checkpoint.read_text() == "", "Failed positions are checkpointed"
+
+
+def test_evaluation_sampling_non_blocking(corpus: PGNCorpus):
+    """Test Evaluation sample the positions without blocking the event loop."""
+    model = FakeModel("gpt-3.5-turbo-instruct", list_san=["e4"])
+    positions = list(sample_positions(corpus, positions_per_game=2, seed=0))
+    event = threading.Event()
+
+    def slow_positions():
+        # Set by the event loop, never set if sampling block the loop
+        assert event.wait(timeout=5), "Event loop is blocked by the sampling"
+        yield from positions
+
+    async def main():
+        evaluation = Evaluation(model, slow_positions(), workers=2)
+        task = asyncio.create_task(evaluation.arun())
+
+        await asyncio.sleep(0.01)
+        event.set()
+
+        return await task
+
+    report = asyncio.run(main())
+    assert report.positions == len(positions)
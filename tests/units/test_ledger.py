@@ -0,0 +1,69 @@
+import chess.pgn
+import pytest
+
+from bresse.cache import LRUCache
+from bresse.ledger import Ledger, get_ledger
+from bresse.output import OutputInference
+from bresse.telemetry import Telemetry
+from tests.conftest import FakeModel, FakeModelId
+
+
+def test_ledger_totals():
+    """Test Ledger accumulate the inferences by model."""
+    ledger = Ledger()
+    other_id = FakeModelId(id="other")
+
+    for model_id in [FakeModelId(), FakeModelId(), other_id]:
+        ledger.add(OutputInference(model_id, 1, inputs_tokens=10, outputs_tokens=1))
+
+    assert len(ledger) == 2
+    assert ledger["gpt-3.5-turbo-instruct"].number_requests == 2
+    assert ledger["other"].inputs_tokens == 10
+    assert ledger.number_requests == 3 and ledger.outputs_tokens == 3
+    assert ledger.cost == pytest.approx(sum(total.cost for total in ledger))
+
+
+def test_ledger_game():
+    """Test Model.play add its inferences to the ledger of the game."""
+    game = chess.pgn.Game()
+    model = FakeModel("gpt-3.5-turbo-instruct", list_san=["e4", "e5", "Nf3"])
+    session = Ledger()
+
+    list_output = [model.play(game) for _ in range(3)]
+    session.update(get_ledger(game))
+    total = get_ledger(game)["gpt-3.5-turbo-instruct"]
+
+    assert total.number_requests == 3
+    assert total.inputs_tokens == sum(output.inputs_tokens for output in list_output)
+    assert session.cost == pytest.approx(sum(list_output).cost)
+    assert get_ledger(chess.pgn.Game()).number_requests == 0
+
+
+def test_ledger_cached():
+    """Test the cached inferences have no cost in the ledger (same as the telemetry)."""
+    model = FakeModel("gpt-3.5-turbo-instruct", list_san=["e4", "e5", "Nf3"])
+    model.cache = LRUCache()
+    model.telemetry = Telemetry()
+    list_game = [chess.pgn.Game(), chess.pgn.Game()]
+    session = Ledger()
+
+    for game in list_game:
+        for _ in range(3):
+            model.play(game)
+
+        session.update(get_ledger(game))
+
+    assert get_ledger(list_game[1]).number_requests == 0
+    assert get_ledger(list_game[1]).cost == 0
+    assert get_ledger(list_game[1]).cache_hits == 3
+    assert (
+        session.number_requests
+        == model.telemetry.models["gpt-3.5-turbo-instruct"].requests
+        == 3
+    )
+    assert session.cost == pytest.approx(model.telemetry.cost)
+    assert (
+        session.cache_hits
+        == model.telemetry.models["gpt-3.5-turbo-instruct"].cache_hits
+        == 3
+    )
@@ -0,0 +1,182 @@
+import string
+from pathlib import Path
+
+import pytest
+
+from bresse.identifiers.base import ModelId
+from bresse.input import ConfigInference
+from bresse.models.local import (
+    PrefixCache,
+    TransformerModel,
+    copy_cache,
+    generation_kwargs,
+    split_generations,
+)
+
+model_id = ModelId(
+    id="sshleifer/tiny-gpt2", input_cost_million=0, output_cost_million=0
+)
+
+
+def test_prefix_cache_longest_prefix():
+    """Test PrefixCache return the longest cached prefix of the token ids."""
+    cache = PrefixCache(max_size=4)
+    cache.set([1, 2], "short")
+    cache.set([1, 2, 3, 4], "long")
+    cache.set([5, 6], "other")
+
+    assert cache.get([1, 2, 3, 4, 5]) == (4, "long")
+    assert cache.get([1, 2, 3]) == (2, "short")
+    assert cache.get([7]) == (0, None)
+    assert cache.hits == 2 and cache.misses == 1
+
+
+def test_prefix_cache_eviction():
+    """Test PrefixCache evict the least recently used prompts."""
+    cache = PrefixCache(max_size=2)
+    cache.set([1], "a")
+    cache.set([2], "b")
+    cache.get([1, 0])
+    cache.set([3], "c")
+
+    assert len(cache) == 2
+    assert cache.get([2, 0]) == (0, None), "Least recently used is not evicted"
+    assert cache.get([1, 0]) == (1, "a")
+
+
+def test_prefix_cache_take():
+    """Test PrefixCache remove a shorter prefix taken (extended by the caller)."""
+    cache = PrefixCache()
+    cache.set([1, 2], "short")
+
+    assert cache.take([1, 2]) == (2, "short")
+    assert len(cache) == 1, "Exact prefix is removed"
+
+    assert cache.take([1, 2, 3]) == (2, "short")
+    assert len(cache) == 0, "Shorter prefix is not removed"
+    assert cache.take([1, 2, 3]) == (0, None)
+
+
+def test_generation_kwargs():
+    """Test generation_kwargs only return many sequences when sampling."""
+    greedy = generation_kwargs(ConfigInference(n=3, temperature=0.0), pad_token_id=0)
+    sampling = generation_kwargs(ConfigInference(n=3, temperature=0.7), pad_token_id=0)
+
+    assert greedy["num_return_sequences"] == 1 and not greedy["do_sample"]
+    assert "temperature" not in greedy
+    assert sampling["num_return_sequences"] == 3 and sampling["do_sample"]
+    assert sampling["temperature"] == 0.7 and sampling["pad_token_id"] == 0
+
+
+def test_split_generations():
+    """Test split_generations group the contiguous sequences of each prompt."""
+    list_text = [" e4", " d4", " Nf3", " c4"]
+    list_output = split_generations(model_id, list_text, [1, 1, 2, 1], [5, 7], 2, 2)
+
+    (first, list_first), (second, list_second) = list_output
+
+    assert list_first == [" e4", " d4"] and list_second == [" Nf3", " c4"]
+    assert first.inputs_tokens == 5 and first.outputs_tokens == 2
+    assert second.inputs_tokens == 7 and second.outputs_tokens == 3
+
+
+def test_split_generations_greedy():
+    """Test split_generations repeat a greedy generation for the samples."""
+    list_output = split_generations(model_id, [" e4", " d4"], [1, 1], [5, 5], 1, 3)
+
+    assert [list_san for _, list_san in list_output] == [[" e4"] * 3, [" d4"] * 3]
+    assert all(output_inf.number_requests == 1 for output_inf, _ in list_output)
+
+
+def test_transformer_model_missing_dependencies():
+    """Test TransformerModel explain how to install the optional dependencies."""
+    try:
+        import torch  # noqa
+        import transformers  # noqa
+    except ImportError:
+        with pytest.raises(ImportError, match="bresse\\[local\\]"):
+            TransformerModel("sshleifer/tiny-gpt2")
+    else:
+        pytest.skip("'transformers' is installed")
+
+
+def tiny_model(path: Path, architecture: str) -> str:
+    """Save a tiny random model with a tokenizer by character (no download)."""
+    torch = pytest.importorskip("torch")
+    transformers = pytest.importorskip("transformers")
+    tokenizers = pytest.importorskip("tokenizers")
+
+    chars = sorted(set(string.printable) - set("\r\x0b\x0c"))
+    vocab = {"<eos>": 0, "<unk>": 1, **{char: i + 2 for i, char in enumerate(chars)}}
+
+    tokenizer = tokenizers.Tokenizer(tokenizers.models.WordLevel(vocab, "<unk>"))
+    tokenizer.pre_tokenizer = tokenizers.pre_tokenizers.Split(
+        tokenizers.Regex("."), behavior="isolated"
+    )
+    tokenizer.decoder = tokenizers.decoders.Fuse()
+
+    if architecture == "gpt2":
+        config = transformers.GPT2Config(
+            vocab_size=len(vocab), n_embd=16, n_layer=2, n_head=2, eos_token_id=0
+        )
+    else:
+        config = transformers.LlamaConfig(
+            vocab_size=len(vocab),
+            hidden_size=16,
+            intermediate_size=32,
+            num_hidden_layers=2,
+            num_attention_heads=2,
+            eos_token_id=0,
+        )
+
+    torch.manual_seed(0)
+    transformers.AutoModelForCausalLM.from_config(config).save_pretrained(path)
+    transformers.PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer,
+        eos_token="<eos>",
+        unk_token="<unk>",
+        model_input_names=["input_ids", "attention_mask"],
+    ).save_pretrained(path)
+
+    return f"{path}"
+
+
+@pytest.mark.parametrize("architecture", ["gpt2", "llama"])
+def test_transformer_prefix_cache(tmp_path, architecture):
+    """Test TransformerModel reuse the KV cache of the prefix like a full generation."""
+    model = TransformerModel(tiny_model(tmp_path, architecture))
+    config = ConfigInference(n=2, temperature=0.0, max_tokens=3)
+
+    prompt = "1. e4 e5 2."
+    (_, list_prefix), *_ = model._inference_batch([prompt], config)
+    (_, list_full), *_ = model._generate_batch([prompt], config)
+
+    assert list_prefix == list_full, "Generation with the KV cache differ"
+    assert model.prefix_cache.misses == 1
+
+    # Longer prompt extend the cached prefix (only the new tokens are computed)
+    (_, list_prefix), *_ = model._inference_batch([f"{prompt} Nf3"], config)
+    (_, list_full), *_ = model._generate_batch([f"{prompt} Nf3"], config)
+
+    assert list_prefix == list_full
+    assert model.prefix_cache.hits == 1 and len(model.prefix_cache) == 1
+
+
+@pytest.mark.parametrize("architecture", ["gpt2", "llama"])
+def test_transformer_prefix_cache_sampling(tmp_path, architecture):
+    """Test TransformerModel don't modify the cached prefix when sampling many sequences."""
+    model = TransformerModel(tiny_model(tmp_path, architecture))
+    config = ConfigInference(n=3, temperature=1.0, max_tokens=3)
+    torch = pytest.importorskip("torch")
+    ids = model.tokenizer("1. e4 e5 2.")["input_ids"]
+
+    with torch.inference_mode():
+        cache = model._prefill(ids)
+        length = cache[0][0].shape[-2]
+
+        (output_inf, list_san), *_ = model._inference_batch(["1. e4 e5 2."], config)
+        copy = copy_cache(cache, 3)
+
+    assert len(list_san) == 3 and output_inf.inputs_tokens == len(ids)
+    assert cache[0][0].shape[-2] == length, "Cached prefix is modified"
+    assert copy[0][0].shape[0] == 3 and cache[0][0].shape[0] == 1
@@ -0,0 +1,93 @@
+import asyncio
+
+import chess
+import chess.pgn
+
+from bresse.input import ConfigInference
+from bresse.memo import PositionMemo
+from bresse.telemetry import Telemetry
+from tests.conftest import FakeModelCount
+
+
+def play_sans(*list_san: str) -> chess.pgn.Game:
+    """Return a game with the moves played."""
+    game = chess.pgn.Game()
+    node = game
+
+    for san in list_san:
+        node = node.add_variation(node.board().parse_san(san))
+
+    return game
+
+
+def test_memo_key_transposition():
+    """Test the transpositions have the same key (not the suffix policy)."""
+    memo = PositionMemo()
+    game_a = play_sans("e4", "e5", "Nf3")
+    game_b = play_sans("Nf3", "e5", "e4")
+    config = ConfigInference()
+
+    key_a = memo.key(game_a.end().board(), "1. e4 e5 2. Nf3", config)
+    key_b = memo.key(game_b.end().board(), "1. Nf3 e5 2. e4", config)
+
+    assert key_a == key_b
+    assert key_a != memo.key(game_a.end().board(), "", ConfigInference(n=2))
+
+    memo = PositionMemo(suffix_tokens=2)
+
+    assert memo.key(game_a.end().board(), "1. e4 e5 2. Nf3", config) != memo.key(
+        game_b.end().board(), "1. Nf3 e5 2. e4", config
+    )
+
+
+def test_memo_inference_transposition():
+    """Test the model reuse the generation of a transposition."""
+    model = FakeModelCount(list_san=["Nc6", "Nf6", "e5"])
+    model.memo = PositionMemo()
+    model.telemetry = Telemetry()
+
+    output_a = model.inference(play_sans("e4", "e5", "Nf3"))
+    output_b = model.inference(play_sans("Nf3", "e5", "e4"))
+
+    assert model.calls == 1
+    assert output_b.cached and not output_a.cached
+    assert output_b.counter == output_a.counter
+    assert output_b.counter is not output_a.counter
+    assert output_b.most_common == "Nc6"
+    assert model.memo.hits == 1 and model.memo.hit_rate == 0.5
+    assert model.telemetry.summary()["cache_hits"] == 1
+
+
+def test_memo_ainference():
+    """Test the asynchronous inference reuse the memo."""
+    model = FakeModelCount(list_san=["Nc6", "Nf6", "e5"])
+    model.memo = PositionMemo()
+
+    async def infer_twice():
+        await model.ainference(chess.pgn.Game())
+        return await model.ainference(chess.pgn.Game())
+
+    output = asyncio.run(infer_twice())
+
+    assert model.calls == 1
+    assert output.cached
+
+
+def test_memo_lru():
+    """Test the memo evict the least recently used positions."""
+    model = FakeModelCount(list_san=["Nc6", "Nf6", "e5"])
+    model.memo = PositionMemo(max_size=2)
+    list_game = [play_sans(san) for san in ("e4", "d4", "c4")]
+
+    for game in list_game:
+        model.inference(game)
+
+    assert len(model.memo) == 2
+
+    model.inference(list_game[0])
+
+    assert model.calls == 4, "First position must be evicted"
+
+    model.memo.clear()
+
+    assert len(model.memo) == 0 and model.memo.hits == 0
@@ -1,3 +1,7 @@
+import asyncio
+import itertools
+from io import StringIO
+
 import chess.pgn
 import pytest
 
@@ -62,3 +66,79 @@ def test_model_play():
     assert game.variations[0].move == chess.Move.from_uci(
         "a2a4"
     ), "Move could not be played"
+
+
+def test_model_inference_side_variation():
+    """Test the generations are validated on the mainline, not the last variation."""
+    game = chess.pgn.read_game(StringIO("1. e4 e5 (1... c5 2. Nf3) 2. Nf3 Nc6 *"))
+    model = FakeModel(model_id="gpt-3.5-turbo-instruct", list_san=["Bb5", "d6"])
+
+    output = model.inference(game, ConfigInference(n=2))
+
+    assert output.counter == {"Bb5": 1}, "Moves validated on the side variation"
+    assert output.list_result.errors == 1, "Illegal move accepted"
+
+
+def test_model_auto_play():
+    """Test the auto_play method stop at the first illegal move."""
+    game = chess.pgn.Game()
+
+    model = FakeModel(
+        model_id="gpt-3.5-turbo-instruct",
+        list_san=[" e4 e5 2. Nf3 Nc6 3. Ka1 Bc5"],
+    )
+
+    model.auto_play(game, ConfigInference())
+    moves = [move.uci() for move in game.mainline_moves()]
+
+    assert moves == ["e2e4", "e7e5", "g1f3", "b8c6"], "Moves could not be played"
+
+
+def test_model_aplay_concurrency():
+    """Test the asynchronous play is bounded by max_concurrency."""
+    in_flight = []
+
+    class FakeModelSlow(FakeModel):
+        max_concurrency = 2
+
+        async def _ainference(self, pgn_prompt, config=ConfigInference()):
+            in_flight.append(1)
+            await asyncio.sleep(0.01)
+            result = self._inference(pgn_prompt, config)
+            in_flight.append(-1)
+            return result
+
+    model = FakeModelSlow(model_id="gpt-3.5-turbo-instruct", list_san=["e4"])
+    games = [chess.pgn.Game() for _ in range(6)]
+
+    async def play_all():
+        await asyncio.gather(*(model.aplay(game) for game in games))
+
+    asyncio.run(play_all())
+    max_in_flight = max(itertools.accumulate(in_flight))
+
+    assert max_in_flight == 2, "Concurrency is not bounded"
+    assert all(game.variations for game in games), "Move could not be played"
+
+
+def test_model_aauto_play():
+    """Test the asynchronous auto_play (default '_ainference' run in a thread)."""
+    game = chess.pgn.Game()
+    model = FakeModel(model_id="gpt-3.5-turbo-instruct", list_san=["e4 e5 2. Nf3"])
+
+    asyncio.run(model.aauto_play(game, ConfigInference()))
+    moves = [move.uci() for move in game.mainline_moves()]
+
+    assert moves == ["e2e4", "e7e5", "g1f3"], "Moves could not be played"
+
+
+def test_model_auto_play_stream():
+    """Test the streamed auto_play (default '_stream_inference' use '_inference')."""
+    game = chess.pgn.Game()
+    model = FakeModel(model_id="gpt-3.5-turbo-instruct", list_san=["e4 e5 1-0 Nf3"])
+
+    output_inf = model.auto_play(game, ConfigInference(), stream=True)
+    moves = [move.uci() for move in game.mainline_moves()]
+
+    assert moves == ["e2e4", "e7e5"], "Moves after the result are played"
+    assert output_inf.outputs_tokens == 3
@@ -1,9 +1,16 @@
 from collections import Counter
 
+import chess
 import pytest
 
 from bresse.identifiers.base import ModelId
-from bresse.output import OutputGeneration, OutputInference
+from bresse.output import (
+    ErrorKind,
+    OutputGeneration,
+    OutputInference,
+    Result,
+    ResultList,
+)
 
 model_id = ModelId(
     id="gpt-3.5-turbo-instruct",
@@ -44,3 +51,104 @@ def test_output_gen_init_error():
 
     with pytest.raises(ExceptionGroup):
         output.most_common  # noqa
+
+
+def test_output_gen_from_inference():
+    """Test OutputGeneration.from_inference validate each generation."""
+    board = chess.Board()
+    list_san = [" e4", "e4", "Ng1f3", "e5", "e4+", "e5"]
+
+    output = OutputGeneration.from_inference(board=board, list_san=list_san)
+    list_error = [result.exception is not None for result in output.list_result]
+
+    assert output.counter == Counter({"e4": 2, "Ng1f3": 1, "e4+": 1})
+    assert list_error == [False, False, False, True, False, True]
+    assert isinstance(output.list_result[3].exception, chess.IllegalMoveError)
+    assert output.most_common == "e4"
+
+
+def test_output_gen_from_inference_suffix():
+    """Test OutputGeneration.from_inference reject SAN with many check suffixes."""
+    board = chess.Board()
+    list_san = ["e4#", "e4++", "e4#+"]
+
+    output = OutputGeneration.from_inference(board=board, list_san=list_san)
+    list_error = [result.exception is not None for result in output.list_result]
+
+    assert output.counter == Counter({"e4#": 1})
+    assert list_error == [False, True, True]
+    assert isinstance(output.list_result[1].exception, chess.InvalidMoveError)
+
+
+def test_result_list():
+    """Test ResultList store results compactly and give them back."""
+    board = chess.Board()
+    list_san = ["e4", "e4", "e5", "Ke2", "e5"]
+
+    output = OutputGeneration.from_inference(board=board, list_san=list_san)
+    list_result = output.list_result
+
+    assert isinstance(list_result, ResultList)
+    assert len(list_result) == 5 and list_result.errors == 3
+    assert list_result.counter() == output.counter
+    assert list_result.error_kind(2) == ErrorKind.ILLEGAL
+    assert list_result[-1] == Result("e5", "e5", list_result[2].exception)
+    assert [result.san for result in list_result] == list_san
+
+
+def test_result_list_like_list():
+    """Test ResultList support the slices and the append of a Result (like a list)."""
+    board = chess.Board()
+    list_san = ["e4", "e4", "e5", "Ke2", "e5"]
+
+    output = OutputGeneration.from_inference(board=board, list_san=list_san)
+    list_result = output.list_result
+    expected = list(list_result)
+
+    assert list(list_result[0:2]) == expected[0:2]
+    assert list(list_result[::-2]) == expected[::-2]
+    assert isinstance(list_result[1:], ResultList)
+    assert list_result[1:].errors == 3
+
+    list_result.append(Result("Nf3", "Nf3", None))
+    assert len(list_result) == 6 and list_result[-1].exception is None
+    assert list_result.counter()["Nf3"] == 1
+
+
+def test_output_inf_add():
+    """Test OutputInference of the same model can be added and summed."""
+    list_output = [
+        OutputInference(model_id, number_requests=1, inputs_tokens=i, outputs_tokens=2)
+        for i in range(1, 5)
+    ]
+
+    total = sum(list_output)
+
+    assert total.number_requests == 4
+    assert total.inputs_tokens == 10 and total.outputs_tokens == 8
+    assert total.cost == pytest.approx(sum(output.cost for output in list_output))
+    assert (list_output[0] + list_output[1]).inputs_tokens == 3
+    assert list_output[0].inputs_tokens == 1, "Addition modify the operand"
+
+
+def test_output_inf_iadd():
+    """Test OutputInference accumulate in place."""
+    total = OutputInference.zero(model_id)
+    identity = id(total)
+
+    for _ in range(3):
+        total += output_gen
+
+    assert id(total) == identity
+    assert total.number_requests == 30 and total.outputs_tokens == 18
+
+
+def test_output_inf_add_other_model():
+    """Test OutputInference of different models can't be added."""
+    other_id = ModelId(id="other", input_cost_million=1, output_cost_million=1)
+    other = OutputInference(
+        other_id, number_requests=1, inputs_tokens=1, outputs_tokens=1
+    )
+
+    with pytest.raises(ValueError):
+        output_gen + other  # noqa
@@ -0,0 +1,205 @@
+import random
+
+import chess
+import chess.pgn
+import pytest
+
+from bresse.chess_ import game_play_san, get_legal_san
+from bresse.process import (
+    PromptBuilder,
+    SanTokenizer,
+    invalidate_prompt,
+    postprocess_result,
+    preprocess_game,
+)
+from tests.conftest import load_path_pgn
+
+HEADERS = """[Event "?"]
+[Site "?"]
+[Date "????.??.??"]
+[Round "?"]
+[White "?"]
+[Black "?"]
+[Result "*"]
+
+"""
+
+
+def test_preprocess_game_white():
+    """Test preprocess_game add the move number when White has the trait."""
+    game = chess.pgn.Game()
+
+    game_play_san(game, "e4")
+    game_play_san(game, "e5")
+
+    assert preprocess_game(game) == f"{HEADERS}1. e4 e5 2.", "Prompt is not correct"
+
+
+def test_preprocess_game_black():
+    """Test preprocess_game don't add the move number when Black has the trait."""
+    game = chess.pgn.Game()
+
+    game_play_san(game, "e4")
+    preprocess_game(game)
+    game_play_san(game, "e5")
+    game_play_san(game, "Nf3")
+
+    assert preprocess_game(game) == f"{HEADERS}1. e4 e5 2. Nf3", "Prompt is not correct"
+
+
+def test_preprocess_game_annotations():
+    """Test preprocess_game export again the game when a comment is added."""
+    game = chess.pgn.Game()
+
+    game_play_san(game, "e4")
+    preprocess_game(game)
+
+    game.end().comment = "best by test"
+    game_play_san(game, "e5")
+
+    expected = f"{HEADERS}1. e4 {{ best by test }} 1... e5 2."
+    assert preprocess_game(game) == expected, "Prompt is not correct"
+
+
+def reference_prompt(game: chess.pgn.Game) -> str:
+    """Return the prompt of a full export ('str(game)' without the result)."""
+    str_game = str(game)[: -len(game.headers["Result"])]
+    board = game.end().board()
+
+    if board.turn == chess.WHITE:
+        str_game += f"{board.fullmove_number}."
+
+    return str_game.strip()
+
+
+def play_sans(*list_san: str) -> chess.pgn.Game:
+    """Return a game with the moves played (prompt built)."""
+    game = chess.pgn.Game()
+
+    for san in list_san:
+        game_play_san(game, san)
+        preprocess_game(game)
+
+    return game
+
+
+def test_preprocess_game_last_node():
+    """Test preprocess_game detect the edits of the last node without invalidation."""
+    game = play_sans("e4", "e5")
+
+    game.end().nags.add(chess.pgn.NAG_GOOD_MOVE)
+    assert preprocess_game(game) == reference_prompt(game)
+
+    # Last move replaced by a variation
+    node = game.end().parent.add_variation(chess.Move.from_uci("c7c5"))
+    node.parent.promote_to_main(node)
+    assert preprocess_game(game) == reference_prompt(game)
+
+    game.headers["White"] = "Carlsen, M."
+    assert preprocess_game(game) == reference_prompt(game)
+
+
+def test_preprocess_game_earlier_comment():
+    """Test preprocess_game export again the game when an earlier node is annotated."""
+    game = play_sans("e4", "e5", "Nf3")
+
+    game.next().comment = "best by test"
+    game.next().next().nags.add(chess.pgn.NAG_GOOD_MOVE)
+    game.next().next().starting_comment = "open game"
+    invalidate_prompt(game)
+
+    assert preprocess_game(game) == reference_prompt(game)
+    assert "{ best by test }" in preprocess_game(game)
+
+
+def test_preprocess_game_earlier_variation():
+    """Test preprocess_game export again the game when a variation is added or removed."""
+    game = play_sans("e4", "e5", "Nf3")
+    node = game.next()
+
+    variation = node.add_variation(chess.Move.from_uci("c7c5"))
+    invalidate_prompt(game)
+    assert preprocess_game(game) == reference_prompt(game)
+    assert "( 1... c5 )" in preprocess_game(game)
+
+    node.remove_variation(variation)
+    invalidate_prompt(game)
+    assert preprocess_game(game) == reference_prompt(game)
+
+    # Deep edit inside a side variation
+    variation = node.add_variation(chess.Move.from_uci("c7c5"))
+    invalidate_prompt(game)
+    preprocess_game(game)
+    variation.add_variation(chess.Move.from_uci("g1f3"))
+    invalidate_prompt(game)
+    assert preprocess_game(game) == reference_prompt(game)
+
+
+def test_preprocess_game_random_edits():
+    """Test preprocess_game match a full export after random edits of the game (invalidated if not the last node)."""
+    random_ = random.Random(0)
+
+    for _ in range(200):
+        game = play_sans("e4", "e5", "Nf3", "Nc6")
+
+        for _ in range(6):
+            nodes = [game, *game.mainline()]
+            nodes += [child for node in nodes for child in node.variations[1:]]
+            node = random_.choice(nodes)
+            edit = random_.randrange(5)
+            last = game.end()
+
+            if edit == 0:
+                san = random_.choice(sorted(get_legal_san(game.end().board())))
+                game_play_san(game, san)
+            elif edit == 1:
+                node.comment = f"comment {random_.random():.2f}"
+            elif edit == 2:
+                node.nags.add(random_.randrange(1, 7))
+            elif edit == 3 and node.variations:
+                node.variations[0].starting_comment = "start"
+            else:
+                legal = node.board().legal_moves
+                moves = [move for move in legal if not node.has_variation(move)]
+
+                if moves:
+                    node.add_variation(random_.choice(moves))
+
+            if edit and node is not last:
+                invalidate_prompt(game)
+
+            assert preprocess_game(game) == reference_prompt(game), str(game)
+
+
+@pytest.mark.parametrize("path_pgn", load_path_pgn())
+def test_prompt_builder_incremental(path_pgn):
+    """Test PromptBuilder give the same prompt as a full export, move by move."""
+    with path_pgn.open() as pgn_file:
+        reference = chess.pgn.read_game(pgn_file)
+
+    game = chess.pgn.Game()
+    game.headers = reference.headers.copy()
+    game.headers["Result"] = "*"
+
+    for move in reference.mainline_moves():
+        prompt = preprocess_game(game)
+        assert prompt == PromptBuilder(game).prompt, "Prompt differ from full export"
+
+        game_play_san(game, game.end().board().san(move))
+
+
+def test_postprocess_result():
+    """Test postprocess_result clean the castling of the LLM generation."""
+    assert postprocess_result(" 0-0 Bc5") == "O-O", "Castling is not cleaned"
+
+
+def test_san_tokenizer():
+    """Test SanTokenizer split the chunks like 'text.split(" ")'."""
+    text = " e4 e5 2. Nf3 Nc6 3.Bb5"
+    chunks = [" e", "4 e5", " 2", ". Nf3 N", "c6 3.Bb5"]
+    tokenizer = SanTokenizer()
+
+    tokens = [token for chunk in chunks for token in tokenizer.feed(chunk)]
+    tokens.extend(tokenizer.flush())
+
+    assert tokens == text.split(" "), "Tokens are not correct"
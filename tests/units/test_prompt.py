@@ -0,0 +1,129 @@
+import io
+
+import chess
+import chess.pgn
+import pytest
+
+from bresse.process import preprocess_game
+from bresse.prompt import (
+    EssentialHeaders,
+    FullPrompt,
+    LastMoves,
+    SlidingWindow,
+    compare_strategies,
+    estimate_game_tokens,
+)
+from tests.conftest import FakeModel, load_path_pgn
+
+
+def load_game() -> chess.pgn.Game:
+    """Return the first valid game of the 'data' directory."""
+    with load_path_pgn("valid")[0].open() as file:
+        return chess.pgn.read_game(file)
+
+
+def play_plies(game: chess.pgn.Game, plies: int) -> chess.pgn.Game:
+    """Return the game until the ply (result '*')."""
+    position_game = chess.pgn.Game(dict(game.headers))
+    position_game.headers["Result"] = "*"
+    node = position_game
+
+    for move in list(game.mainline_moves())[:plies]:
+        node = node.add_variation(move)
+
+    return position_game
+
+
+def test_full_prompt():
+    """Test FullPrompt is the prompt of preprocess_game."""
+    game = play_plies(load_game(), 10)
+
+    assert FullPrompt().render(game) == preprocess_game(game)
+
+
+def test_essential_headers():
+    """Test EssentialHeaders drop the other headers and the unknown values."""
+    game = play_plies(load_game(), 4)
+    game.headers["White"] = 'Carlsen "Magnus"'
+    game.headers["WhiteElo"] = "?"
+    prompt = EssentialHeaders().render(game)
+
+    assert prompt.startswith('[White "Carlsen \\"Magnus\\""]')
+    assert "WhiteElo" not in prompt and "Event" not in prompt
+    assert prompt.endswith(preprocess_game(game).split("\n\n")[1])
+
+
+@pytest.mark.parametrize("plies", [3, 4, 9, 30])
+def test_last_moves_position(plies: int):
+    """Test LastMoves prompt describe the position of the game."""
+    game = play_plies(load_game(), plies)
+    prompt = LastMoves(k=4).render(game)
+
+    window = chess.pgn.read_game(io.StringIO(prompt))
+
+    assert len(list(window.mainline_moves())) == min(4, plies)
+    assert window.end().board().fen() == game.end().board().fen()
+    assert ("SetUp" in window.headers) == (plies > 4)
+
+
+def test_last_moves_trait():
+    """Test LastMoves prompt end with the move number when White has the trait."""
+    game = play_plies(load_game(), 10)
+    prompt = LastMoves(k=3).render(game)
+
+    assert prompt.endswith(" 6."), prompt
+    assert "\n\n4... dxc4 5. e4 Bb4 6." in prompt
+
+
+def test_last_moves_side_variation():
+    """Test LastMoves keep the last moves of the mainline, not of the last variation."""
+    game = chess.pgn.read_game(io.StringIO("1. e4 e5 (1... c5 2. Nf3) 2. Nf3 Nc6 *"))
+    prompt = LastMoves(k=2).render(game)
+
+    window = chess.pgn.read_game(io.StringIO(prompt))
+
+    assert [move.uci() for move in window.mainline_moves()] == ["g1f3", "b8c6"]
+    assert window.end().board().fen() == game.end().board().fen()
+    assert prompt.endswith(" 3."), prompt
+
+
+def test_sliding_window_step():
+    """Test SlidingWindow keep the first move until the next step."""
+    game = load_game()
+    strategy = SlidingWindow(k=4, step=4)
+
+    prompts = [strategy.render(play_plies(game, plies)) for plies in range(8, 12)]
+    fens = {chess.pgn.read_game(io.StringIO(p)).headers["FEN"] for p in prompts}
+
+    assert len(fens) == 1, "Start of the window must not move inside a step"
+    assert strategy._start_ply(12) == 8 and strategy._start_ply(3) == 0
+
+
+def test_estimate_game_tokens():
+    """Test the input tokens of a game are bounded with the last moves."""
+    game = load_game()
+    list_strategy = [FullPrompt(), EssentialHeaders(), LastMoves(k=10)]
+    tokens = compare_strategies(game, list_strategy)
+
+    assert list(tokens) == [
+        "FullPrompt()",
+        "EssentialHeaders(headers=5)",
+        "LastMoves(k=10)",
+    ]
+    assert tokens["FullPrompt()"] > tokens["EssentialHeaders(headers=5)"]
+    assert tokens["EssentialHeaders(headers=5)"] > tokens["LastMoves(k=10)"]
+    assert estimate_game_tokens(chess.pgn.Game(), FullPrompt()) == 0
+
+
+def test_model_prompt_strategy():
+    """Test the model infer the prompt of its strategy."""
+    game = play_plies(load_game(), 40)
+    model = FakeModel("gpt-3.5-turbo-instruct")
+
+    full = model.inference(game)
+    model.prompt_strategy = LastMoves(k=6)
+    last = model.inference(game)
+
+    # Input tokens of FakeModel is the length of the prompt
+    assert last.inputs_tokens == len(LastMoves(k=6).render(game))
+    assert last.inputs_tokens < full.inputs_tokens
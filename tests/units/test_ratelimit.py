@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+from bresse.ratelimit import RateLimiter, get_rate_limiter, is_rate_limited
+
+
+class FakeRateLimitError(Exception):
+    """Fake exception of a client for a 429 response."""
+
+    status_code = 429
+
+
+class FakeClock:
+    """Fake monotonic clock, advanced manually."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Return the current time."""
+        return self.now
+
+
+def test_rate_limiter_requests():
+    """Test RateLimiter pace the requests once the burst is consumed."""
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_minute=60, clock=clock)
+
+    delays = [limiter.reserve() for _ in range(62)]
+
+    assert delays[:60] == [0.0] * 60, "Burst of the minute is not allowed"
+    assert delays[60:] == pytest.approx([1.0, 2.0]), "Requests are not paced"
+
+    clock.now = 10.0
+    assert limiter.reserve() == pytest.approx(0.0), "Bucket is not refilled"
+
+
+def test_rate_limiter_tokens_settle():
+    """Test RateLimiter correct the estimated tokens with the real usage."""
+    limiter = RateLimiter(tokens_per_minute=600, clock=FakeClock())
+
+    assert limiter.reserve(tokens=600) == 0.0
+    assert limiter.reserve(tokens=60) == pytest.approx(6.0)
+
+    # Calls used less tokens than estimated
+    limiter.settle(estimated=660, actual=600)
+    assert limiter.reserve(tokens=60) == pytest.approx(6.0)
+
+
+def test_rate_limiter_retry():
+    """Test RateLimiter retry the calls rejected with a 429 status."""
+    limiter = RateLimiter(max_retries=3, base_delay=0.001)
+    errors = [FakeRateLimitError(), FakeRateLimitError()]
+
+    def func() -> str:
+        if errors:
+            raise errors.pop()
+        return "ok"
+
+    assert limiter.call(func) == "ok"
+    assert limiter.retries == 2
+
+
+def test_rate_limiter_retry_refund():
+    """Test RateLimiter give back the quota of the rejected calls."""
+    clock = FakeClock()
+    limiter = RateLimiter(60, max_retries=3, base_delay=0.001, clock=clock)
+    errors = [FakeRateLimitError(), FakeRateLimitError()]
+
+    def func() -> str:
+        if errors:
+            raise errors.pop()
+        return "ok"
+
+    assert limiter.call(func) == "ok"
+    assert limiter._requests.level == 59, "Rejected calls consume the quota"
+
+
+def test_rate_limiter_retry_exhausted():
+    """Test RateLimiter raise the error after the maximum of retries."""
+    limiter = RateLimiter(max_retries=2, base_delay=0.001)
+
+    async def func() -> str:
+        raise FakeRateLimitError()
+
+    with pytest.raises(FakeRateLimitError):
+        asyncio.run(limiter.acall(func))
+
+    assert limiter.retries == 2
+
+
+def test_rate_limiter_other_errors():
+    """Test RateLimiter don't retry the errors who are not rate limits."""
+    limiter = RateLimiter(base_delay=0.001)
+
+    def func() -> str:
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        limiter.call(func)
+
+    assert limiter.retries == 0
+    assert not is_rate_limited(ValueError())
+
+
+def test_get_rate_limiter_shared():
+    """Test get_rate_limiter return the same limiter for the same name."""
+    limiter = get_rate_limiter("test:shared", requests_per_minute=10)
+
+    assert get_rate_limiter("test:shared") is limiter
+    assert get_rate_limiter("test:other") is not limiter
+
+
+def test_get_rate_limiter_other_limits():
+    """Test get_rate_limiter raise an error if the limits of a name change."""
+    limiter = get_rate_limiter("test:limits", requests_per_minute=10)
+
+    assert get_rate_limiter("test:limits", requests_per_minute=10) is limiter
+
+    with pytest.raises(ValueError):
+        get_rate_limiter("test:limits", requests_per_minute=20)
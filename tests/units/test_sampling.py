@@ -0,0 +1,81 @@
+import asyncio
+from collections import Counter
+
+import chess.pgn
+
+from bresse.input import ConfigInference
+from bresse.output import Output
+from bresse.sampling import is_decided, wave_config
+from tests.conftest import FakeModelCount
+
+
+def test_wave_config():
+    """Test wave_config request the next samples with another seed."""
+    config = ConfigInference(n=10, best_of=10, seed=42, wave_size=4)
+    wave = wave_config(config, drawn=8)
+
+    assert wave.n == 2 and wave.best_of == 2
+    assert wave.seed == 50
+    assert wave.wave_size is None
+    assert config.n == 10
+
+
+def test_is_decided_lead():
+    """Test is_decided stop once the lead can't be overturned."""
+    config = ConfigInference(n=10, wave_size=2)
+
+    assert not is_decided(Counter(e4=3), 3, config)
+    assert is_decided(Counter(e4=6), 6, config)
+    assert not is_decided(Counter(e4=4, d4=2), 6, config)
+    assert is_decided(Counter(), 10, config)
+    assert not is_decided(Counter(), 4, config)
+
+
+def test_is_decided_confidence():
+    """Test is_decided stop once the leading share pass the confidence."""
+    config = ConfigInference(n=10, wave_size=2, confidence=0.75)
+
+    assert is_decided(Counter(e4=3), 4, config)
+    assert not is_decided(Counter(e4=2, d4=1), 4, config)
+
+
+def test_adaptive_inference_early_stop():
+    """Test the adaptive inference stop when the first waves agree."""
+    model = FakeModelCount(list_san=["e4"], cycle=True)
+    config = ConfigInference(n=8, wave_size=2, confidence=0.9)
+    output = model.inference(chess.pgn.Game(), config)
+
+    assert isinstance(output, Output)
+    assert len(model.list_config) == 1
+    assert output.number_requests == 1
+    assert output.most_common == "e4"
+    assert len(output.list_result) == 2
+
+
+def test_adaptive_inference_until_decided():
+    """Test the adaptive inference request waves until the lead is decided."""
+    model = FakeModelCount(
+        list_san=["e4", "d4", "e4", "e4", "e4", "e4", "Ka1"], cycle=True
+    )
+    config = ConfigInference(n=7, wave_size=2)
+    output = model.play(chess.pgn.Game(), config)
+
+    # e4 lead by 4 with 1 sample remaining after 6 samples
+    assert [wave.n for wave in model.list_config] == [2, 2, 2]
+    assert output.number_requests == 3
+    assert output.outputs_tokens == 9
+    assert output.most_common == "e4"
+
+
+def test_aadaptive_inference():
+    """Test the asynchronous adaptive inference use all samples if undecided."""
+    model = FakeModelCount(list_san=["e4", "d4"], cycle=True)
+    config = ConfigInference(n=5, wave_size=2)
+
+    async def run_inference(model):
+        return await model.ainference(chess.pgn.Game(), config)
+
+    output = asyncio.run(run_inference(model))
+
+    assert [wave.n for wave in model.list_config] == [2, 2, 1]
+    assert output.counter == Counter(e4=3, d4=2)
@@ -0,0 +1,116 @@
+import chess.pgn
+import pytest
+
+from bresse.cache import LRUCache
+from bresse.identifiers.base import ModelId
+from bresse.output import OutputInference
+from bresse.telemetry import Reservoir, Telemetry, percentile
+from tests.conftest import FakeModel
+
+model_id = ModelId(id="model", input_cost_million=1, output_cost_million=2)
+
+
+def output_inf(latency: float, cached: bool = False) -> OutputInference:
+    """Create an OutputInference with a latency."""
+    return OutputInference(
+        model_id=model_id,
+        number_requests=1,
+        inputs_tokens=1_000,
+        outputs_tokens=10,
+        latency=latency,
+        ttft=latency / 2,
+        cached=cached,
+    )
+
+
+def test_percentile():
+    """Test percentile interpolate between the ranks."""
+    values = [float(value) for value in range(1, 101)]
+
+    assert percentile(values, 0.5) == pytest.approx(50.5)
+    assert percentile(values, 0.99) == pytest.approx(99.01)
+    assert percentile([], 0.5) == 0.0
+
+
+def test_reservoir_bounded():
+    """Test Reservoir keep a bounded sample with the exact count and sum."""
+    reservoir = Reservoir(size=100, seed=0)
+
+    for value in range(10_000):
+        reservoir.add(value / 10_000)
+
+    assert len(reservoir.values) == 100
+    assert reservoir.count == 10_000 and len(reservoir) == 10_000
+    assert reservoir.total == pytest.approx(sum(range(10_000)) / 10_000)
+    assert reservoir.percentile(0.5) == pytest.approx(0.5, abs=0.15)
+
+    merged = Reservoir(size=100, seed=0)
+    merged.merge([reservoir, reservoir])
+
+    assert len(merged.values) == 100 and merged.count == 20_000
+
+
+def test_telemetry_summary():
+    """Test Telemetry aggregate latencies, throughput and cost per game."""
+    telemetry = Telemetry()
+
+    for latency in range(1, 101):
+        telemetry.record(output_inf(latency / 100))
+
+    telemetry.record(output_inf(0.0, cached=True))
+    telemetry.add_game(2)
+    summary = telemetry.summary()
+
+    assert summary["requests"] == 100 and summary["cache_hits"] == 1
+    assert summary["latency_p50"] == pytest.approx(0.505)
+    assert summary["latency_p95"] == pytest.approx(0.9505)
+    assert summary["ttft_p50"] == pytest.approx(0.2525)
+    assert summary["tokens_per_second"] == pytest.approx(1_000 / 50.5)
+    assert summary["cost_per_game"] == pytest.approx(100 * 0.00102 / 2)
+    assert telemetry.summary("model") == summary
+
+
+def test_telemetry_prometheus():
+    """Test Telemetry export the metrics in the Prometheus text format."""
+    telemetry = Telemetry()
+    telemetry.record(output_inf(0.5))
+    telemetry.add_game()
+
+    text = telemetry.to_prometheus()
+    lines = text.splitlines()
+
+    assert "# TYPE bresse_inference_latency_seconds summary" in lines
+    assert 'bresse_inference_latency_seconds{model="model",quantile="0.5"} 0.5' in lines
+    assert 'bresse_inference_latency_seconds_count{model="model"} 1' in lines
+    assert 'bresse_inference_tokens_total{model="model",type="input"} 1000' in lines
+    assert "bresse_games_total 1" in lines
+    assert text.endswith("\n")
+
+
+def test_telemetry_prometheus_escape():
+    """Test Telemetry escape the label values in the Prometheus text format."""
+    telemetry = Telemetry()
+    name = ModelId(id='a\\b"c\nd', input_cost_million=0, output_cost_million=0)
+    telemetry.record(OutputInference(name, 1, 1, 1, latency=0.5))
+
+    lines = telemetry.to_prometheus().splitlines()
+
+    assert 'bresse_inference_requests_total{model="a\\\\b\\"c\\nd"} 1' in lines
+
+
+def test_model_telemetry():
+    """Test Model record the latency, retries and cache status of inferences."""
+    game = chess.pgn.Game()
+    model = FakeModel("gpt-3.5-turbo-instruct")
+    model.cache = LRUCache()
+    model.telemetry = Telemetry()
+
+    first = model.inference(game)
+    second = model.inference(game)
+    telemetry = model.telemetry.models["gpt-3.5-turbo-instruct"]
+
+    assert not first.cached and first.latency > 0 and first.ttft == first.latency
+    assert second.cached and second.latency == 0.0
+    assert first.retries == 0
+    assert telemetry.requests == 1 and telemetry.cache_hits == 1
+    assert len(telemetry.latencies) == 1
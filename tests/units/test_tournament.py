@@ -0,0 +1,126 @@
+from pathlib import Path
+from unittest import mock
+
+import chess.pgn
+import pytest
+
+from bresse.chess_ import generate_opening
+from bresse.memo import PositionMemo
+from bresse.telemetry import Telemetry
+from bresse.tournament import Tournament, gauntlet, round_robin
+from tests.conftest import FakeModel
+
+POLYGLOT_PATH = Path(__file__).parents[1] / "data" / "gm2600.bin"
+
+
+def test_round_robin():
+    """Test round_robin create a match for each pair, color and opening."""
+    models = [FakeModel(model_id="gpt-3.5-turbo-instruct") for _ in range(3)]
+    openings = [chess.pgn.Game(), chess.pgn.Game()]
+
+    matches = round_robin(models, openings=openings, self_play=True)
+
+    assert len(matches) == (3 * 2 + 3) * 2, "Number of matches is not correct"
+
+
+def test_gauntlet():
+    """Test gauntlet create a match for each opponent and color."""
+    model = FakeModel(model_id="gpt-3.5-turbo-instruct")
+    opponents = [model, FakeModel(model_id="gpt-3.5-turbo-instruct")]
+
+    matches = gauntlet(model, opponents)
+
+    assert len(matches) == 4, "Number of matches is not correct"
+    assert matches[0].white is model and matches[1].black is model
+
+
+def test_tournament_run(tmp_path: Path):
+    """Test Tournament play all games, stream them and report statistics."""
+    path_pgn = tmp_path / "games.pgn"
+    model = FakeModel(model_id="gpt-3.5-turbo-instruct")
+    matches = gauntlet(model, [model]) * 3
+
+    tournament = Tournament(matches, workers=4, path_pgn=path_pgn)
+    report = tournament.run()
+
+    with path_pgn.open() as file:
+        games = list(iter(lambda: chess.pgn.read_game(file), None))
+
+    stats = report.stats[f"{model}"]
+
+    assert report.games == 6 and len(games) == 6, "All games are not played"
+    assert all(game.headers["Result"] == "0-1" for game in games)
+    assert stats.forfeits == 6, "Model never find a legal move at 4. (only Ka1)"
+    assert stats.moves == 6 * 6, "Model play 'e4 e5 Nf3 Nc6 Bc4 Bc5' in each game"
+    assert stats.illegal_rate == stats.illegal_samples / stats.samples
+    assert report.cost > 0 and report.games_per_minute > 0
+
+
+def test_tournament_opening():
+    """Test Tournament play the models after the opening."""
+    opening = generate_opening(POLYGLOT_PATH, max_depth=2, seed=42)
+    model = FakeModel(model_id="gpt-3.5-turbo-instruct", list_san=["Ka1"])
+    matches = round_robin([model], openings=[opening], self_play=True)
+
+    tournament = Tournament(matches, max_moves=10)
+    report = tournament.run()
+
+    assert report.games == 1
+    assert report.stats[f"{model}"].moves == 0, "Ka1 is never a legal move"
+    assert report.stats[f"{model}"].forfeits == 1
+
+
+def test_tournament_cached_cost():
+    """Test the cached inferences have no cost in the report (same as the telemetry)."""
+    model = FakeModel(model_id="gpt-3.5-turbo-instruct")
+    model.memo = PositionMemo()
+    model.telemetry = Telemetry()
+    matches = gauntlet(model, [model]) * 2
+
+    report = Tournament(matches, workers=1).run()
+    stats = report.stats[f"{model}"]
+
+    assert stats.cache_hits > 0, "Same positions in each game, found in the memo"
+    assert (
+        stats.number_requests
+        == model.telemetry.models["gpt-3.5-turbo-instruct"].requests
+    )
+    assert report.cost == pytest.approx(model.telemetry.cost)
+
+
+def test_tournament_inference_error(tmp_path: Path):
+    """Test Tournament abandon the games whose inference fail and continue."""
+    path_pgn = tmp_path / "games.pgn"
+    model = FakeModel(model_id="gpt-3.5-turbo-instruct")
+    broken = FakeModel(model_id="gpt-3.5-turbo-instruct")
+    matches = gauntlet(model, [model, broken])
+
+    with mock.patch.object(broken, "_inference", side_effect=RuntimeError("error")):
+        with pytest.warns(UserWarning, match="abandoned"):
+            report = Tournament(matches, workers=4, path_pgn=path_pgn).run()
+
+    with path_pgn.open() as file:
+        games = list(iter(lambda: chess.pgn.read_game(file), None))
+
+    abandoned = [game for game in games if game.headers["Termination"] == "abandoned"]
+
+    assert report.games == 2 and report.errors == 2
+    assert len(games) == 4, "Finished games are discarded"
+    assert len(abandoned) == 2 and all(g.headers["Result"] == "*" for g in abandoned)
+    assert report.stats[f"{model}"].errors == 0
+    assert report.stats[f"{broken} #2"].errors == 2
+
+
+def test_tournament_same_name():
+    """Test Tournament keep the statistics of the instances with the same name apart."""
+    model = FakeModel(model_id="gpt-3.5-turbo-instruct", list_san=["Ka1"])
+    other = FakeModel(model_id="gpt-3.5-turbo-instruct", list_san=["e4"])
+    matches = round_robin([model, other])
+
+    report = Tournament(matches, max_moves=2).run()
+    names = [f"{model}", f"{model} #2"]
+
+    assert list(report.stats) == names
+    assert report.stats[names[0]].model is model
+    assert report.stats[names[0]].losses == 2, "'Ka1' is never a legal move"
+    assert report.stats[names[1]].wins == 2
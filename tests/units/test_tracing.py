@@ -0,0 +1,163 @@
+import asyncio
+
+import chess.pgn
+import pytest
+
+from bresse.input import ConfigInference
+from bresse.memo import PositionMemo
+from bresse.tracing import InMemoryExporter, NoopTracer, OpenTelemetryExporter, Tracer
+from tests.conftest import FakeModel
+
+STAGES = {
+    "inference",
+    "preprocess",
+    "board",
+    "provider",
+    "from_inference",
+    "from_outputs",
+}
+
+
+def test_noop_tracer():
+    """Test the no-op tracer accept spans and attributes without recording."""
+    tracer = NoopTracer()
+
+    with tracer.span("stage", key="value") as span:
+        span.set_attribute("other", 1)
+
+    assert not hasattr(tracer, "stats")
+
+
+def test_tracer_nested_spans():
+    """Test the children spans are exported with their root span."""
+    exporter = InMemoryExporter()
+    tracer = Tracer(exporters=[exporter])
+
+    with tracer.span("root", key="value") as root:
+        with tracer.span("child") as child:
+            child.set_attribute("other", 1)
+
+        assert exporter.traces == []
+
+    (spans,) = exporter.traces
+
+    assert [span.name for span in spans] == ["child", "root"]
+    assert child.parent_id == root.span_id
+    assert child.trace_id == root.trace_id
+    assert root.parent_id is None
+    assert root.attributes == {"key": "value"}
+    assert child.attributes == {"other": 1}
+    assert root.duration >= child.duration >= 0
+    assert root.end_time >= child.end_time
+
+
+def test_tracer_error():
+    """Test the span of a failed block is recorded with the error."""
+    exporter = InMemoryExporter()
+    tracer = Tracer(exporters=[exporter])
+
+    with pytest.raises(ValueError):
+        with tracer.span("root"):
+            raise ValueError("error")
+
+    assert exporter.traces[0][0].attributes == {"error": "ValueError"}
+    assert tracer.stats["root"].count == 1
+
+
+def test_model_inference_stages():
+    """Test the inference of a model is split in the traced stages."""
+    exporter = InMemoryExporter()
+    model = FakeModel("gpt-3.5-turbo-instruct", list_san=["e4", "e4", "Nf3"])
+    model.tracer = Tracer(exporters=[exporter])
+
+    output = model.inference(chess.pgn.Game(), ConfigInference(n=3))
+    (spans,) = exporter.traces
+    root = spans[-1]
+
+    assert output.most_common == "e4"
+    assert {span.name for span in spans} == STAGES
+    assert root.name == "inference"
+    assert root.attributes == {"model": "gpt-3.5-turbo-instruct"}
+    assert all(span.parent_id == root.span_id for span in spans[:-1])
+
+    summary = model.tracer.summary()
+    split = model.tracer.latency_split()
+
+    assert summary["provider"]["count"] == 1
+    assert summary["from_inference"]["count"] == 1
+    assert split["total"] == pytest.approx(split["provider"] + split["local"])
+
+
+def test_model_ainference_stages():
+    """Test the concurrent inferences of a model are separate traces."""
+    exporter = InMemoryExporter()
+    model = FakeModel("gpt-3.5-turbo-instruct", list_san=["e4"])
+    model.tracer = Tracer(exporters=[exporter])
+
+    async def main():
+        games = [chess.pgn.Game() for _ in range(3)]
+        await asyncio.gather(*(model.ainference(game) for game in games))
+
+    asyncio.run(main())
+
+    assert len(exporter.traces) == 3
+
+    for spans in exporter.traces:
+        assert {span.name for span in spans} == STAGES
+        assert len({span.trace_id for span in spans}) == 1
+
+
+def test_model_memo_stages():
+    """Test a transposition found in the memo has no provider span."""
+    exporter = InMemoryExporter()
+    model = FakeModel("gpt-3.5-turbo-instruct", list_san=["e4"])
+    model.memo = PositionMemo()
+    model.tracer = Tracer(exporters=[exporter])
+
+    model.inference(chess.pgn.Game())
+    model.inference(chess.pgn.Game())
+
+    assert {span.name for span in exporter.traces[1]} == {
+        "inference",
+        "preprocess",
+        "board",
+    }
+    assert model.tracer.stats["provider"].count == 1
+
+
+def test_model_adaptive_stages():
+    """Test each wave of samples has its provider and validation spans."""
+    model = FakeModel("gpt-3.5-turbo-instruct", list_san=["e4", "Nf3"])
+    model.tracer = Tracer()
+
+    model.inference(chess.pgn.Game(), ConfigInference(n=4, wave_size=2))
+
+    assert model.tracer.stats["provider"].count == 2
+    assert model.tracer.stats["from_inference"].count == 2
+    assert model.tracer.stats["from_outputs"].count == 1
+
+
+def test_opentelemetry_exporter():
+    """Test the spans are forwarded to OpenTelemetry with their parents and times."""
+    sdk_trace = pytest.importorskip("opentelemetry.sdk.trace")
+    export = pytest.importorskip("opentelemetry.sdk.trace.export")
+    in_memory = pytest.importorskip(
+        "opentelemetry.sdk.trace.export.in_memory_span_exporter"
+    )
+
+    otel_exporter = in_memory.InMemorySpanExporter()
+    provider = sdk_trace.TracerProvider()
+    provider.add_span_processor(export.SimpleSpanProcessor(otel_exporter))
+
+    tracer = Tracer(exporters=[OpenTelemetryExporter(provider.get_tracer("test"))])
+
+    with tracer.span("root") as root:
+        with tracer.span("child"):
+            pass
+
+    spans = {span.name: span for span in otel_exporter.get_finished_spans()}
+
+    assert spans["child"].parent.span_id == spans["root"].context.span_id
+    assert spans["root"].start_time == root.start_time
+    assert spans["root"].end_time == root.end_time
+    assert "bresse.net_blocks_delta" in spans["root"].attributes